@@ -334,28 +334,13 @@ class AppGUI(tk.Tk):
                 transits = len(set(leg['train_id'] for leg in route)) - 1
                 line += f"Jumlah Transit: {transits}\n"
 
-                # --- Hitung tarif hanya sekali untuk seluruh rute ---
+                # --- Tarif perjalanan: tap-in di stasiun awal, tap-out di stasiun tujuan ---
                 fare = None
-                if hasattr(self.app_logic, "schedule") and hasattr(self.app_logic.schedule, "get_fare_for_train"):
-                    # Coba dapatkan train_obj dari leg pertama
-                    train_obj = getattr(route[0], "train_obj", None)
-                    if train_obj is None and hasattr(self.app_logic.schedule, "station_to_trains_map"):
-                        trains = self.app_logic.schedule.station_to_trains_map.get(route[0]['start_station'], [])
-                        for t in trains:
-                            if t.train_id == route[0]['train_id']:
-                                train_obj = t
-                                break
-                    if train_obj:
-                        # Panggil tanpa from_station/to_station
-                        fare = self.app_logic.schedule.get_fare_for_train(train_obj)
-                    else:
-                        # fallback: hitung manual jika info train_obj tidak ada
-                        from train_schedule import calculate_fare
-                        region = route[0].get('region', None)
-                        # Buat list stasiun dari awal ke akhir
-                        route_list = [leg['start_station'] for leg in route] + [route[-1]['destination_station']]
-                        if route_list and region:
-                            fare = calculate_fare(route_list, region)
+                schedule = getattr(self.app_logic, "schedule", None)
+                if schedule is not None and hasattr(schedule, "journey_fare"):
+                    fare = schedule.journey_fare(route)
+                    if fare < 0:
+                        fare = None
                 if fare is not None:
                     line += f"Tarif: Rp{fare:,}\n"
                 # ---------------------------------------------------
@@ -0,0 +1,68 @@
+# Beberapa instans (tapi gk semua) yang dibantu Github Copilot dan Google Gemini
+# -- Awal Kutipan
+"""
+Benchmark cold start aplikasi: mengimpor `main` di interpreter Python baru
+beberapa kali, lalu memastikan waktu import (median) di bawah batas dan modul
+berat (mlflow, pandas) tidak ikut termuat.
+
+Pemakaian: python benchmark_startup.py [--runs 5] [--budget 1.0]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ("mlflow", "pandas")
+DEFAULT_RUNS = 5
+DEFAULT_BUDGET_SECONDS = 1.0
+
+# Dijalankan di proses terpisah agar setiap pengukuran benar-benar cold start
+_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(runs: int) -> list:
+    """Hasil tiap percobaan: {"seconds": waktu import main, "loaded": modul berat yang termuat}."""
+    project_dir = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for __ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE], cwd=project_dir,
+            capture_output=True, text=True, check=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def run_benchmark(runs: int = DEFAULT_RUNS, budget: float = DEFAULT_BUDGET_SECONDS) -> float:
+    results = measure_import(runs)
+    timings = [result["seconds"] for result in results]
+    median = statistics.median(timings)
+    print(f"import main: median {median:.3f} s, min {min(timings):.3f} s, max {max(timings):.3f} s ({runs} percobaan)")
+
+    loaded = sorted({module for result in results for module in result["loaded"]})
+    assert not loaded, f"Modul berat ikut termuat saat start: {', '.join(loaded)}"
+    assert median <= budget, f"Cold start {median:.3f} s melebihi batas {budget:.3f} s"
+    return median
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark waktu cold start import main.")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="jumlah percobaan (default: %(default)s)")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS,
+                        help="batas median waktu import dalam detik (default: %(default)s)")
+    args = parser.parse_args()
+    try:
+        run_benchmark(args.runs, args.budget)
+    except AssertionError as error:
+        sys.exit(f"GAGAL: {error}")
+    print("OK")
+
+# -- Akhir kutipan
@@ -0,0 +1,104 @@
+# Beberapa instans (tapi gk semua) yang dibantu Github Copilot dan Google Gemini
+# -- Awal Kutipan
+import bisect
+from typing import Dict, Tuple
+
+from data_models import Region, TRANSFER_MINUTES
+
+INFINITY = float("inf")
+
+
+class ConnectionScanEngine:
+    """
+    Mesin Connection Scan (CSA) untuk query waktu tiba paling awal. Memindai array
+    koneksi TrainSchedule (terurut menurut menit berangkat) satu kali secara linear
+    mulai dari offset hasil bisect. Naik kereta lain butuh buffer TRANSFER_MINUTES;
+    tetap di kereta yang sama ditangani lewat penanda trip, jadi tidak ada buffer.
+    """
+
+    def __init__(self, schedule):
+        self.schedule = schedule
+        self.n_stations = len(schedule.stations)
+        # Potongan array per wilayah diubah ke list Python sekali saja, karena
+        # akses elemen numpy satu per satu jauh lebih lambat di loop pemindaian.
+        self.connections: Dict[Region, tuple] = {}
+        for region, (start, end) in schedule.connection_slices.items():
+            self.connections[region] = tuple(
+                column[start:end].tolist() for column in (
+                    schedule.conn_dep, schedule.conn_arr, schedule.conn_from, schedule.conn_to,
+                    schedule.conn_trip, schedule.conn_train, schedule.conn_from_pos, schedule.conn_to_pos,
+                )
+            )
+
+    def find_journey(self, origin: int, dest: int, t0: int, region: Region, max_transits: int) -> list:
+        """
+        Perjalanan dengan waktu tiba paling awal dari origin ke dest (berangkat
+        setelah menit t0) dengan paling banyak max_transits transit; jika waktu tiba
+        sama, yang transitnya paling sedikit. Hasilnya daftar leg
+        (kereta, posisi naik, posisi turun, menit berangkat, menit tiba), atau []
+        jika tidak ada.
+        """
+        columns = self.connections.get(region)
+        if columns is None or origin == dest:
+            return []
+        deps, arrs, froms, tos, trips, __, __, __ = columns
+        max_trips = max_transits + 1
+        # arrival[k][stasiun] = waktu tiba paling awal dengan tepat k kereta
+        arrival = [[INFINITY] * self.n_stations for __ in range(max_trips + 1)]
+        parent = [[None] * self.n_stations for __ in range(max_trips + 1)]
+        arrival[0][origin] = t0
+        # trip -> (jumlah kereta saat naik, indeks koneksi tempat naik)
+        boarded: Dict[int, Tuple[int, int]] = {}
+        target = INFINITY
+
+        for c in range(bisect.bisect_right(deps, t0), len(deps)):
+            dep = deps[c]
+            if dep >= target:
+                break
+            trip = trips[c]
+            state = boarded.get(trip)
+            # Coba naik dengan jumlah kereta sesedikit mungkin di stasiun asal koneksi
+            u = froms[c]
+            level = state[0] if state is not None else max_trips + 1
+            for k in range(1, level):
+                ready = arrival[k - 1][u]
+                if ready == INFINITY:
+                    continue
+                if k > 1:
+                    ready += TRANSFER_MINUTES
+                if ready < dep:
+                    state = (k, c)
+                    boarded[trip] = state
+                    break
+            if state is None:
+                continue
+
+            k, board = state
+            arr = arrs[c]
+            v = tos[c]
+            if any(arrival[j][v] <= arr for j in range(1, k + 1)):
+                continue
+            arrival[k][v] = arr
+            parent[k][v] = (board, c)
+            if v == dest and arr < target:
+                target = arr
+
+        if target == INFINITY:
+            return []
+        k = min(j for j in range(1, max_trips + 1) if arrival[j][dest] == target)
+        return self._journey(region, parent, dest, k)
+
+    def _journey(self, region: Region, parent, stop: int, k: int) -> list:
+        """Merekonstruksi leg dari penunjuk parent, mundur dari stop pada level k."""
+        deps, arrs, froms, __, __, train_idx, from_pos, to_pos = self.connections[region]
+        trains = self.schedule.trains
+        legs = []
+        while k > 0:
+            board, alight = parent[k][stop]
+            legs.append((trains[train_idx[board]], from_pos[board], to_pos[alight], deps[board], arrs[alight]))
+            stop = froms[board]
+            k -= 1
+        legs.reverse()
+        return legs
+
+# -- Akhir kutipan
@@ -1,9 +1,48 @@
 # Beberapa instans (tapi gk semua) yang dibantu Github Copilot dan Google Gemini
 # -- Awal Kutipan
-import datetime
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from enum import Enum  # Import Enum
-from typing import List, Dict, Any
+from collections.abc import Mapping
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+
+# Waktu di dalam jadwal disimpan sebagai menit sejak tengah malam.
+MINUTES_PER_DAY = 24 * 60
+NO_TIME = -1  # Penanda stasiun yang tidak punya jam di jadwal
+# Buffer (menit) setelah turun sebelum bisa naik lagi: pindah kereta vs kereta yang sama
+TRANSFER_MINUTES = 15
+SAME_TRAIN_MINUTES = 2
+
+def time_to_minutes(time_str: str) -> int:
+    """Mengubah string "HH:MM" menjadi menit sejak tengah malam."""
+    h, m = time_str.split(':')
+    return int(h) * 60 + int(m)
+
+def minutes_to_time(minutes: int) -> str:
+    """Kebalikan time_to_minutes; menit >= 1440 dibungkus ke hari berikutnya."""
+    h, m = divmod(minutes % MINUTES_PER_DAY, 60)
+    return f"{h:02d}:{m:02d}"
+
+def resolve_day_rollover(minutes: List[int]) -> List[int]:
+    """
+    Menyelesaikan pergantian hari sekali saja: jika jam mundur lebih dari 12 jam
+    (misal 23:53 -> 00:00), stasiun berikutnya dianggap hari berikutnya (+1440).
+    Mundur kecil (salah ketik di data) dibiarkan apa adanya. NO_TIME tetap NO_TIME.
+    """
+    resolved = []
+    day_offset = 0
+    prev = None
+    for minute in minutes:
+        if minute == NO_TIME:
+            resolved.append(NO_TIME)
+            continue
+        value = minute + day_offset
+        if prev is not None and prev - value > MINUTES_PER_DAY // 2:
+            day_offset += MINUTES_PER_DAY
+            value += MINUTES_PER_DAY
+        resolved.append(value)
+        prev = value
+    return resolved
 
 # Merepresentasikan wilayah operasional KRL
 class Region(Enum):
@@ -11,33 +50,376 @@ class Region(Enum):
     YOGYA_SOLO = "Commuter Line Yogyakarta-Solo-Kutoarjo"
     RANGKASBITUNG_MERAK = "Commuter Line Rangkasbitung-Merak"
 
-# Data class yg merepresentasikan satu kereta.
-@dataclass
-class Train:
-    train_id: str = ""
-    name: str = ""
-    route: List[str] = field(default_factory=list)
-    departure_times: Dict[str, str] = field(default_factory=dict)
-    # --- TAMBAHKAN FIELD INI ---
-    region: Region = Region.JABODETABEK  # Atribut baru untuk wilayah
+# Arah perjalanan kereta, dipakai untuk memilih model okupansi
+class Direction(Enum):
     
-    def __init__(self, train_id: str, name: str = "", route: List[str] = None, departure_times: Dict[str, str] = None, region: Region = Region.JABODETABEK):
-        self.train_id = train_id
-        self.name = name
-        self.route = route if route is not None else []
-        self.departure_times = departure_times if departure_times is not None else {}
-        self.region = region
+    # Rute Eksisting
+    DARI_BOGOR_MENUJU_JAKARTAKOTA = 1
+    DARI_JAKARTAKOTA_MENUJU_BOGOR = 2
+    DARI_BEKASI_MENUJU_CIKARANG = 3
+    MENUJU_RANGKASBITUNG = 4
+    MENUJU_TANGERANG = 5
+    DUA_ARAH = 6
+    UNKNOWN = 7
+    DARI_BOGOR_MENUJU_DEPOK = 8
+    DARI_MANGGARAI_MENUJU_ANGKE = 9
+    MENUJU_KAMPUNGBANDAN = 10
+    MENUJU_NAMBO = 11
+    DARI_DEPOK_MENUJU_MANGGARAI = 12
+    MENUJU_TANAHABANG = 13
+    DARI_CIKARANG_MENUJU_BEKASI = 14
+    MENUJU_DURI = 15
+    DARI_BOGOR_MENUJU_MANGGARAI = 16
+    DARI_TANAH_ABANG_MENUJU_MANGGARAI = 17
+    DARI_MANGGARAI_MENUJU_BOGOR = 18
+    DARI_NAMBO_MENUJU_JAKARTAKOTA = 19
+    DARI_JAKARTAKOTA_MENUJU_NAMBO = 20
+    DARI_DURI_MENUJU_MANGGARAI = 21
+    DARI_BEKASI_MENUJU_ANGKE = 22
+    DARI_BEKASI_MENUJU_MANGGARAI = 23
+    DARI_BEKASI_MENUJU_KAMPUNG_BANDAN_MELALUI_PASAR_SENEN = 24
+    DARI_KAMPUNG_BANDAN_MENUJU_BEKASI_MELALUI_PASAR_SENEN = 25
+    DARI_KAMPUNG_BANDAN_MENUJU_CIKARANG_MELALUI_PASAR_SENEN = 26
+    DARI_CIKARANG_MENUJU_KAMPUNG_BANDAN_MELALUI_PASAR_SENEN = 27
+    DARI_ANGKE_MENUJU_MANGGARAI = 28
+    DARI_MANGGARAI_MENUJU_DURI = 29
+
     
+    # Rute Tambahan Sesi 1
+    DARI_CIKARANG_MENUJU_ANGKE_MELALUI_MANGGARAI = 30
+    DARI_ANGKE_MENUJU_CIKARANG_MELALUI_MANGGARAI = 31
+    DARI_BEKASI_MENUJU_ANGKE_MELALUI_MANGGARAI = 32
+    DARI_ANGKE_MENUJU_BEKASI_MELALUI_MANGGARAI = 33
+    DARI_CIKARANG_MENUJU_MANGGARAI = 34
+    DARI_RANGKASBITUNG_MENUJU_TANAHABANG = 35
+    DARI_TANAHABANG_MENUJU_RANGKASBITUNG = 36
+    DARI_TANGERANG_MENUJU_DURI = 37
+    DARI_DURI_MENUJU_TANGERANG = 38
+    DARI_JATINEGARA_MENUJU_BOGOR = 39
+    DARI_BOGOR_MENUJU_JATINEGARA = 40
+
+    # --- PENAMBAHAN RUTE BARU (SESI 2) ---
+    DARI_MANGGARAI_MENUJU_CIKARANG = 41
+    DARI_CIKARANG_MENUJU_KAMPUNGBANDAN_MELALUI_MANGGARAI = 42
+    DARI_KAMPUNGBANDAN_MENUJU_CIKARANG_MELALUI_MANGGARAI = 43
+    DARI_BEKASI_MENUJU_KAMPUNGBANDAN_MELALUI_MANGGARAI = 44
+    DARI_KAMPUNGBANDAN_MENUJU_BEKASI_MELALUI_MANGGARAI = 45
+    MENUJU_ANGKE = 46
+    # ------------------------------------
+    # -- Ini akhir dari kutipan Gemini
+
+
+def normalize_station(name: str) -> str:
+    """Removes parenthetical parts from station names."""
+    if not name:
+        return ""
+    return name.split('(')[0].strip().lower() # Konversi ke lowercase untuk konsistensi
+
+# Aturan arah dari (stasiun awal, stasiun akhir) yang sudah dinormalisasi. Dicek
+# berurutan dan cocok jika potongan nama terkandung di nama stasiun.
+_DIRECTION_BY_FIRST_LAST = (
+    # Rute Eksisting
+    ("jakarta kota", "bogor", Direction.DARI_JAKARTAKOTA_MENUJU_BOGOR),
+    ("bogor", "jakarta kota", Direction.DARI_BOGOR_MENUJU_JAKARTAKOTA),
+    ("bogor", "depok", Direction.DARI_BOGOR_MENUJU_DEPOK),
+    ("depok", "manggarai", Direction.DARI_DEPOK_MENUJU_MANGGARAI),
+    ("bogor", "manggarai", Direction.DARI_BOGOR_MENUJU_MANGGARAI),
+    ("tanah abang", "manggarai", Direction.DARI_TANAH_ABANG_MENUJU_MANGGARAI),
+    ("manggarai", "bogor", Direction.DARI_MANGGARAI_MENUJU_BOGOR),
+    ("jakarta kota", "nambo", Direction.DARI_JAKARTAKOTA_MENUJU_NAMBO),
+    ("nambo", "jakarta kota", Direction.DARI_NAMBO_MENUJU_JAKARTAKOTA),
+    ("manggarai", "duri", Direction.DARI_MANGGARAI_MENUJU_DURI),
+    ("duri", "manggarai", Direction.DARI_DURI_MENUJU_MANGGARAI),
+    ("bekasi", "cikarang", Direction.DARI_BEKASI_MENUJU_CIKARANG),
+    ("cikarang", "bekasi", Direction.DARI_CIKARANG_MENUJU_BEKASI),
+    # Lin Cikarang via Manggarai
+    ("cikarang", "angke", Direction.DARI_CIKARANG_MENUJU_ANGKE_MELALUI_MANGGARAI),
+    ("angke", "cikarang", Direction.DARI_ANGKE_MENUJU_CIKARANG_MELALUI_MANGGARAI),
+    ("bekasi", "angke", Direction.DARI_BEKASI_MENUJU_ANGKE_MELALUI_MANGGARAI),
+    ("angke", "bekasi", Direction.DARI_ANGKE_MENUJU_BEKASI_MELALUI_MANGGARAI),
+    ("cikarang", "manggarai", Direction.DARI_CIKARANG_MENUJU_MANGGARAI),
+    ("manggarai", "cikarang", Direction.DARI_MANGGARAI_MENUJU_CIKARANG),
+    ("cikarang", "kampung bandan", Direction.DARI_CIKARANG_MENUJU_KAMPUNGBANDAN_MELALUI_MANGGARAI),
+    ("kampung bandan", "cikarang", Direction.DARI_KAMPUNGBANDAN_MENUJU_CIKARANG_MELALUI_MANGGARAI),
+    ("bekasi", "kampung bandan", Direction.DARI_BEKASI_MENUJU_KAMPUNGBANDAN_MELALUI_MANGGARAI),
+    ("kampung bandan", "bekasi", Direction.DARI_KAMPUNGBANDAN_MENUJU_BEKASI_MELALUI_MANGGARAI),
+    # Lin Rangkasbitung
+    ("rangkasbitung", "tanah abang", Direction.DARI_RANGKASBITUNG_MENUJU_TANAHABANG),
+    ("tanah abang", "rangkasbitung", Direction.DARI_TANAHABANG_MENUJU_RANGKASBITUNG),
+    # Lin Tangerang
+    ("tangerang", "duri", Direction.DARI_TANGERANG_MENUJU_DURI),
+    ("duri", "tangerang", Direction.DARI_DURI_MENUJU_TANGERANG),
+    # Lin Feeder Jatinegara - Bogor
+    ("jatinegara", "bogor", Direction.DARI_JATINEGARA_MENUJU_BOGOR),
+    ("bogor", "jatinegara", Direction.DARI_BOGOR_MENUJU_JATINEGARA),
+)
+
+# Fallback jika kombinasi awal-akhir tidak dikenal: cukup dari stasiun akhir
+_DIRECTION_BY_LAST = (
+    ("tanjung priok", Direction.DUA_ARAH),
+    ("tanah abang", Direction.MENUJU_TANAHABANG),
+    ("nambo", Direction.MENUJU_NAMBO),
+    ("angke", Direction.MENUJU_ANGKE),
+    ("kampung bandan", Direction.MENUJU_KAMPUNGBANDAN),
+    ("cikarang", Direction.DARI_BEKASI_MENUJU_CIKARANG), # Perbaikan: Lebih spesifik
+    ("tangerang", Direction.MENUJU_TANGERANG),
+    ("duri", Direction.MENUJU_DURI),
+    ("bekasi", Direction.DARI_CIKARANG_MENUJU_BEKASI), # Perbaikan: Lebih spesifik
+    ("rangkasbitung", Direction.MENUJU_RANGKASBITUNG),
+    ("parung panjang", Direction.MENUJU_RANGKASBITUNG),
+)
+
+# Memo (awal, akhir) ternormalisasi -> arah; setiap pasangan hanya diklasifikasi sekali
+_DIRECTION_CACHE: Dict[Tuple[str, str], Direction] = {}
+
+def _classify_direction(first: str, last: str) -> Direction:
+    for first_key, last_key, direction in _DIRECTION_BY_FIRST_LAST:
+        if first_key in first and last_key in last:
+            return direction
+    for last_key, direction in _DIRECTION_BY_LAST:
+        if last_key in last:
+            return direction
+    return Direction.UNKNOWN
+
+def get_direction(route: List[str]) -> Direction:
+    """Determines the direction of a train based on its route."""
+    if not route or len(route) < 2:
+        return Direction.UNKNOWN
+    key = (normalize_station(route[0]), normalize_station(route[-1]))
+    direction = _DIRECTION_CACHE.get(key)
+    if direction is None:
+        direction = _DIRECTION_CACHE[key] = _classify_direction(*key)
+    return direction
+
+
+class StationRegistry:
+    """
+    Registri stasiun kanonik: setiap varian nama stasiun dipetakan sekali ke
+    ID integer padat (0..n-1) sehingga rute, indeks, dan tabel jarak bisa
+    memakai integer dan lookup berbasis array.
+    """
+    # Varian ejaan (setelah normalisasi) yang merujuk ke stasiun yang sama
+    ALIASES = {
+        "kalibata": "durenkalibata",
+        "kampungbadan": "kampungbandan",
+    }
+
+    def __init__(self):
+        self.names: List[str] = []       # Nama kanonik per ID (ejaan pertama yang didaftarkan)
+        self._ids: Dict[str, int] = {}    # Nama persis dan kunci normal -> ID
+
+    @classmethod
+    def normalize(cls, name: str) -> str:
+        """Kunci normal: tanpa bagian dalam kurung, huruf kecil, tanpa spasi."""
+        key = "".join(name.split('(')[0].lower().split())
+        return cls.ALIASES.get(key, key)
+
+    def intern(self, name: str) -> int:
+        """Mengembalikan ID stasiun, mendaftarkannya jika belum ada."""
+        station_id = self._ids.get(name)
+        if station_id is not None:
+            return station_id
+        key = self.normalize(name)
+        station_id = self._ids.get(key)
+        if station_id is None:
+            station_id = len(self.names)
+            self.names.append(name.strip())
+            self._ids[key] = station_id
+        self._ids[name] = station_id
+        return station_id
+
+    def get(self, name: str, default: Optional[int] = None) -> Optional[int]:
+        """Mencari ID dari varian nama apa pun tanpa mendaftarkan nama baru."""
+        station_id = self._ids.get(name)
+        if station_id is None and name:
+            station_id = self._ids.get(self.normalize(name))
+        return default if station_id is None else station_id
+
+    def name_of(self, station_id: int) -> str:
+        return self.names[station_id]
+
+    def __getitem__(self, name: str) -> int:
+        station_id = self.get(name)
+        if station_id is None:
+            raise KeyError(name)
+        return station_id
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class RoutePattern:
+    """
+    Urutan stasiun yang dipakai bersama oleh semua kereta dengan rute identik.
+    TrainSchedule hanya membuat satu objek per rute unik, sehingga tuple nama,
+    ID stasiun, dan peta posisi tidak diduplikasi per kereta.
+    """
+    __slots__ = ("stations", "station_ids", "stop_positions", "name_positions", "cumulative_km", "direction")
+
+    def __init__(self, stations: Tuple[str, ...], station_ids: Tuple[int, ...] = ()):
+        self.stations = stations
+        self.station_ids = station_ids
+        # Peta ID stasiun / nama stasiun -> posisi di rute (kemunculan pertama)
+        self.stop_positions: Dict[int, int] = {}
+        for pos, station_id in enumerate(station_ids):
+            self.stop_positions.setdefault(station_id, pos)
+        self.name_positions: Dict[str, int] = {}
+        for pos, station in enumerate(stations):
+            self.name_positions.setdefault(station, pos)
+        # Jarak kumulatif (km) dari stasiun pertama per posisi, diisi oleh TrainSchedule
+        self.cumulative_km: Tuple[float, ...] = ()
+        # Arah rute diklasifikasi sekali per pola, bukan per prediksi
+        self.direction: Direction = get_direction(stations)
+
+    def __len__(self) -> int:
+        return len(self.stations)
+
+
+class DepartureTimes(Mapping):
+    """View baca-saja {stasiun: "HH:MM"} yang dibentuk dari menit kereta saat diakses."""
+    __slots__ = ("_train",)
+
+    def __init__(self, train: "Train"):
+        self._train = train
+
+    def __getitem__(self, station: str) -> str:
+        pos = self._train.pattern.name_positions.get(station)
+        if pos is None or self._train.minutes[pos] == NO_TIME:
+            raise KeyError(station)
+        return minutes_to_time(int(self._train.minutes[pos]))
+
+    def __iter__(self):
+        minutes = self._train.minutes
+        for pos, station in enumerate(self._train.route):
+            if minutes[pos] != NO_TIME:
+                yield station
+
+    def __len__(self) -> int:
+        return int((self._train.minutes != NO_TIME).sum())
+
+
+def _restore_train(train_id, name, region, pattern, times, offset):
+    return Train._from_storage(train_id, name, region, pattern, times, offset)
+
+
+# Merepresentasikan satu kereta. Objeknya ringkas (__slots__, tanpa __dict__) dan
+# immutable: rute adalah RoutePattern bersama dan menit adalah view ke array
+# stop_times milik TrainSchedule.
+class Train:
+    __slots__ = ("train_id", "name", "region", "pattern", "minutes", "_times", "_offset")
+
+    def __init__(self, train_id: str, name: str = "", route: List[str] = None, departure_times: Dict[str, str] = None, region: Region = Region.JABODETABEK):
+        route = tuple(route) if route is not None else ()
+        departure_times = departure_times if departure_times is not None else {}
+        raw = [time_to_minutes(departure_times[st]) if st in departure_times else NO_TIME for st in route]
+        times = np.array(resolve_day_rollover(raw), dtype=np.int16)
+        self._init(train_id, name, region, RoutePattern(route), times, 0)
+
+    @classmethod
+    def _from_storage(cls, train_id: str, name: str, region: Region, pattern: RoutePattern, times, offset: int) -> "Train":
+        """Dipakai TrainSchedule: kereta berbagi pola rute dan array menit kolumnar."""
+        train = cls.__new__(cls)
+        train._init(train_id, name, region, pattern, times, offset)
+        return train
+
+    def _init(self, train_id, name, region, pattern, times, offset):
+        set_attr = object.__setattr__
+        set_attr(self, "train_id", train_id)
+        set_attr(self, "name", name)
+        set_attr(self, "region", region)
+        set_attr(self, "pattern", pattern)
+        # Menit per stasiun (int16, urut rute, pergantian hari sudah diselesaikan)
+        set_attr(self, "minutes", times[offset:offset + len(pattern)])
+        set_attr(self, "_times", times)
+        set_attr(self, "_offset", offset)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Train bersifat immutable, atribut '{name}' tidak bisa diubah")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Train bersifat immutable, atribut '{name}' tidak bisa dihapus")
+
+    def __reduce__(self):
+        # Simpan array induk + offset agar setelah unpickle menit tetap berupa view bersama
+        return (_restore_train, (self.train_id, self.name, self.region, self.pattern, self._times, self._offset))
+
+    def __repr__(self) -> str:
+        return f"Train(train_id={self.train_id!r}, name={self.name!r}, region={self.region})"
+
+    @property
+    def route(self) -> Tuple[str, ...]:
+        return self.pattern.stations
+
+    @property
+    def station_ids(self) -> Tuple[int, ...]:
+        """ID stasiun (StationRegistry) per posisi rute."""
+        return self.pattern.station_ids
+
+    @property
+    def stop_positions(self) -> Dict[int, int]:
+        """Peta ID stasiun -> posisi di rute (kemunculan pertama)."""
+        return self.pattern.stop_positions
+
+    @property
+    def departure_times(self) -> Mapping:
+        return DepartureTimes(self)
+
+    @property
+    def stop_storage(self) -> Tuple[np.ndarray, int]:
+        """
+        Array menit induk yang dibagi kereta ini (stop_times TrainSchedule untuk
+        kereta dari jadwal) beserta offset stop pertamanya: stop ke-i ada di
+        indeks offset + i. Untuk pembaca yang mengindeks data per stop jadwal.
+        """
+        return self._times, self._offset
+
+    def position_of(self, station) -> Optional[int]:
+        """Posisi stasiun (ID atau nama) di rute kereta dalam O(1), None jika tidak dilewati."""
+        if isinstance(station, int):
+            return self.pattern.stop_positions.get(station)
+        return self.pattern.name_positions.get(station)
+
+    def timed_positions(self) -> List[int]:
+        """
+        Posisi stop yang bisa dipakai untuk naik/turun: punya jam dan jamnya tidak
+        mundur dibanding stop sebelumnya (salah ketik di data dilewati).
+        """
+        positions = []
+        last = None
+        for pos, minute in enumerate(self.minutes.tolist()):
+            if minute == NO_TIME or (last is not None and minute < last):
+                continue
+            positions.append(pos)
+            last = minute
+        return positions
 
 
 # Data class untuk sebuah node dalam pencarian rute.
 @dataclass
 class RouteNode:
-    station: str
-    time: datetime.datetime
-    route: List[Dict[str, Any]] = field(default_factory=list)
+    station: int  # ID stasiun dari StationRegistry
+    time: int  # Menit sejak tengah malam tanggal keberangkatan (bisa >= 1440)
+    parent: Optional["RouteNode"] = None  # Label sebelumnya, None untuk stasiun awal
+    # Leg ringkas yang mengantar ke node ini:
+    # (kereta, posisi naik, posisi turun, menit berangkat, menit tiba, prediksi okupansi)
+    leg: Optional[tuple] = None
     transit: int = 0
+    # Kriteria tambahan untuk pencarian Pareto (RouteFinder.find_routes_pareto)
+    fare: int = 0  # Tarif tap-in di stasiun awal, tap-out di stasiun node ini
+    max_occupancy: int = 0
 
+    def legs(self) -> List[tuple]:
+        """Leg ringkas dari stasiun awal sampai node ini, mengikuti penunjuk parent."""
+        legs = []
+        node = self
+        while node.leg is not None:
+            legs.append(node.leg)
+            node = node.parent
+        legs.reverse()
+        return legs
     
     def __lt__(self, other):
         # Bandingkan dua objek RouteNode. Digunakan oleh priority queue
@@ -8,6 +8,7 @@ import os
 from train_schedule import TrainSchedule
 from route_finder import RouteFinder
 from app_gui import AppGUI
+from occupancy_cube import OccupancyCube, default_cube_path
 
 def main():
     """
@@ -35,11 +36,13 @@ def main():
         )
 
     try:
-        # 1. Muat data jadwal
-        schedule = TrainSchedule(csv_file)
+        # 1. Muat data jadwal (dari snapshot biner jika masih valid)
+        schedule = TrainSchedule.from_snapshot(csv_file)
         
-        # 2. Inisialisasi logika aplikasi
-        app_logic = RouteFinder(schedule)
+        # 2. Inisialisasi logika aplikasi; okupansi dibaca dari kubus offline
+        #    jika ada dan masih cocok dengan jadwal, selain itu dihitung predictor
+        occupancy_cube = OccupancyCube.open(schedule, default_cube_path(csv_file))
+        app_logic = RouteFinder(schedule, defer_occupancy=True, occupancy_cube=occupancy_cube)
         
         # 3. Buat dan jalankan GUI
         gui = AppGUI(app_logic)
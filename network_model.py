@@ -0,0 +1,186 @@
+# Beberapa instans (tapi gk semua) yang dibantu Github Copilot dan Google Gemini
+# -- Awal Kutipan
+from typing import Dict, Iterable, List, Sequence, Tuple
+import numpy as np
+
+from data_models import StationRegistry
+
+# --- JARAK ANTAR STASIUN JABODETABEK (km) ---
+JABODETABEK_DISTANCES = {
+    # A. Bogor - Manggarai
+        ("Bogor", "Cilebut"): 7.518, ("Cilebut", "Bogor"): 7.518,
+        ("Cilebut", "Bojong Gede"): 4.331, ("Bojong Gede", "Cilebut"): 4.331,
+        ("Bojong Gede", "Citayam"): 5.197, ("Citayam", "Bojong Gede"): 5.197,
+        ("Citayam", "Depok"): 5.084, ("Depok", "Citayam"): 5.084,
+        ("Depok", "Depok Baru"): 1.741, ("Depok Baru", "Depok"): 1.741,
+        ("Depok Baru", "Pondok Cina"): 2.57, ("Pondok Cina", "Depok Baru"): 2.57,
+        ("Pondok Cina", "Universitas Indonesia"): 1.109, ("Universitas Indonesia", "Pondok Cina"): 1.109,
+        ("Universitas Indonesia", "Universitas Pancasila"): 2.264, ("Universitas Pancasila", "Universitas Indonesia"): 2.264,
+        ("Universitas Pancasila", "Lenteng Agung"): 1.029, ("Lenteng Agung", "Universitas Pancasila"): 1.029,
+        ("Lenteng Agung", "Tanjung Barat"): 2.460, ("Tanjung Barat", "Lenteng Agung"): 2.460,
+        ("Tanjung Barat", "Pasar Minggu"): 3.031, ("Pasar Minggu", "Tanjung Barat"): 3.031,
+        ("Pasar Minggu", "Pasar Minggu Baru"): 1.695, ("Pasar Minggu Baru", "Pasar Minggu"): 1.695,
+        ("Pasar Minggu Baru", "Kalibata"): 1.509, ("Kalibata", "Pasar Minggu Baru"): 1.509,
+        ("Kalibata", "Cawang"): 1.475, ("Cawang", "Kalibata"): 1.475,
+        ("Cawang", "Tebet"): 1.301, ("Tebet", "Cawang"): 1.301,
+        ("Tebet", "Manggarai"): 2.601, ("Manggarai", "Tebet"): 2.601,
+
+        # B. Rangkas bitung - Tanah abang
+        ("Rangkas bitung", "Citeras"): 9.847, ("Citeras", "Rangkas bitung"): 9.847,
+        ("Citeras", "Maja"): 7.293, ("Maja", "Citeras"): 7.293,
+        ("Maja", "Cikoya"): 1.835, ("Cikoya", "Maja"): 1.835,
+        ("Cikoya", "Tigaraksa"): 2.651, ("Tigaraksa", "Cikoya"): 2.651,
+        ("Tigaraksa", "Tenjo"): 2.974, ("Tenjo", "Tigaraksa"): 2.974,
+        ("Tenjo", "Daru"): 3.902, ("Daru", "Tenjo"): 3.902,
+        ("Daru", "Cilejit"): 2.675, ("Cilejit", "Daru"): 2.675,
+        ("Cilejit", "Parung Panjang"): 7.025, ("Parung Panjang", "Cilejit"): 7.025,
+        ("Parung Panjang", "Cicayur"): 5.968, ("Cicayur", "Parung Panjang"): 5.968,
+        ("Cicayur", "Cisauk"): 2.519, ("Cisauk", "Cicayur"): 2.519,
+        ("Cisauk", "Serpong"): 1.784, ("Serpong", "Cisauk"): 1.784,
+        ("Serpong", "Rawa Buntu"): 2.413, ("Rawa Buntu", "Serpong"): 2.413,
+        ("Rawa Buntu", "Sudimara"): 4.566, ("Sudimara", "Rawa Buntu"): 4.566,
+        ("Sudimara", "Jurang Mangu"): 1.974, ("Jurang Mangu", "Sudimara"): 1.974,
+        ("Jurang Mangu", "Pondok Ranji"): 2.179, ("Pondok Ranji", "Jurang Mangu"): 2.179,
+        ("Pondok Ranji", "Kebayoran"): 6.218, ("Kebayoran", "Pondok Ranji"): 6.218,
+        ("Kebayoran", "Palmerah"): 3.373, ("Palmerah", "Kebayoran"): 3.373,
+        ("Palmerah", "Tanah Abang"): 3.191, ("Tanah Abang", "Palmerah"): 3.191,
+
+        # C. TANAH ABANG - JATINEGARA
+        ("Tanah Abang", "Duri"): 3.632, ("Duri", "Tanah Abang"): 3.632,
+        ("Duri", "Angke"): 1.230, ("Angke", "Duri"): 1.230,
+        ("Angke", "Kampung Badan"): 4.102, ("Kampung Badan", "Angke"): 4.102,
+        ("Kampung Badan", "Rajawali"): 1.444, ("Rajawali", "Kampung Badan"): 1.444,
+        ("Rajawali", "Kemayoran"): 1.901, ("Kemayoran", "Rajawali"): 1.901,
+        ("Kemayoran", "Pasar Senen"): 1.436, ("Pasar Senen", "Kemayoran"): 1.436,
+        ("Pasar Senen", "Gang Sentiong"): 1.567, ("Gang Sentiong", "Pasar Senen"): 1.567,
+        ("Gang Sentiong", "Kramat"): 0.973, ("Kramat", "Gang Sentiong"): 0.973,
+        ("Kramat", "Pondok Jati"): 1.829, ("Pondok Jati", "Kramat"): 1.829,
+        ("Pondok Jati", "Jatinegara"): 1.236, ("Jatinegara", "Pondok Jati"): 1.236,
+
+        # D. JATINEGARA - CIKARANG
+        ("Jatinegara", "Klender"): 3.395, ("Klender", "Jatinegara"): 3.395,
+        ("Klender", "Buaran"): 3.1, ("Buaran", "Klender"): 3.1,
+        ("Buaran", "Klender Baru"): 1.305, ("Klender Baru", "Buaran"): 1.305,
+        ("Klender Baru", "Cakung"): 1.385, ("Cakung", "Klender Baru"): 1.385,
+        ("Cakung", "Kranji"): 3.097, ("Kranji", "Cakung"): 3.097,
+        ("Kranji", "Bekasi"): 2.520, ("Bekasi", "Kranji"): 2.520,
+        ("Bekasi", "Bekasi Timur"): 3.298, ("Bekasi Timur", "Bekasi"): 3.298,
+        ("Bekasi Timur", "Tambun"): 3.43, ("Tambun", "Bekasi Timur"): 3.43,
+        ("Tambun", "Cibitung"): 3.42, ("Cibitung", "Tambun"): 3.42,
+        ("Cibitung", "Cikarang"): 6.489, ("Cikarang", "Cibitung"): 6.489,
+
+        # E. TANAH ABANG - MANGGARAI
+        ("Tanah Abang", "Karet"): 2.029, ("Karet", "Tanah Abang"): 2.029,
+        ("Karet", "BNI City"): 0.377, ("BNI City", "Karet"): 0.377,
+        ("BNI City", "Sudirman"): 0.434, ("Sudirman", "BNI City"): 0.434,
+        ("Sudirman", "Manggarai"): 3.186, ("Manggarai", "Sudirman"): 3.186,
+
+        # F. (Route between Manggarai and Jakarta Kota)
+        ("Manggarai", "Cikini"): 1.606, ("Cikini", "Manggarai"): 1.606,
+        ("Cikini", "Gondangdia"): 1.699, ("Gondangdia", "Cikini"): 1.699,
+        ("Gondangdia", "Juanda"): 2.198, ("Juanda", "Gondangdia"): 2.198,
+        ("Juanda", "Sawah Besar"): 0.707, ("Sawah Besar", "Juanda"): 0.707,
+        ("Sawah Besar", "Mangga Besar"): 1.121, ("Mangga Besar", "Sawah Besar"): 1.121,
+        ("Mangga Besar", "Jayakarta"): 1.02, ("Jayakarta", "Mangga Besar"): 1.02,
+        ("Jayakarta", "Jakarta Kota"): 1.467, ("Jakarta Kota", "Jayakarta"): 1.467,
+
+        # G. TANGERANG - DURI
+        ("Tangerang", "Tanah Tinggi"): 1.609, ("Tanah Tinggi", "Tangerang"): 1.609,
+        ("Tanah Tinggi", "Batu Ceper"): 2.0, ("Batu Ceper", "Tanah Tinggi"): 2.0,
+        ("Batu Ceper", "Poris"): 1.8, ("Poris", "Batu Ceper"): 1.8,
+        ("Poris", "Kalideres"): 2.548, ("Kalideres", "Poris"): 2.548,
+        ("Kalideres", "Rawa Buaya"): 2.504, ("Rawa Buaya", "Kalideres"): 2.504,
+        ("Rawa Buaya", "Bojong Indah"): 1.152, ("Bojong Indah", "Rawa Buaya"): 1.152,
+        ("Bojong Indah", "Taman Kota"): 2.434, ("Taman Kota", "Bojong Indah"): 2.434,
+        ("Taman Kota", "Pesing"): 1.514, ("Pesing", "Taman Kota"): 1.514,
+        ("Pesing", "Grogol"): 2.036, ("Grogol", "Pesing"): 2.036,
+        ("Grogol", "Duri"): 1.7, ("Duri", "Grogol"): 1.7,
+
+        # H. Jakarta Kota - Tanjung Priok
+        ("Jakarta Kota", "Kampung Bandan"): 1.364, ("Kampung Bandan", "Jakarta Kota"): 1.364,
+        ("Kampung Bandan", "Ancol"): 6.5, ("Ancol", "Kampung Bandan"): 6.5,
+        ("Ancol", "Tanjung Priok"):4.566, ("Tanjung Priok", "Ancol"):4.566
+}
+
+# Tabel jarak dengan kunci nama ternormalisasi (StationRegistry.normalize), sehingga
+# varian seperti "Kalibata"/"Duren Kalibata" atau "Rangkas bitung"/"Rangkasbitung" tetap cocok
+_DISTANCES_BY_KEY = {
+    (StationRegistry.normalize(a), StationRegistry.normalize(b)): km
+    for (a, b), km in JABODETABEK_DISTANCES.items()
+}
+DEFAULT_SEGMENT_KM = 2.0
+
+# --- FUNGSI HITUNG JARAK UNTUK JABODETABEK ---
+def get_jabodetabek_distance(station_a: str, station_b: str) -> float:
+    """Mengembalikan jarak (km) antara dua stasiun Jabodetabek, default 2.0 km jika tidak ditemukan."""
+    key_a = StationRegistry.normalize(station_a)
+    key_b = StationRegistry.normalize(station_b)
+    return _DISTANCES_BY_KEY.get(
+        (key_a, key_b),
+        _DISTANCES_BY_KEY.get((key_b, key_a), DEFAULT_SEGMENT_KM)
+    )
+
+# --- FUNGSI HITUNG JARAK TOTAL UNTUK RUTE JABODETABEK ---
+def get_total_jabodetabek_distance(route: list) -> float:
+    total = 0.0
+    for i in range(len(route) - 1):
+        total += get_jabodetabek_distance(route[i], route[i+1])
+    return total
+
+def cumulative_distance(route: Sequence[str]) -> List[float]:
+    """Jarak kumulatif (km) dari stasiun pertama untuk setiap posisi di daftar nama stasiun."""
+    distances = [0.0]
+    for i in range(len(route) - 1):
+        distances.append(distances[-1] + get_jabodetabek_distance(route[i], route[i + 1]))
+    return distances
+
+
+class NetworkModel:
+    """
+    Model jaringan tunggal: jarak per segmen (km) dengan kunci pasangan ID stasiun
+    StationRegistry, dibangun sekali dari JABODETABEK_DISTANCES. Dipakai TrainSchedule
+    untuk mengisi jarak kumulatif setiap RoutePattern saat load, sehingga jarak
+    antara dua stop satu kereta cukup satu pengurangan.
+    """
+
+    def __init__(self, stations: StationRegistry):
+        self.segment_km: Dict[Tuple[int, int], float] = {}
+        for (a, b), km in JABODETABEK_DISTANCES.items():
+            id_a, id_b = stations.intern(a), stations.intern(b)
+            self.segment_km[(id_a, id_b)] = km
+            self.segment_km[(id_b, id_a)] = km
+
+    def segment(self, station_a: int, station_b: int) -> float:
+        """Jarak (km) antara dua stasiun bertetangga, DEFAULT_SEGMENT_KM jika tidak dikenal."""
+        return self.segment_km.get((station_a, station_b), DEFAULT_SEGMENT_KM)
+
+    def prefix_km(self, station_ids: Sequence[int]) -> Tuple[float, ...]:
+        """Jarak kumulatif (km) per posisi sepanjang urutan ID stasiun, mulai dari 0.0."""
+        segment_km = self.segment_km
+        cumulative = [0.0]
+        for i in range(len(station_ids) - 1):
+            cumulative.append(cumulative[-1] + segment_km.get((station_ids[i], station_ids[i + 1]), DEFAULT_SEGMENT_KM))
+        return tuple(cumulative)
+
+    def route_distance_km(self, station_ids: Sequence[int]) -> float:
+        """Total jarak (km) sepanjang urutan ID stasiun."""
+        return self.prefix_km(station_ids)[-1] if station_ids else 0.0
+
+    def shortest_distances(self, n_stations: int, edges: Iterable[Tuple[int, int]]) -> np.ndarray:
+        """
+        Jarak terpendek (km) antar semua pasangan stasiun lewat segmen `edges`
+        (pasangan ID stasiun bertetangga, dua arah), dengan Floyd-Warshall.
+        Matriks (n_stations, n_stations) float64; inf jika tidak terjangkau.
+        """
+        distances = np.full((n_stations, n_stations), np.inf)
+        np.fill_diagonal(distances, 0.0)
+        for a, b in edges:
+            if a == b:
+                continue
+            km = min(distances[a, b], self.segment(a, b))
+            distances[a, b] = distances[b, a] = km
+        for k in range(n_stations):
+            np.minimum(distances, distances[:, k, None] + distances[None, k, :], out=distances)
+        return distances
+
+# -- Akhir kutipan
@@ -0,0 +1,180 @@
+# Beberapa instans (tapi gk semua) yang dibantu Github Copilot dan Google Gemini
+# -- Awal Kutipan
+"""
+Kubus okupansi: okupansi (%) untuk setiap kereta x stop x slot waktu yang
+dihitung sekali secara offline lalu dibaca lewat memory map, sehingga
+RouteFinder tidak perlu menjalankan aturan okupansi saat pencarian.
+
+Pemakaian (job offline): python occupancy_cube.py [trainKRL_schedule.csv]
+"""
+import datetime
+import hashlib
+import os
+import struct
+import sys
+from collections.abc import Mapping
+from typing import Optional
+
+import numpy as np
+
+import occupancy_predictor as predictor
+from data_models import MINUTES_PER_DAY, Train
+from occupancy_predictor import RULES_FILE
+
+# --- FORMAT FILE ---
+# Header: MAGIC | versi (uint16) | sha256 CSV | sha256 file aturan | sha256 sumber
+# predictor | menit per slot (uint16) | jumlah slot (uint16) | jumlah stop (uint32),
+# lalu array uint8 berbentuk (bidang, slot, stop). Bidang 0 = hari kerja, 1 = akhir
+# pekan; kolom stop memakai tata letak stop_times milik TrainSchedule (stop kereta
+# ada di [offset, offset + n)). Naikkan CUBE_VERSION setiap kali format file berubah.
+CUBE_MAGIC = b"KRLOCC"
+CUBE_VERSION = 2
+_CUBE_HEADER = struct.Struct(f"<{len(CUBE_MAGIC)}sH32s32s32sHHI")
+# File sumber yang menentukan isi kubus selain CSV dan file aturan: tabel periode,
+# fallback dan evaluasi aturan (occupancy_predictor) serta tabel arah (data_models).
+# Mengubah salah satunya membuat kubus lama basi.
+_SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+CUBE_SOURCES = tuple(os.path.join(_SOURCE_DIR, name) for name in ("occupancy_predictor.py", "data_models.py"))
+# Semua batas periode jatuh di kelipatan 5 menit, jadi periode aktif tetap
+# sepanjang satu slot dan isi kubus identik dengan predictor.predict
+BUCKET_MINUTES = 5
+BUCKETS_PER_DAY = MINUTES_PER_DAY // BUCKET_MINUTES
+PLANE_DAYS = (0, 5)  # Senin mewakili hari kerja, Sabtu mewakili akhir pekan
+# Okupansi di luar 0-254 tidak muat di uint8; kereta dengan nilai ini dihitung ulang
+NOT_AVAILABLE = 255
+
+def _hash_file(filename: str) -> bytes:
+    with open(filename, mode='rb') as infile:
+        return hashlib.sha256(infile.read()).digest()
+
+def _hash_sources(filenames) -> bytes:
+    digest = hashlib.sha256()
+    for filename in filenames:
+        with open(filename, mode='rb') as infile:
+            digest.update(infile.read())
+    return digest.digest()
+
+def default_cube_path(csv_file: str) -> str:
+    """Lokasi default kubus: di samping file CSV dengan ekstensi .occupancy."""
+    return os.path.splitext(csv_file)[0] + ".occupancy"
+
+def _bucket_periods(day: int) -> list:
+    """Periode aktif per slot untuk satu hari; ValueError jika periode berganti di tengah slot."""
+    periods = []
+    for bucket in range(BUCKETS_PER_DAY):
+        start = day * MINUTES_PER_DAY + bucket * BUCKET_MINUTES
+        rows = predictor._ACTIVE_PERIODS[start:start + BUCKET_MINUTES]
+        if any(row != rows[0] for row in rows):
+            raise ValueError(f"Periode okupansi berganti di tengah slot {BUCKET_MINUTES} menit (menit {start})")
+        periods.append(rows[0])
+    return periods
+
+def build_occupancy_cube(schedule) -> np.ndarray:
+    """Array uint8 (bidang, slot, stop) berisi okupansi semua kereta di jadwal."""
+    n_stops = len(schedule.stop_times)
+    cube = np.empty((len(PLANE_DAYS), BUCKETS_PER_DAY, n_stops), dtype=np.uint8)
+    # Satu baris stop per kombinasi periode; slot dengan periode sama berbagi baris
+    rows = {}
+    for plane, day in enumerate(PLANE_DAYS):
+        for bucket, periods in enumerate(_bucket_periods(day)):
+            if periods not in rows:
+                row = np.full(n_stops, NOT_AVAILABLE, dtype=np.uint8)
+                for train, offset in zip(schedule.trains, schedule.stop_offsets.tolist()):
+                    vector = predictor._occupancy_vector_cached(train.pattern, periods)
+                    in_range = (vector >= 0) & (vector < NOT_AVAILABLE)
+                    row[offset:offset + len(vector)] = np.where(in_range, vector, NOT_AVAILABLE)
+                rows[periods] = row
+            cube[plane, bucket] = rows[periods]
+    return cube
+
+def write_occupancy_cube(schedule, cube_file: str, rules_file: str = RULES_FILE) -> None:
+    """
+    Menulis kubus okupansi jadwal ke file. Seperti snapshot jadwal, file ditulis
+    ke berkas sementara lalu di-rename agar pembaca tidak melihat file setengah jadi.
+    """
+    cube = build_occupancy_cube(schedule)
+    header = _CUBE_HEADER.pack(
+        CUBE_MAGIC, CUBE_VERSION, schedule.source_hash, _hash_file(rules_file), _hash_sources(CUBE_SOURCES),
+        BUCKET_MINUTES, BUCKETS_PER_DAY, cube.shape[2],
+    )
+    tmp_file = f"{cube_file}.{os.getpid()}.tmp"
+    with open(tmp_file, mode='wb') as outfile:
+        outfile.write(header)
+        outfile.write(cube.tobytes())
+    os.replace(tmp_file, cube_file)
+
+
+class CubeOccupancies(Mapping):
+    """View baca-saja {stasiun: okupansi} untuk satu kereta di satu slot kubus."""
+    __slots__ = ("_positions", "_row")
+
+    def __init__(self, positions, row):
+        self._positions = positions
+        self._row = row
+
+    def __getitem__(self, station: str) -> int:
+        return self._row[self._positions[station]]
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+
+class OccupancyCube:
+    """Kubus okupansi yang di-memory-map; dibuka lewat OccupancyCube.open."""
+
+    def __init__(self, schedule, data: np.ndarray):
+        self._stop_times = schedule.stop_times
+        self._data = data
+
+    @classmethod
+    def open(cls, schedule, cube_file: str, rules_file: str = RULES_FILE) -> Optional["OccupancyCube"]:
+        """
+        Membuka kubus untuk jadwal; None jika file tidak ada, rusak, beda versi,
+        atau basi (CSV, file aturan, sumber predictor, atau ukuran jadwal tidak cocok).
+        """
+        try:
+            with open(cube_file, mode='rb') as infile:
+                header = infile.read(_CUBE_HEADER.size)
+            if len(header) != _CUBE_HEADER.size:
+                return None
+            magic, version, csv_hash, rules_hash, code_hash, bucket_minutes, n_buckets, n_stops = _CUBE_HEADER.unpack(header)
+            if (magic != CUBE_MAGIC or version != CUBE_VERSION or csv_hash != schedule.source_hash
+                    or rules_hash != _hash_file(rules_file) or code_hash != _hash_sources(CUBE_SOURCES)
+                    or bucket_minutes != BUCKET_MINUTES
+                    or n_buckets != BUCKETS_PER_DAY or n_stops != len(schedule.stop_times)):
+                return None
+            data = np.memmap(cube_file, dtype=np.uint8, mode='r', offset=_CUBE_HEADER.size,
+                             shape=(len(PLANE_DAYS), BUCKETS_PER_DAY, n_stops))
+        except (OSError, ValueError):
+            return None
+        # View ndarray biasa atas mmap yang sama: slicing np.memmap jauh lebih lambat
+        return cls(schedule, data.view(np.ndarray))
+
+    def occupancies(self, train: Train, current_time: datetime.datetime) -> Optional[Mapping]:
+        """
+        Okupansi kereta pada waktu tertentu, sama dengan predictor.predict. None jika
+        kereta bukan milik jadwal kubus ini atau ada stop yang bernilai NOT_AVAILABLE.
+        """
+        times, offset = train.stop_storage
+        if times is not self._stop_times:
+            return None
+        plane = 1 if current_time.weekday() >= 5 else 0
+        bucket = (current_time.hour * 60 + current_time.minute) // BUCKET_MINUTES
+        row = self._data[plane, bucket, offset:offset + len(train.route)].tolist()
+        if NOT_AVAILABLE in row:
+            return None
+        return CubeOccupancies(train.pattern.name_positions, row)
+
+
+if __name__ == "__main__":
+    from train_schedule import TrainSchedule
+
+    csv_file = sys.argv[1] if len(sys.argv) > 1 else "trainKRL_schedule.csv"
+    cube_file = default_cube_path(csv_file)
+    write_occupancy_cube(TrainSchedule.from_snapshot(csv_file), cube_file)
+    print(f"Kubus okupansi ditulis ke {cube_file}")
+
+# -- Akhir kutipan
@@ -0,0 +1,82 @@
+# Beberapa instans (tapi gk semua) yang dibantu Github Copilot dan Google Gemini
+# -- Awal Kutipan
+# Integrasi MLflow untuk prediktor okupansi. Dipisah dari occupancy_predictor agar
+# aplikasi (GUI/CLI) tidak perlu memuat mlflow dan pandas saat start.
+import datetime
+
+import mlflow
+import pandas as pd
+
+from data_models import Train
+from occupancy_predictor import _predict_internal, predict_stop_occupancy
+
+# Kolom input format panjang: satu baris per (kereta, stop, waktu)
+LONG_FORMAT_COLUMNS = ("train_id", "stop_index", "station", "time")
+
+
+def predict_long_format(model_input: pd.DataFrame) -> pd.DataFrame:
+    """
+    Jalur batch untuk input format panjang (train_id, stop_index, station, time).
+    Rute tiap kereta dibentuk dari stasiunnya, diurutkan menurut stop_index;
+    okupansi baris = okupansi stop tersebut untuk rute kereta itu pada `time`.
+    Hasilnya frame format panjang dengan kolom tambahan `occupancy`.
+    """
+    frame = model_input.loc[:, list(LONG_FORMAT_COLUMNS)].reset_index(drop=True)
+    stops = (frame.loc[:, ["train_id", "stop_index", "station"]]
+             .drop_duplicates(["train_id", "stop_index"])
+             .sort_values(["train_id", "stop_index"], kind="stable"))
+    stops["position"] = stops.groupby("train_id", sort=False).cumcount()
+
+    # Kereta dengan urutan stasiun yang sama berbagi satu rute (pola)
+    route_ids = {}
+    route_of_train = {
+        train_id: route_ids.setdefault(route, len(route_ids))
+        for train_id, route in stops.groupby("train_id", sort=False)["station"].agg(tuple).items()
+    }
+    positions = frame.merge(stops.loc[:, ["train_id", "stop_index", "position"]],
+                            on=["train_id", "stop_index"], how="left")["position"].to_numpy()
+    times = pd.to_datetime(frame["time"])
+    minutes = (times.dt.weekday * 1440 + times.dt.hour * 60 + times.dt.minute).to_numpy()
+
+    frame["occupancy"] = predict_stop_occupancy(
+        list(route_ids), frame["train_id"].map(route_of_train).to_numpy(), minutes, positions,
+    )
+    return frame
+
+
+class OccupancyPredictorModel(mlflow.pyfunc.PythonModel):
+    """
+    MLflow PythonModel wrapper for the Occupancy Predictor.
+    """
+    def predict(self, context, model_input: "pd.DataFrame") -> "pd.DataFrame":
+        # Input format panjang diproses sekaligus dengan operasi array
+        if set(LONG_FORMAT_COLUMNS).issubset(model_input.columns):
+            return predict_long_format(model_input)
+
+        results = []
+        for index, row in model_input.iterrows():
+            train_id = row['train_id']
+            # Reconstruct route from 'route_X' columns, handling potential NaNs
+            route_list = [row[col] for col in model_input.columns if col.startswith('route_') and pd.notna(row[col])]
+            current_time_str = row['current_time_iso']
+
+            # Create a Train object. This assumes Train has a constructor
+            # that takes `train_id` and `route` as arguments, or that these
+            # are directly assignable attributes.
+            train_obj = Train(train_id=train_id, route=route_list)
+            
+            current_time_dt = datetime.datetime.fromisoformat(current_time_str)
+
+            occupancy_map_single = _predict_internal(train_obj, current_time_dt)
+            
+            # Prepare row result for DataFrame output
+            row_result = {'train_id': train_id, 'current_time_iso': current_time_str}
+            for station, occupancy in occupancy_map_single.items():
+                # Sanitize station names for column names
+                sanitized_station = station.replace(' ', '_').replace('.', '').replace('-', '_').lower()
+                row_result[f"occupancy_{sanitized_station}"] = occupancy
+            results.append(row_result)
+        
+        return pd.DataFrame(results)
+
+# -- Akhir kutipan
@@ -1,15 +1,20 @@
 # Beberapa instans (tapi gk semua) yang dibantu Github Copilot dan Google Gemini
 # -- Awal Kutipan
 
+import collections
 import datetime
+import functools
+import json
+import os
+from collections.abc import Mapping
 from enum import Enum
+from types import MappingProxyType
 from typing import List, Dict
 import re
 import numpy as np
-import mlflow
-import pandas as pd
 
-from data_models import Train
+from data_models import Train, MINUTES_PER_DAY, Direction, get_direction, normalize_station
+from network_model import cumulative_distance
 # Tambahkan import Region jika perlu
 from data_models import Region
 
@@ -23,64 +28,6 @@ class Line(Enum):
     UNKNOWN = 6
 
 
-class Direction(Enum):
-    
-    # Rute Eksisting
-    DARI_BOGOR_MENUJU_JAKARTAKOTA = 1
-    DARI_JAKARTAKOTA_MENUJU_BOGOR = 2
-    DARI_BEKASI_MENUJU_CIKARANG = 3
-    MENUJU_RANGKASBITUNG = 4
-    MENUJU_TANGERANG = 5
-    DUA_ARAH = 6
-    UNKNOWN = 7
-    DARI_BOGOR_MENUJU_DEPOK = 8
-    DARI_MANGGARAI_MENUJU_ANGKE = 9
-    MENUJU_KAMPUNGBANDAN = 10
-    MENUJU_NAMBO = 11
-    DARI_DEPOK_MENUJU_MANGGARAI = 12
-    MENUJU_TANAHABANG = 13
-    DARI_CIKARANG_MENUJU_BEKASI = 14
-    MENUJU_DURI = 15
-    DARI_BOGOR_MENUJU_MANGGARAI = 16
-    DARI_TANAH_ABANG_MENUJU_MANGGARAI = 17
-    DARI_MANGGARAI_MENUJU_BOGOR = 18
-    DARI_NAMBO_MENUJU_JAKARTAKOTA = 19
-    DARI_JAKARTAKOTA_MENUJU_NAMBO = 20
-    DARI_DURI_MENUJU_MANGGARAI = 21
-    DARI_BEKASI_MENUJU_ANGKE = 22
-    DARI_BEKASI_MENUJU_MANGGARAI = 23
-    DARI_BEKASI_MENUJU_KAMPUNG_BANDAN_MELALUI_PASAR_SENEN = 24
-    DARI_KAMPUNG_BANDAN_MENUJU_BEKASI_MELALUI_PASAR_SENEN = 25
-    DARI_KAMPUNG_BANDAN_MENUJU_CIKARANG_MELALUI_PASAR_SENEN = 26
-    DARI_CIKARANG_MENUJU_KAMPUNG_BANDAN_MELALUI_PASAR_SENEN = 27
-    DARI_ANGKE_MENUJU_MANGGARAI = 28
-    DARI_MANGGARAI_MENUJU_DURI = 29
-
-    
-    # Rute Tambahan Sesi 1
-    DARI_CIKARANG_MENUJU_ANGKE_MELALUI_MANGGARAI = 30
-    DARI_ANGKE_MENUJU_CIKARANG_MELALUI_MANGGARAI = 31
-    DARI_BEKASI_MENUJU_ANGKE_MELALUI_MANGGARAI = 32
-    DARI_ANGKE_MENUJU_BEKASI_MELALUI_MANGGARAI = 33
-    DARI_CIKARANG_MENUJU_MANGGARAI = 34
-    DARI_RANGKASBITUNG_MENUJU_TANAHABANG = 35
-    DARI_TANAHABANG_MENUJU_RANGKASBITUNG = 36
-    DARI_TANGERANG_MENUJU_DURI = 37
-    DARI_DURI_MENUJU_TANGERANG = 38
-    DARI_JATINEGARA_MENUJU_BOGOR = 39
-    DARI_BOGOR_MENUJU_JATINEGARA = 40
-
-    # --- PENAMBAHAN RUTE BARU (SESI 2) ---
-    DARI_MANGGARAI_MENUJU_CIKARANG = 41
-    DARI_CIKARANG_MENUJU_KAMPUNGBANDAN_MELALUI_MANGGARAI = 42
-    DARI_KAMPUNGBANDAN_MENUJU_CIKARANG_MELALUI_MANGGARAI = 43
-    DARI_BEKASI_MENUJU_KAMPUNGBANDAN_MELALUI_MANGGARAI = 44
-    DARI_KAMPUNGBANDAN_MENUJU_BEKASI_MELALUI_MANGGARAI = 45
-    MENUJU_ANGKE = 46
-    # ------------------------------------
-    # -- Ini akhir dari kutipan Gemini
-
-
 class TimePeriod(Enum):
     PUNCAK_PAGI = 1
     PUNCAK_SORE = 2
@@ -117,132 +64,17 @@ def _avg(percentage_range):
         raise ValueError(f"Invalid percentage range format: {percentage_range}")
 
 
-def normalize_station(name: str) -> str:
-    """Removes parenthetical parts from station names."""
-    if not name:
-        return ""
-    return name.split('(')[0].strip().lower() # Konversi ke lowercase untuk konsistensi
-
-
-def _direction_by_last_station(last: str) -> Direction:
-    last_station_map = {
-        "tanjung priok": Direction.DUA_ARAH,
-        "tanah abang": Direction.MENUJU_TANAHABANG,
-        "nambo": Direction.MENUJU_NAMBO,
-        "angke": Direction.MENUJU_ANGKE,
-        "kampung bandan": Direction.MENUJU_KAMPUNGBANDAN,
-        "cikarang": Direction.DARI_BEKASI_MENUJU_CIKARANG, # Perbaikan: Lebih spesifik
-        "tangerang": Direction.MENUJU_TANGERANG,
-        "duri": Direction.MENUJU_DURI,
-        "bekasi": Direction.DARI_CIKARANG_MENUJU_BEKASI, # Perbaikan: Lebih spesifik
-    }
-    for key, value in last_station_map.items():
-        if key in last:
-            return value
-    if any(term in last for term in ["rangkasbitung", "parung panjang"]):
-        return Direction.MENUJU_RANGKASBITUNG
-    return None
-
-def _direction_by_first_last(first: str, last: str) -> Direction:
-    # Rute Eksisting
-    if "jakarta kota" in first and "bogor" in last:
-        return Direction.DARI_JAKARTAKOTA_MENUJU_BOGOR
-    if "bogor" in first and "jakarta kota" in last:
-        return Direction.DARI_BOGOR_MENUJU_JAKARTAKOTA
-    if "depok" in last and "bogor" in first:
-        return Direction.DARI_BOGOR_MENUJU_DEPOK
-    if "manggarai" in last and "depok" in first:
-        return Direction.DARI_DEPOK_MENUJU_MANGGARAI
-    if "manggarai" in last and "bogor" in first:
-        return Direction.DARI_BOGOR_MENUJU_MANGGARAI
-    if "manggarai" in last and "tanah abang" in first:
-        return Direction.DARI_TANAH_ABANG_MENUJU_MANGGARAI
-    if "bogor" in last and "manggarai" in first:
-        return Direction.DARI_MANGGARAI_MENUJU_BOGOR
-    if "nambo" in last and "jakarta kota" in first:
-        return Direction.DARI_JAKARTAKOTA_MENUJU_NAMBO
-    if "jakarta kota" in last and "nambo" in first:
-        return Direction.DARI_NAMBO_MENUJU_JAKARTAKOTA
-    if "duri" in last and "manggarai" in first:
-        return Direction.DARI_MANGGARAI_MENUJU_DURI
-    if "manggarai" in last and "duri" in first:
-        return Direction.DARI_DURI_MENUJU_MANGGARAI
-    if "cikarang" in last and "bekasi" in first:
-        return Direction.DARI_BEKASI_MENUJU_CIKARANG
-    if "bekasi" in last and "cikarang" in first:
-        return Direction.DARI_CIKARANG_MENUJU_BEKASI
-
-
-    # --- LOGIKA UNTUK RUTE BARU (SESI 1 & 2) ---
-    # Lin Cikarang via Manggarai
-    if "cikarang" in first and "angke" in last:
-        return Direction.DARI_CIKARANG_MENUJU_ANGKE_MELALUI_MANGGARAI
-    if "angke" in first and "cikarang" in last:
-        return Direction.DARI_ANGKE_MENUJU_CIKARANG_MELALUI_MANGGARAI
-    if "bekasi" in first and "angke" in last:
-        return Direction.DARI_BEKASI_MENUJU_ANGKE_MELALUI_MANGGARAI
-    if "angke" in first and "bekasi" in last:
-        return Direction.DARI_ANGKE_MENUJU_BEKASI_MELALUI_MANGGARAI
-    if "cikarang" in first and "manggarai" in last:
-        return Direction.DARI_CIKARANG_MENUJU_MANGGARAI
-    if "manggarai" in first and "cikarang" in last:
-        return Direction.DARI_MANGGARAI_MENUJU_CIKARANG # Baru
-    if "cikarang" in first and "kampung bandan" in last:
-        return Direction.DARI_CIKARANG_MENUJU_KAMPUNGBANDAN_MELALUI_MANGGARAI # Baru
-    if "kampung bandan" in first and "cikarang" in last:
-        return Direction.DARI_KAMPUNGBANDAN_MENUJU_CIKARANG_MELALUI_MANGGARAI # Baru
-    if "bekasi" in first and "kampung bandan" in last:
-        return Direction.DARI_BEKASI_MENUJU_KAMPUNGBANDAN_MELALUI_MANGGARAI # Baru
-    if "kampung bandan" in first and "bekasi" in last:
-        return Direction.DARI_KAMPUNGBANDAN_MENUJU_BEKASI_MELALUI_MANGGARAI # Baru
-
-    # Lin Rangkasbitung
-    if "rangkasbitung" in first and "tanah abang" in last:
-        return Direction.DARI_RANGKASBITUNG_MENUJU_TANAHABANG
-    if "tanah abang" in first and "rangkasbitung" in last:
-        return Direction.DARI_TANAHABANG_MENUJU_RANGKASBITUNG
-
-    # Lin Tangerang
-    if "tangerang" in first and "duri" in last:
-        return Direction.DARI_TANGERANG_MENUJU_DURI
-    if "duri" in first and "tangerang" in last:
-        return Direction.DARI_DURI_MENUJU_TANGERANG
-        
-    # Lin Feeder Jatinegara - Bogor
-    if "jatinegara" in first and "bogor" in last:
-        return Direction.DARI_JATINEGARA_MENUJU_BOGOR
-    if "bogor" in first and "jatinegara" in last:
-        return Direction.DARI_BOGOR_MENUJU_JATINEGARA
-    # --------------------------------
-
-    return None
-
-def get_direction(route: List[str]) -> Direction:
-    """Determines the direction of a train based on its route."""
-    if not route or len(route) < 2:
-        return Direction.UNKNOWN
-    
-    # Gunakan nama stasiun yang sudah dinormalisasi
-    first = normalize_station(route[0])
-    last = normalize_station(route[-1])
-
-    # Check for directions based on first and last station combinations
-    direction = _direction_by_first_last(first, last)
-    if direction:
-        return direction
-
-    # Check for directions based on last station only (sebagai fallback)
-    direction_fallback = _direction_by_last_station(last)
-    if direction_fallback:
-        return direction_fallback
-
-    return Direction.UNKNOWN
-
-
 def get_adjacent_periods(current_time: datetime.datetime) -> List[tuple[TimePeriod, float]]:
     """
     Mengembalikan satu atau dua periode waktu beserta bobotnya, jika waktu berada di antara dua periode (transisi).
+    Waktu tepat di menit bulat diambil dari tabel menit-dalam-minggu; waktu dengan
+    detik dihitung langsung karena bobot transisinya bergantung pada detik.
     """
+    if current_time.second == 0 and current_time.microsecond == 0:
+        return list(_ADJACENT_PERIODS[minute_of_week(current_time)])
+    return _adjacent_periods_exact(current_time)
+
+def _adjacent_periods_exact(current_time: datetime.datetime) -> List[tuple[TimePeriod, float]]:
     time = current_time.time()
     weekday = current_time.weekday()
 
@@ -325,8 +157,99 @@ def get_adjacent_periods(current_time: datetime.datetime) -> List[tuple[TimePeri
 
 
 
+# --- TABEL PERIODE PER MENIT DALAM SEMINGGU ---
+# Periode aktif dan bobotnya untuk setiap menit dalam seminggu (0 = Senin 00:00),
+# dihitung sekali saat import. Kolom 0/1 = periode pertama/kedua (nilai TimePeriod,
+# 0 jika tidak ada periode kedua) dan bobotnya.
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+# Urutan periode siang hari dan periode yang dituju saat transisi 60 menit sebelum berakhir
+_PERIOD_SEQUENCE = [
+    (TimePeriod.PUNCAK_PAGI, TimePeriod.AWAL_SIANG),
+    (TimePeriod.AWAL_SIANG, TimePeriod.MAKAN_SIANG),
+    (TimePeriod.MAKAN_SIANG, TimePeriod.AKHIR_SIANG),
+    (TimePeriod.AKHIR_SIANG, TimePeriod.PUNCAK_SORE),
+    (TimePeriod.PUNCAK_SORE, TimePeriod.MALAM),
+]
+
+def _clock_minutes(time: datetime.time) -> int:
+    return time.hour * 60 + time.minute
+
+def _build_period_table():
+    """Versi vektor get_adjacent_periods untuk semua menit dalam seminggu."""
+    minute = np.arange(MINUTES_PER_DAY)
+    day_ids = np.zeros((MINUTES_PER_DAY, 2), dtype=np.int8)
+    day_weights = np.zeros((MINUTES_PER_DAY, 2), dtype=np.float64)
+    day_ids[:, 0] = TimePeriod.MALAM.value
+    day_weights[:, 0] = 1.0
+    for period, following in _PERIOD_SEQUENCE:
+        start, end = (_clock_minutes(t) for t in TIME_PERIOD_DEFINITIONS[period])
+        inside = (minute >= start) & (minute < end)
+        day_ids[inside, 0] = period.value
+        transition = inside & (minute >= end - 60)
+        day_ids[transition, 1] = following.value
+        weight = (end - minute[transition]) / 60
+        day_weights[transition, 0] = weight
+        day_weights[transition, 1] = 1 - weight
+    # Transisi malam ke puncak pagi: 10 menit sebelum mulai, bobot tetap dibagi 60
+    morning_start = _clock_minutes(TIME_PERIOD_DEFINITIONS[TimePeriod.PUNCAK_PAGI][0])
+    transition = (minute >= morning_start - 10) & (minute < morning_start)
+    day_ids[transition] = (TimePeriod.MALAM.value, TimePeriod.PUNCAK_PAGI.value)
+    weight = (morning_start - minute[transition]) / 60
+    day_weights[transition, 0] = weight
+    day_weights[transition, 1] = 1 - weight
+
+    weekend_ids = np.zeros((MINUTES_PER_DAY, 2), dtype=np.int8)
+    weekend_ids[:, 0] = TimePeriod.AKHIR_PEKAN.value
+    weekend_weights = np.zeros((MINUTES_PER_DAY, 2), dtype=np.float64)
+    weekend_weights[:, 0] = 1.0
+    ids = np.concatenate([day_ids] * 5 + [weekend_ids] * 2)
+    weights = np.concatenate([day_weights] * 5 + [weekend_weights] * 2)
+    ids.setflags(write=False)
+    weights.setflags(write=False)
+    return ids, weights
+
+PERIOD_IDS, PERIOD_WEIGHTS = _build_period_table()
+
+def _period_rows():
+    """Baris tabel sebagai tuple Python; hari kerja dan akhir pekan berbagi objek yang sama."""
+    adjacent, active = [], []
+    for day in (0, 5):  # Senin mewakili hari kerja, Sabtu mewakili akhir pekan
+        rows = slice(day * MINUTES_PER_DAY, (day + 1) * MINUTES_PER_DAY)
+        for ids, weights in zip(PERIOD_IDS[rows].tolist(), PERIOD_WEIGHTS[rows].tolist()):
+            pairs = tuple((TimePeriod(i), w) for i, w in zip(ids, weights) if i)
+            adjacent.append(pairs)
+            active.append(tuple(period for period, __ in pairs))
+    weekday, weekend = slice(0, MINUTES_PER_DAY), slice(MINUTES_PER_DAY, None)
+    return adjacent[weekday] * 5 + adjacent[weekend] * 2, active[weekday] * 5 + active[weekend] * 2
+
+def minute_of_week(current_time: datetime.datetime) -> int:
+    """Indeks baris tabel periode: menit sejak Senin 00:00 (detik diabaikan)."""
+    return current_time.weekday() * MINUTES_PER_DAY + current_time.hour * 60 + current_time.minute
+
+def period_weights(when):
+    """
+    (ID periode, bobot) dari tabel menit-dalam-minggu. `when` boleh datetime, int
+    menit sejak Senin 00:00, atau array int (hasilnya array berbentuk (..., 2)).
+    ID 0 berarti tidak ada periode kedua.
+    """
+    if isinstance(when, datetime.datetime):
+        index = minute_of_week(when)
+    else:
+        index = np.asarray(when) % MINUTES_PER_WEEK
+    return PERIOD_IDS[index], PERIOD_WEIGHTS[index]
+
+def active_periods(current_time: datetime.datetime) -> tuple:
+    """
+    Tuple periode aktif (tanpa bobot). Batas periode selalu di menit bulat, jadi
+    cukup dilihat dari menitnya dan hasilnya sama dengan get_adjacent_periods.
+    """
+    return _ACTIVE_PERIODS[minute_of_week(current_time)]
+
+_ADJACENT_PERIODS, _ACTIVE_PERIODS = _period_rows()
+
+
 # --- FUNGSI HITUNG TARIF UNTUK RUTE ---
-def calculate_fare(route: list, region, from_station=None, to_station=None) -> int:
+def calculate_fare(route, region, from_station=None, to_station=None) -> int:
     """
     Menghitung tarif perjalanan berdasarkan region dan rute.
     - Kutoarjo-Yogyakarta: 8000 flat
@@ -334,6 +257,8 @@ def calculate_fare(route: list, region, from_station=None, to_station=None) -> i
     - Rangkasbitung-Merak: 5000 flat
     - Jabodetabek: 3000 (25km pertama) + 1000 per 10km berikutnya
     Hanya menghitung jarak dari from_station ke to_station (bukan seluruh rute kereta).
+    `route` boleh berupa daftar nama stasiun atau objek Train; dengan Train,
+    from_station/to_station berupa ID stasiun dicari O(1) lewat peta posisi stop.
     """
     if region == Region.YOGYA_SOLO:
         return 8000
@@ -341,17 +266,33 @@ def calculate_fare(route: list, region, from_station=None, to_station=None) -> i
         return 5000
     elif region == Region.JABODETABEK:
         # Cari indeks dari dan ke
-        if from_station and to_station and from_station in route and to_station in route:
+        cumulative_km = None
+        if isinstance(route, Train):
+            train = route
+            route = train.route
+            cumulative_km = train.pattern.cumulative_km or None
+            idx_from = train.position_of(from_station) if from_station is not None else None
+            idx_to = train.position_of(to_station) if to_station is not None else None
+        elif from_station and to_station and from_station in route and to_station in route:
             idx_from = route.index(from_station)
             idx_to = route.index(to_station)
+        else:
+            idx_from = idx_to = None
+        if idx_from is not None and idx_to is not None:
             if idx_from > idx_to:
                 idx_from, idx_to = idx_to, idx_from
             sub_route = route[idx_from:idx_to+1]
         else:
             sub_route = route
-        # Hitung jarak hanya pada sub_route
-        distances = get_cumulative_distance(sub_route)
-        distance = distances[-1] if distances else 0
+        if cumulative_km is not None:
+            # Jarak kumulatif sudah dihitung TrainSchedule: cukup satu pengurangan
+            if idx_from is None or idx_to is None:
+                idx_from, idx_to = 0, len(route) - 1
+            distance = cumulative_km[idx_to] - cumulative_km[idx_from]
+        else:
+            # Hitung jarak hanya pada sub_route
+            distances = get_cumulative_distance(sub_route)
+            distance = distances[-1] if distances else 0
         if distance <= 25:
             return 3000
         else:
@@ -361,247 +302,129 @@ def calculate_fare(route: list, region, from_station=None, to_station=None) -> i
     else:
         return 0  # fallback
     
-def _predict_internal(train: Train, current_time: datetime.datetime) -> Dict[str, int]:
+# --- TABEL ATURAN OKUPANSI ---
+# Aturan (arah, periode) -> profil dibaca dari file data dan dikompilasi sekali saat
+# import: lookup dict per arah plus koefisien numpy, jadi evaluasi satu kereta cukup
+# satu dispatch dan satu ekspresi vektor.
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "occupancy_rules.json")
+
+class OccupancyRule:
+    """Satu aturan hasil kompilasi: syarat periode dan profil polinomial/rampa."""
+    __slots__ = ("days", "any_of", "none_of", "kind", "coefficients", "powers", "peak", "base")
+
+    def __init__(self, spec: dict):
+        self.days = spec.get("hari", "semua")
+        self.any_of = frozenset(TimePeriod[name] for name in spec.get("salah_satu_periode", ()))
+        self.none_of = frozenset(TimePeriod[name] for name in spec.get("tanpa_periode", ()))
+        profile = spec["profil"]
+        self.kind = profile["jenis"]
+        if self.kind == "polinomial":
+            terms = profile["suku"]
+            self.coefficients = np.array([coefficient for coefficient, __ in terms], dtype=np.float64)
+            self.powers = np.array([power for __, power in terms], dtype=np.int64)
+            self.peak = self.base = None
+        elif self.kind == "rampa":
+            self.coefficients = self.powers = None
+            self.peak = profile["puncak"]
+            self.base = profile["dasar"]
+        else:
+            raise ValueError(f"Jenis profil okupansi tidak dikenal: {self.kind}")
+
+    def matches(self, periods) -> bool:
+        weekend = TimePeriod.AKHIR_PEKAN in periods
+        if (self.days == "hari_kerja" and weekend) or (self.days == "akhir_pekan" and not weekend):
+            return False
+        if self.any_of and self.any_of.isdisjoint(periods):
+            return False
+        return self.none_of.isdisjoint(periods)
+
+    def evaluate(self, n_stops: int) -> np.ndarray:
+        if self.kind == "rampa":
+            return _ramp_vector(n_stops, self.peak, self.base)
+        i = np.arange(n_stops)
+        # Suku dijumlah satu per satu sesuai urutan di file agar pembulatan float
+        # (dan hasil int()) sama persis dengan rumus aslinya
+        occupancy = np.zeros(n_stops)
+        for coefficient, power in zip(self.coefficients, self.powers):
+            occupancy = occupancy + coefficient * i ** power
+        return np.trunc(occupancy).astype(np.int32)
+
+def _ramp_vector(n_stops: int, peak: int, base: int) -> np.ndarray:
+    """Naik linear dari base ke peak di tengah rute lalu turun lagi, dibatasi 0-200."""
+    i = np.arange(n_stops)
+    n = n_stops - 1 if n_stops > 1 else 1
+    half = n // 2
+    up = base + (peak - base) * (i / (half if half > 0 else 1))
+    down = peak - (peak - base) * ((i - half) / (n - half if n - half > 0 else 1))
+    occupancy = np.where(i <= half, up, down)
+    return np.trunc(np.clip(occupancy, 0, 200)).astype(np.int32)
+
+def load_occupancy_rules(path: str = RULES_FILE):
+    """Membaca file aturan dan mengelompokkan aturan per arah (urutan file dipertahankan)."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    rules_by_direction: Dict[Direction, list] = collections.defaultdict(list)
+    for spec in data["aturan"]:
+        rule = OccupancyRule(spec)
+        for name in spec["arah"]:
+            rules_by_direction[Direction[name]].append(rule)
+    return {direction: tuple(rules) for direction, rules in rules_by_direction.items()}, data["fallback"]
+
+_RULES_BY_DIRECTION, _FALLBACK = load_occupancy_rules()
+
+@functools.lru_cache(maxsize=None)
+def _select_rule(direction: Direction, periods: tuple):
+    """Aturan terakhir yang cocok untuk arah dan periode aktif, None jika tidak ada."""
+    selected = None
+    for rule in _RULES_BY_DIRECTION.get(direction, ()):
+        if rule.matches(periods):
+            selected = rule
+    return selected
+
+def _fallback_vector(route, periods: tuple) -> np.ndarray:
+    """Model segitiga: naik linear ke stasiun puncak (atau tengah rute), lalu turun."""
+    n_stops = len(route)
+    i = np.arange(n_stops)
+    base = _FALLBACK["dasar"]
+    normalized_route = [normalize_station(station) for station in route]
+    peak_station = _FALLBACK["stasiun_puncak"]
+    peak = normalized_route.index(peak_station) if peak_station in normalized_route else n_stops // 2
+    peak_occupancy = _FALLBACK["puncak"]
+    if TimePeriod.PUNCAK_PAGI in periods or TimePeriod.PUNCAK_SORE in periods:
+        peak_occupancy = _FALLBACK["puncak_jam_sibuk"]
+    elif TimePeriod.AKHIR_PEKAN in periods:
+        peak_occupancy = _FALLBACK["puncak_akhir_pekan"]
+    if peak > 0:
+        rising = base + (peak_occupancy - base) * (i / peak)
+    else:
+        rising = np.full(n_stops, float(peak_occupancy))
+    denominator = n_stops - 1 - peak
+    if denominator > 0:
+        falling = peak_occupancy - (peak_occupancy - base) * ((i - peak) / denominator)
+    else:
+        falling = np.full(n_stops, float(base))
+    return np.clip(np.trunc(np.where(i <= peak, rising, falling)), 0, 200).astype(np.int32)
+
+def occupancy_vector(route, periods: tuple, direction: Direction = None) -> np.ndarray:
     """
-    Internal prediction logic for train occupancy.
+    Okupansi (%) per posisi stop sebagai array int32 untuk rute dan periode aktif.
+    Arah yang sudah diketahui (RoutePattern.direction) bisa diberikan agar tidak
+    diklasifikasi ulang.
     """
-    occupancy_map = {}
-    route = train.route
     if not route:
-            return occupancy_map
-
-
-    direction = get_direction(route)
-    periods_weights = get_adjacent_periods(current_time)
-
-
-    # Ekstrak flag periode waktu untuk mempermudah pembacaan
-    # (Meskipun ada bobot, kita hanya cek keberadaannya untuk memilih model)
-    is_puncak_pagi = any(p == TimePeriod.PUNCAK_PAGI for p, w in periods_weights)
-    is_puncak_sore = any(p == TimePeriod.PUNCAK_SORE for p, w in periods_weights)
-    is_awal_siang = any(p == TimePeriod.AWAL_SIANG for p, w in periods_weights)
-    is_makan_siang = any(p == TimePeriod.MAKAN_SIANG for p, w in periods_weights)
-    is_akhir_siang = any(p == TimePeriod.AKHIR_SIANG for p, w in periods_weights)
-    is_akhir_pekan = any(p == TimePeriod.AKHIR_PEKAN for p, w in periods_weights)
-    
-    # KRL Lin Bogor warna Merah
-    
-    # Jam sibuk pagi 
-    # Okupansi KRL dari Bogor ke Jakarta Kota
-    # Dari Bogor - Bojong Gede (0-105%)
-    # Dari Citayam - Pasar Minggu (105%-115%)
-    # Dari Pasar Minggu Baru - Manggarai (115% - 120%)
-    # Dari Cikini - Jakarta Kota (80% menurun hingga 0%)
-    
-    if (is_puncak_pagi and not is_akhir_pekan) and direction == Direction.DARI_BOGOR_MENUJU_JAKARTAKOTA:    
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(-3.410605*10**-13 + 53.36605*i - 8.279928*i**2 + 0.524309 * i**3 - 0.1153014*i**4)
-    
-    # Jam sibuk sore
-    # Okupansi KRL dari Jakarta Kota ke Bogor
-    # Dari Jakarta Kota - Manggarai (0-120%)
-    # Dari Manggarai - Pasar Minggu Baru (120% menurun hingga 115%)
-    # Dari Pasar Minggu Baru - Citayam (115% menurun hingga 105%)
-    # Dari Citayam - Bogor (105% menurun hingga 0%)
-    
-    if (is_puncak_sore and not is_akhir_pekan) and direction == Direction.DARI_JAKARTAKOTA_MENUJU_BOGOR:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(6.82121*10**-13 + 56.58092 * i - 8.699259 * i**2 + 0.5364635 * i**3 - 0.01153014 * i**4)
-    
-    
-    
-    # Di luar jam sibuk yg di luar jam makan siang (08:30 - 12:00 & 14:00-15:30 & setelah jam 19:00)
-    # Okupansi KRL dari Jakarta Kota ke Bogor
-    # Dari Jakarta Kota - Manggarai (0% naik hingga 70%)
-    # Dari Manggarai - Pasar Minggu (70% turun hingga 65%)
-    # Dari Pasar Minggu - Citayam (65% turun hingga 40%)
-    # Dari Bojong Gede - Bogor (40% turun hingga 0%)
-    
-    if (not is_puncak_sore and not is_akhir_pekan) and direction == Direction.DARI_JAKARTAKOTA_MENUJU_BOGOR:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(-1.136868*10**-13 + 25.82139 * i - 3.355988 * i**2 + 0.1825466 * i**3 - 0.003715035*i**4)
-    
-    # Di luar jam sibuk yg di dalam jam makan siang (12:00 - 14:00)
-    # Okupansi KRL dari Jakarta Kota ke Bogor
-    # Dari Jakarta Kota - Manggarai (0% naik hingga 75%)
-    # Dari Manggarai - Pasar Minggu (75% turun hingga 70%)
-    # Dari Pasar Minggu - Citayam (70% turun hingga 45%)
-    # Dari Bojong Gede - Bogor (45% hingga 0%)
-    if (is_makan_siang and not is_akhir_pekan) and direction == Direction.DARI_JAKARTAKOTA_MENUJU_BOGOR:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(-1.136868*10**-13 + 28.11143* i - 3.723141*i**2 + 0.2066267*i**3 - 0.004256161*i**4)
-    
-    # Di luar jam sibuk yg di luar jam makan siang (08:30 - 12:00 & 14:00-15:30 & setelah jam 19:00)
-    # Okupansi KRL dari Bogor - Jakarta Kota
-    # Dari Bogor - Bojong Gede (0-40%)
-    # Dari Citayam - Pasar Minggu (40-65%)
-    # Dari Pasar Minggu Baru - Manggarai (65%-70%)
-    # Dari Cikini - Jakarta Kota (40% menurun hingga 0%)
-    if (is_awal_siang or is_akhir_siang) and not is_akhir_pekan and direction == Direction.DARI_BOGOR_MENUJU_JAKARTAKOTA:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(5.684342*10**-14 + 19.65589 * i - 2.551792 * i**2 + 0.1592366* i**3 - 0.3715035*i**4)
-    
-    # Di luar jam sibuk yg di dalam jam makan siang (12:00 - 14:00)
-    # Okupansi KRL dari Bogor - Jakarta Kota
-    # Dari Bogor - Bojong Gede (0-45%)
-    # Dari Citayam - Pasar Minggu (45-70%)
-    # Dari Pasar Minggu Baru - Manggarai (70-75%)
-    # Dari Cikini - Jakarta Kota (45% menurun hingga 0%)
-    if is_makan_siang and direction == Direction.DARI_BOGOR_MENUJU_JAKARTAKOTA and not is_akhir_pekan:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(-5.684342*10**-14 + 22.37531 * i - 2.974952 * i**2 + 0.1849401* i**3 - 0.004256161*i**4)
-    
-    # Di dalam jam sibuk pagi (05:30 - 08:30)
-    # Okupansi KRL dari Bogor - Manggarai
-    # Dari Bogor - Citayam (0% - 100%)
-    # Dari Citayam - Pasar Minggu (100% - 130%)
-    # Pasar Minggu - Tebet (130% turun hingga 120%)
-    # Manggarai 0%
-    if is_puncak_pagi and direction == Direction.DARI_BOGOR_MENUJU_MANGGARAI and not is_akhir_pekan:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(-1.023182*10**-12 + 105.331 * i - 33.7549 * i**2 + 3.610431 * i**3 - 0.1195124 * i**4)
-    
-    
-    # Di luar jam sibuk (05:30- & 08:30 - 15:30 & 19:30+)
-    # Okupansi KRL dari Manggarai - Bogor
-    # Dari Manggarai - Pasar Minggu (0% - 70%)
-    # Dari Pasar Minggu - Citayam (70% menurun hingga 40%)
-    # Citayam - Bogor (40 % menurun hingga 0%)
-    if is_puncak_sore and direction == Direction.DARI_MANGGARAI_MENUJU_BOGOR and not is_akhir_pekan:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(3.089 * 10**-2 * i**3 - 1.921 * i **2 + 2.283 * 10**1 * i + 7.185 * 10**-14)
-    
-    
-    # Di akhir pekan
-    # Okupansi KRL dari Manggarai - Bogor
-    # Dari Manggarai - Pasar Minggu (0% - 90%)
-    # Dari Pasar Minggu - Citayam (90% menurun hingga 60%)
-    # Citayam - Bogor (60 % menurun hingga 0%)     
-    if is_akhir_pekan and direction == Direction.DARI_MANGGARAI_MENUJU_BOGOR:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(1.224 * 10**-2 * i**3 - 1.893 * i**2 + 2.716 * 10**1 * i + 4.583 * 10**-14)
-    
+        return np.zeros(0, dtype=np.int32)
+    if direction is None:
+        direction = get_direction(route)
+    rule = _select_rule(direction, periods)
+    if rule is None:
+        return _fallback_vector(route, periods)
+    return rule.evaluate(len(route))
 
-    # Di jam sibuk sore
-    # Okupansi KRL dari Jakarta Kota - Nambo
-    # Dari Jakarta Kota - Manggarai (0% hingga 130%)
-    # Dari Manggarai - Cawang (130% menurun hingga 100%)
-    # Duren Kalibata - Pondok Cina (100% menurun hingga 80%)
-    # Depok Baru - Nambo (80% menurun hingga 0%)
-    if is_puncak_sore and direction == Direction.DARI_JAKARTAKOTA_MENUJU_NAMBO and not is_akhir_pekan:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(-1.824*10**-2*i**4+8.948*10**-1*i**3-1.453*10**1*i**2+8.267*10**1*i-1.399*10**-12)
-            
-    # Di jam sibuk pagi
-    # Okupansi KRL dari Nambo - Jakarta Kota
-    # Nambo (20%)
-    # Cibinong (60%)
-    # Citayam - Manggarai (dari 120% - 150%)
-    # Manggarai - Jakarta Kota (110% menurun hingga 0%)
-    if is_puncak_pagi and direction == Direction.DARI_NAMBO_MENUJU_JAKARTAKOTA and not is_akhir_pekan:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(1.517*10**-3 *i**4+ 3.28*10**-2*i**3 - 4.1 * i**2 + 5.75 * 10 * i + 1.587 * 10)
-            
-    # Di luar jam sibuk
-    # Okupansi KRL dari Nambo - Jakarta Kota
-    # Nambo (10%)
-    # Cibinong (30%)
-    # Citayam (50%)
-    # Manggarai (70%)
-    # Jakarta Kota (0%)
-    if (is_akhir_siang or is_awal_siang or is_makan_siang) and direction == Direction.DARI_NAMBO_MENUJU_JAKARTAKOTA and not is_akhir_pekan:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(1.037*10**-5*i**4+1.194*10**-2*i**3-9.251*10**-1*i**2+1.353*10**1*i+2.126*10**1)
-    
-
-    # --- BRANCH UNTUK RUTE BARU: CIKARANG/BEKASI/ANGKE/KAMPUNG BANDAN via MANGGARAI ---
-    # Contoh: Cikarang–Angke via Manggarai
-    if direction in [
-        Direction.DARI_CIKARANG_MENUJU_ANGKE_MELALUI_MANGGARAI,
-        Direction.DARI_ANGKE_MENUJU_CIKARANG_MELALUI_MANGGARAI,
-        Direction.DARI_BEKASI_MENUJU_ANGKE_MELALUI_MANGGARAI,
-        Direction.DARI_ANGKE_MENUJU_BEKASI_MELALUI_MANGGARAI,
-        Direction.DARI_CIKARANG_MENUJU_MANGGARAI,
-        Direction.DARI_MANGGARAI_MENUJU_CIKARANG,
-        Direction.DARI_CIKARANG_MENUJU_KAMPUNGBANDAN_MELALUI_MANGGARAI,
-        Direction.DARI_KAMPUNGBANDAN_MENUJU_CIKARANG_MELALUI_MANGGARAI,
-        Direction.DARI_BEKASI_MENUJU_KAMPUNGBANDAN_MELALUI_MANGGARAI,
-        Direction.DARI_KAMPUNGBANDAN_MENUJU_BEKASI_MELALUI_MANGGARAI,
-    ]:
-        # Jam sibuk (pagi/sore)
-        if (is_puncak_pagi or is_puncak_sore) and not is_akhir_pekan:
-            for i, station_name in enumerate(route):
-                # Polinomial: puncak di tengah, naik ke tengah, turun ke akhir
-                n = len(route) - 1 if len(route) > 1 else 1
-                peak = 120
-                base = 25
-                if i <= n // 2:
-                    occ = base + (peak - base) * (i / (n // 2 if n // 2 > 0 else 1))
-                else:
-                    occ = peak - (peak - base) * ((i - n // 2) / (n - n // 2 if n - n // 2 > 0 else 1))
-                occupancy_map[station_name] = int(max(0, min(200, occ)))
-        # Di luar jam sibuk (weekday)
-        elif not is_akhir_pekan:
-            for i, station_name in enumerate(route):
-                n = len(route) - 1 if len(route) > 1 else 1
-                peak = 70
-                base = 20
-                if i <= n // 2:
-                    occ = base + (peak - base) * (i / (n // 2 if n // 2 > 0 else 1))
-                else:
-                    occ = peak - (peak - base) * ((i - n // 2) / (n - n // 2 if n - n // 2 > 0 else 1))
-                occupancy_map[station_name] = int(max(0, min(200, occ)))
-        # Akhir pekan
-        elif is_akhir_pekan:
-            for i, station_name in enumerate(route):
-                n = len(route) - 1 if len(route) > 1 else 1
-                peak = 90
-                base = 25
-                if i <= n // 2:
-                    occ = base + (peak - base) * (i / (n // 2 if n // 2 > 0 else 1))
-                else:
-                    occ = peak - (peak - base) * ((i - n // 2) / (n - n // 2 if n - n // 2 > 0 else 1))
-                occupancy_map[station_name] = int(max(0, min(200, occ)))
-
-    # --- MEKANISME FALLBACK UNTUK RUTE BARU DAN LAINNYA ---
-    # Jika tidak ada aturan spesifik yang cocok di atas (termasuk untuk rute-rute baru yang ditambahkan),
-    # logika di bawah ini akan dijalankan.
-    if not occupancy_map and route:
-        num_stations = len(route)
-        
-        # Logika baru: Jadikan Manggarai sebagai puncak jika ada di rute
-        peak_station_index = num_stations // 2  # Default: puncak di tengah
-        try:
-            # Cari indeks stasiun 'manggarai' (setelah dinormalisasi)
-            normalized_route = [normalize_station(s) for s in route]
-            manggarai_index = normalized_route.index('manggarai')
-            peak_station_index = manggarai_index
-        except ValueError:
-            # Jika Manggarai tidak ada di rute, gunakan default (puncak di tengah)
-            pass
-
-        # Menggunakan waktu untuk memengaruhi puncak okupansi
-        peak_occupancy = 65  # Puncak okupansi default untuk di luar jam sibuk
-        if is_puncak_pagi or is_puncak_sore:
-            peak_occupancy = 110 # Puncak lebih tinggi untuk jam sibuk
-        elif is_akhir_pekan:
-            peak_occupancy = 85 # Puncak medium untuk akhir pekan
-
-        for i, station in enumerate(route):
-            # Model segitiga sederhana: kenaikan linear ke puncak, lalu penurunan linear
-            if i <= peak_station_index:
-                # Fase kenaikan
-                occupancy = 20 + (peak_occupancy - 20) * (i / peak_station_index) if peak_station_index > 0 else peak_occupancy
-            else:
-                # Fase penurunan
-                denominator = num_stations - 1 - peak_station_index
-                occupancy = peak_occupancy - (peak_occupancy - 20) * ((i - peak_station_index) / denominator) if denominator > 0 else 20
-            
-            # Memastikan nilai berada di antara 0 dan 200 persen
-            occupancy_map[station] = max(0, min(200, int(occupancy)))
-    # -----------------------------------------------------------
-
-    return occupancy_map
+def _predict_internal(train: Train, current_time: datetime.datetime) -> Dict[str, int]:
+    """
+    Internal prediction logic for train occupancy.
+    """
+    return _predict_for_periods(train.route, active_periods(current_time), train.pattern.direction)
 
 def calculate_confidence(occupancy_map: Dict[str, int]) -> float:
     """
@@ -648,402 +471,120 @@ def calculate_confidence(occupancy_map: Dict[str, int]) -> float:
     confidence = max(0.0, min(1.0, confidence))
     return confidence
 
-class OccupancyPredictorModel(mlflow.pyfunc.PythonModel):
-    """
-    MLflow PythonModel wrapper for the Occupancy Predictor.
-    """
-    def predict(self, context, model_input: "pd.DataFrame") -> "pd.DataFrame":
-        import pandas as pd
-        from data_models import Train # Assuming Train is available
-
-        results = []
-        for index, row in model_input.iterrows():
-            train_id = row['train_id']
-            # Reconstruct route from 'route_X' columns, handling potential NaNs
-            route_list = [row[col] for col in model_input.columns if col.startswith('route_') and pd.notna(row[col])]
-            current_time_str = row['current_time_iso']
-
-            # Create a Train object. This assumes Train has a constructor
-            # that takes `train_id` and `route` as arguments, or that these
-            # are directly assignable attributes.
-            train_obj = Train(train_id=train_id, route=route_list)
-            
-            current_time_dt = datetime.datetime.fromisoformat(current_time_str)
-
-            occupancy_map_single = _predict_internal(train_obj, current_time_dt)
-            
-            # Prepare row result for DataFrame output
-            row_result = {'train_id': train_id, 'current_time_iso': current_time_str}
-            for station, occupancy in occupancy_map_single.items():
-                # Sanitize station names for column names
-                sanitized_station = station.replace(' ', '_').replace('.', '').replace('-', '_').lower()
-                row_result[f"occupancy_{sanitized_station}"] = occupancy
-            results.append(row_result)
-        
-        return pd.DataFrame(results)
+def __getattr__(name):
+    # OccupancyPredictorModel ada di occupancy_mlflow agar import modul ini tidak
+    # memuat mlflow/pandas; nama lamanya tetap bisa dipakai (termasuk oleh model
+    # MLflow yang sudah tersimpan dengan referensi occupancy_predictor).
+    if name == "OccupancyPredictorModel":
+        from occupancy_mlflow import OccupancyPredictorModel
+        return OccupancyPredictorModel
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_cumulative_distance(route: List[str]) -> List[float]:
-    # Di sini Anda akan membaca dari data `station_distances` Anda
-    # dan menghitung jarak kumulatif untuk rute yang diberikan.
-    # Ini adalah implementasi contoh.
-    # Anda harus membangun data `station_distances_bogor_line` yang lengkap.
-
-    # Placeholder
-    # Seharusnya ini lebih cerdas dan memilih data jarak yang benar berdasarkan line
-    station_distances_data = {
-        ("Bogor", "Cilebut"): 7.518,
-        ("Cilebut", "Bojong Gede"): 4.331,
-        ("Bojong Gede", "Citayam"): 5.197,
-        ("Citayam", "Depok"): 5.084,
-        ("Depok", "Depok Baru"): 1.741,
-        ("Depok Baru", "Pondok Cina"): 2.57,
-        ("Pondok Cina", "Universitas Indonesia"): 1.109,
-        ("Universitas Indonesia", "Universitas Pancasila"): 2.264,
-        ("Universitas Pancasila", "Lenteng Agung"): 1.029,
-        ("Lenteng Agung", "Tanjung Barat"): 2.460,
-        ("Tanjung Barat", "Pasar Minggu"): 3.031,
-        ("Pasar Minggu", "Pasar Minggu Baru"): 1.695,
-        ("Pasar Minggu Baru", "Duren Kalibata"): 1.509,
-        ("Duren Kalibata", "Cawang"): 1.475,
-        ("Cawang", "Tebet"): 1.301,
-        ("Tebet", "Manggarai"): 2.601,
-
-        # B. Rangkasbitung - Tanah abang
-        ("Rangkasbitung", "Citeras"): 9.847,
-        ("Citeras", "Maja"): 7.293,
-        ("Maja", "Cikoya"): 1.835,
-        ("Cikoya", "Tigaraksa"): 2.651,
-        ("Tigaraksa", "Tenjo"): 2.974,
-        ("Tenjo", "Daru"): 3.902,
-        ("Daru", "Cilejit"): 2.675,
-        ("Cilejit", "Parung Panjang"): 7.025,
-        ("Parung Panjang", "Cicayur"): 5.968,
-        ("Cicayur", "Cisauk"): 2.519,
-        ("Cisauk", "Serpong"): 1.784,
-        ("Serpong", "Rawa Buntu"): 2.413,
-        ("Rawa Buntu", "Sudimara"): 4.566,
-        ("Sudimara", "Jurang Mangu"): 1.974,
-        ("Jurang Mangu", "Pondok Ranji"): 2.179,
-        ("Pondok Ranji", "Kebayoran"): 6.218,
-        ("Kebayoran", "Palmerah"): 3.373,
-        ("Palmerah", "Tanah Abang"): 3.191,
-
-        # C. TANAH ABANG - JATINEGARA
-        ("Tanah Abang", "Duri"): 3.632,
-        ("Duri", "Angke"): 1.230,
-        ("Angke", "Kampung Badan"): 4.102,
-        ("Kampung Badan", "Rajawali"): 1.444,
-        ("Rajawali", "Kemayoran"): 1.901,
-        ("Kemayoran", "Pasar Senen"): 1.436,
-        ("Pasar Senen", "Gang Sentiong"): 1.567,
-        ("Gang Sentiong", "Kramat"): 0.973,
-        ("Kramat", "Pondok Jati"): 1.829,
-        ("Pondok Jati", "Jatinegara"): 1.236,
-
-        # D. JATINEGARA - CIKARANG
-        ("Jatinegara", "Klender"): 3.395,
-        ("Klender", "Buaran"): 3.1,
-        ("Buaran", "Klender Baru"): 1.305,
-        ("Klender Baru", "Cakung"): 1.385,
-        ("Cakung", "Kranji"): 3.097,
-        ("Kranji", "Bekasi"): 2.520,
-        ("Bekasi", "Bekasi Timur"): 3.298,
-        ("Bekasi Timur", "Tambun"): 3.43,
-        ("Tambun", "Cibitung"): 3.42,
-        ("Cibitung", "Cikarang"): 6.489,
-
-        # E. TANAH ABANG - MANGGARAI
-        ("Tanah Abang", "Karet"): 2.029,
-        ("Karet", "BNI City"): 0.377,
-        ("BNI City", "Sudirman"): 0.434,
-        ("Sudirman", "Manggarai"): 3.186,
-
-        # F. (Route between Manggarai and Jakarta Kota)
-        ("Manggarai", "Cikini"): 1.606,
-        ("Cikini", "Gondangdia"): 1.699,
-        ("Gondangdia", "Juanda"): 2.198,
-        ("Juanda", "Sawah Besar"): 0.707,
-        ("Sawah Besar", "Mangga Besar"): 1.121,
-        ("Mangga Besar", "Jayakarta"): 1.02,
-        ("Jayakarta", "Jakarta Kota"): 1.467,
-
-        # G. TANGERANG - DURI
-        ("Tangerang", "Tanah Tinggi"): 1.609,
-        ("Tanah Tinggi", "Batu Ceper"): 2.0,
-        ("Batu Ceper", "Poris"): 1.8,
-        ("Poris", "Kalideres"): 2.548,
-        ("Kalideres", "Rawa Buaya"): 2.504,
-        ("Rawa Buaya", "Bojong Indah"): 1.152,
-        ("Bojong Indah", "Taman Kota"): 2.434,
-        ("Taman Kota", "Pesing"): 1.514,
-        ("Pesing", "Grogol"): 2.036,
-        ("Grogol", "Duri"): 1.7,
-
-        # H. Jakarta Kota - Tanjung Priok
-        ("Jakarta Kota", "Kampung Bandan"): 1.364,
-        ("Kampung Bandan", "Ancol"): 6.5,
-        ("Ancol", "Tanjung Priok"): 4.566
-    }
-
-    distances = [0.0]
-    for i in range(len(route) - 1):
-        # Normalisasi nama stasiun sebelum mencari jarak
-        station1 = normalize_station(route[i]).title() # Kembalikan ke format Title Case seperti di data
-        station2 = normalize_station(route[i+1]).title()
-        
-        station_pair = (station1, station2)
-        reverse_pair = (station2, station1)
-        
-        # Cari jarak, jika tidak ada, gunakan default 2.0 km
-        dist = station_distances_data.get(station_pair, station_distances_data.get(reverse_pair, 2.0))
-        distances.append(distances[-1] + dist)
+    """Jarak kumulatif (km) per stasiun rute, dari tabel jarak tunggal di network_model."""
+    return cumulative_distance(route)
 
-    return distances
 
+# Ukuran maksimum cache prediksi (pola rute x kombinasi periode)
+PREDICTION_CACHE_SIZE = 1024
 
-def predict(train: Train, current_time: datetime.datetime, log_model: bool = True) -> Dict[str, int]:
+def predict(train: Train, current_time: datetime.datetime, log_model: bool = True) -> Mapping[str, int]:
     """
     Memprediksi okupansi untuk semua stasiun dalam rute kereta dengan interpolasi spasial
     yang disesuaikan dengan waktu dan arah perjalanan.
     Menggunakan matriks okupansi dan profil spasial untuk prediksi yang lebih terstruktur.
+    Hasil disimpan di cache LRU bersama (lihat prediction_cache_info) dan berupa
+    mapping baca-saja karena objek yang sama dibagikan ke semua pemanggil.
     """
+    if not train.route:
+        return MappingProxyType({})
+    # Aturan okupansi hanya memeriksa periode mana yang aktif, bobot transisinya
+    # tidak dipakai. Jadi kunci cache cukup (pola rute, periode aktif): kuantisasi
+    # bobot paling kasar yang hasilnya tetap identik.
+    return _predict_cached(train.pattern, active_periods(current_time))
 
-    occupancy_map = {}
-    route = train.route
-    if not route:
-            return occupancy_map
+@functools.lru_cache(maxsize=PREDICTION_CACHE_SIZE)
+def _predict_cached(pattern, periods: tuple) -> Mapping[str, int]:
+    return MappingProxyType(_predict_for_periods(pattern.stations, periods, pattern.direction))
 
+def prediction_cache_info():
+    """Statistik cache prediksi (hits, misses, maxsize, currsize)."""
+    return _predict_cached.cache_info()
 
-    direction = get_direction(route)
-    periods_weights = get_adjacent_periods(current_time)
+def clear_prediction_cache() -> None:
+    _predict_cached.cache_clear()
 
+def _predict_for_periods(route, periods: tuple, direction: Direction = None) -> Dict[str, int]:
+    """Aturan okupansi per stasiun untuk rute dan periode waktu aktif yang diberikan."""
+    return dict(zip(route, occupancy_vector(route, periods, direction).tolist()))
 
-    is_puncak_pagi = any(p == TimePeriod.PUNCAK_PAGI for p, w in periods_weights)
-    is_puncak_sore = any(p == TimePeriod.PUNCAK_SORE for p, w in periods_weights)
-    is_awal_siang = any(p == TimePeriod.AWAL_SIANG for p, w in periods_weights)
-    is_makan_siang = any(p == TimePeriod.MAKAN_SIANG for p, w in periods_weights)
-    is_akhir_siang = any(p == TimePeriod.AKHIR_SIANG for p, w in periods_weights)
-    is_akhir_pekan = any(p == TimePeriod.AKHIR_PEKAN for p, w in periods_weights)
-    # KRL Lin Bogor warna Merah
-    
-    # Jam sibuk pagi 
-    # Okupansi KRL dari Bogor ke Jakarta Kota
-    # Dari Bogor - Bojong Gede (0-105%)
-    # Dari Citayam - Pasar Minggu (105%-115%)
-    # Dari Pasar Minggu Baru - Manggarai (115% - 120%)
-    # Dari Cikini - Jakarta Kota (80% menurun hingga 0%)
-    
-    if (is_puncak_pagi and not is_akhir_pekan) and direction == Direction.DARI_BOGOR_MENUJU_JAKARTAKOTA:    
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(-3.410605*10**-13 + 53.36605*i - 8.279928*i**2 + 0.524309 * i**3 - 0.1153014*i**4)
-    
-    # Jam sibuk sore
-    # Okupansi KRL dari Jakarta Kota ke Bogor
-    # Dari Jakarta Kota - Manggarai (0-120%)
-    # Dari Manggarai - Pasar Minggu Baru (120% menurun hingga 115%)
-    # Dari Pasar Minggu Baru - Citayam (115% menurun hingga 105%)
-    # Dari Citayam - Bogor (105% menurun hingga 0%)
-    
-    if (is_puncak_sore and not is_akhir_pekan) and direction == Direction.DARI_JAKARTAKOTA_MENUJU_BOGOR:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(6.82121*10**-13 + 56.58092 * i - 8.699259 * i**2 + 0.5364635 * i**3 - 0.01153014 * i**4)
-    
-    
-    
-    # Di luar jam sibuk yg di luar jam makan siang (08:30 - 12:00 & 14:00-15:30 & setelah jam 19:00)
-    # Okupansi KRL dari Jakarta Kota ke Bogor
-    # Dari Jakarta Kota - Manggarai (0% naik hingga 70%)
-    # Dari Manggarai - Pasar Minggu (70% turun hingga 65%)
-    # Dari Pasar Minggu - Citayam (65% turun hingga 40%)
-    # Dari Bojong Gede - Bogor (40% turun hingga 0%)
-    
-    if (not is_puncak_sore and not is_akhir_pekan) and direction == Direction.DARI_JAKARTAKOTA_MENUJU_BOGOR:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(-1.136868*10**-13 + 25.82139 * i - 3.355988 * i**2 + 0.1825466 * i**3 - 0.003715035*i**4)
-    
-    # Di luar jam sibuk yg di dalam jam makan siang (12:00 - 14:00)
-    # Okupansi KRL dari Jakarta Kota ke Bogor
-    # Dari Jakarta Kota - Manggarai (0% naik hingga 75%)
-    # Dari Manggarai - Pasar Minggu (75% turun hingga 70%)
-    # Dari Pasar Minggu - Citayam (70% turun hingga 45%)
-    # Dari Bojong Gede - Bogor (45% hingga 0%)
-    if (is_makan_siang and not is_akhir_pekan) and direction == Direction.DARI_JAKARTAKOTA_MENUJU_BOGOR:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(-1.136868*10**-13 + 28.11143* i - 3.723141*i**2 + 0.2066267*i**3 - 0.004256161*i**4)
-    
-    # Di luar jam sibuk yg di luar jam makan siang (08:30 - 12:00 & 14:00-15:30 & setelah jam 19:00)
-    # Okupansi KRL dari Bogor - Jakarta Kota
-    # Dari Bogor - Bojong Gede (0-40%)
-    # Dari Citayam - Pasar Minggu (40-65%)
-    # Dari Pasar Minggu Baru - Manggarai (65%-70%)
-    # Dari Cikini - Jakarta Kota (40% menurun hingga 0%)
-    if (is_awal_siang or is_akhir_siang) and not is_akhir_pekan and direction == Direction.DARI_BOGOR_MENUJU_JAKARTAKOTA:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(5.684342*10**-14 + 19.65589 * i - 2.551792 * i**2 + 0.1592366* i**3 - 0.3715035*i**4)
-    
-    # Di luar jam sibuk yg di dalam jam makan siang (12:00 - 14:00)
-    # Okupansi KRL dari Bogor - Jakarta Kota
-    # Dari Bogor - Bojong Gede (0-45%)
-    # Dari Citayam - Pasar Minggu (45-70%)
-    # Dari Pasar Minggu Baru - Manggarai (70-75%)
-    # Dari Cikini - Jakarta Kota (45% menurun hingga 0%)
-    if is_makan_siang and direction == Direction.DARI_BOGOR_MENUJU_JAKARTAKOTA and not is_akhir_pekan:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(-5.684342*10**-14 + 22.37531 * i - 2.974952 * i**2 + 0.1849401* i**3 - 0.004256161*i**4)
-    
-    # Di dalam jam sibuk pagi (05:30 - 08:30)
-    # Okupansi KRL dari Bogor - Manggarai
-    # Dari Bogor - Citayam (0% - 100%)
-    # Dari Citayam - Pasar Minggu (100% - 130%)
-    # Pasar Minggu - Tebet (130% turun hingga 120%)
-    # Manggarai 0%
-    if is_puncak_pagi and direction == Direction.DARI_BOGOR_MENUJU_MANGGARAI and not is_akhir_pekan:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(-1.023182*10**-12 + 105.331 * i - 33.7549 * i**2 + 3.610431 * i**3 - 0.1195124 * i**4)
-    
-    
-    # Di luar jam sibuk (05:30- & 08:30 - 15:30 & 19:30+)
-    # Okupansi KRL dari Manggarai - Bogor
-    # Dari Manggarai - Pasar Minggu (0% - 70%)
-    # Dari Pasar Minggu - Citayam (70% menurun hingga 40%)
-    # Citayam - Bogor (40 % menurun hingga 0%)
-    if is_puncak_sore and direction == Direction.DARI_MANGGARAI_MENUJU_BOGOR and not is_akhir_pekan:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(3.089 * 10**-2 * i**3 - 1.921 * i **2 + 2.283 * 10**1 * i + 7.185 * 10**-14)
-    
-    
-    # Di akhir pekan
-    # Okupansi KRL dari Manggarai - Bogor
-    # Dari Manggarai - Pasar Minggu (0% - 90%)
-    # Dari Pasar Minggu - Citayam (90% menurun hingga 60%)
-    # Citayam - Bogor (60 % menurun hingga 0%)     
-    if is_akhir_pekan and direction == Direction.DARI_MANGGARAI_MENUJU_BOGOR:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(1.224 * 10**-2 * i**3 - 1.893 * i**2 + 2.716 * 10**1 * i + 4.583 * 10**-14)
-    
 
-    # Di jam sibuk sore
-    # Okupansi KRL dari Jakarta Kota - Nambo
-    # Dari Jakarta Kota - Manggarai (0% hingga 130%)
-    # Dari Manggarai - Cawang (130% menurun hingga 100%)
-    # Duren Kalibata - Pondok Cina (100% menurun hingga 80%)
-    # Depok Baru - Nambo (80% menurun hingga 0%)
-    if is_puncak_sore and direction == Direction.DARI_JAKARTAKOTA_MENUJU_NAMBO and not is_akhir_pekan:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(-1.824*10**-2*i**4+8.948*10**-1*i**3-1.453*10**1*i**2+8.267*10**1*i-1.399*10**-12)
-            
-    # Di jam sibuk pagi
-    # Okupansi KRL dari Nambo - Jakarta Kota
-    # Nambo (20%)
-    # Cibinong (60%)
-    # Citayam - Manggarai (dari 120% - 150%)
-    # Manggarai - Jakarta Kota (110% menurun hingga 0%)
-    if is_puncak_pagi and direction == Direction.DARI_NAMBO_MENUJU_JAKARTAKOTA and not is_akhir_pekan:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(1.517*10**-3 *i**4+ 3.28*10**-2*i**3 - 4.1 * i**2 + 5.75 * 10 * i + 1.587 * 10)
-            
-    # Di luar jam sibuk
-    # Okupansi KRL dari Nambo - Jakarta Kota
-    # Nambo (10%)
-    # Cibinong (30%)
-    # Citayam (50%)
-    # Manggarai (70%)
-    # Jakarta Kota (0%)
-    if (is_akhir_siang or is_awal_siang or is_makan_siang) and direction == Direction.DARI_NAMBO_MENUJU_JAKARTAKOTA and not is_akhir_pekan:
-        for i, station_name in enumerate(route):
-            occupancy_map[station_name] = int(1.037*10**-5*i**4+1.194*10**-2*i**3-9.251*10**-1*i**2+1.353*10**1*i+2.126*10**1)
-    
+# --- PREDIKSI BATCH (VEKTOR NUMPY) ---
+BATCH_PADDING = -1  # Nilai untuk posisi di luar panjang rute kereta
 
-    # --- BRANCH UNTUK RUTE BARU: CIKARANG/BEKASI/ANGKE/KAMPUNG BANDAN via MANGGARAI ---
-    # Contoh: Cikarang–Angke via Manggarai
-    if direction in [
-        Direction.DARI_CIKARANG_MENUJU_ANGKE_MELALUI_MANGGARAI,
-        Direction.DARI_ANGKE_MENUJU_CIKARANG_MELALUI_MANGGARAI,
-        Direction.DARI_BEKASI_MENUJU_ANGKE_MELALUI_MANGGARAI,
-        Direction.DARI_ANGKE_MENUJU_BEKASI_MELALUI_MANGGARAI,
-        Direction.DARI_CIKARANG_MENUJU_MANGGARAI,
-        Direction.DARI_MANGGARAI_MENUJU_CIKARANG,
-        Direction.DARI_CIKARANG_MENUJU_KAMPUNGBANDAN_MELALUI_MANGGARAI,
-        Direction.DARI_KAMPUNGBANDAN_MENUJU_CIKARANG_MELALUI_MANGGARAI,
-        Direction.DARI_BEKASI_MENUJU_KAMPUNGBANDAN_MELALUI_MANGGARAI,
-        Direction.DARI_KAMPUNGBANDAN_MENUJU_BEKASI_MELALUI_MANGGARAI,
-    ]:
-        # Jam sibuk (pagi/sore)
-        if (is_puncak_pagi or is_puncak_sore) and not is_akhir_pekan:
-            for i, station_name in enumerate(route):
-                # Polinomial: puncak di tengah, naik ke tengah, turun ke akhir
-                n = len(route) - 1 if len(route) > 1 else 1
-                peak = 120
-                base = 25
-                if i <= n // 2:
-                    occ = base + (peak - base) * (i / (n // 2 if n // 2 > 0 else 1))
-                else:
-                    occ = peak - (peak - base) * ((i - n // 2) / (n - n // 2 if n - n // 2 > 0 else 1))
-                occupancy_map[station_name] = int(max(0, min(200, occ)))
-        # Di luar jam sibuk (weekday)
-        elif not is_akhir_pekan:
-            for i, station_name in enumerate(route):
-                n = len(route) - 1 if len(route) > 1 else 1
-                peak = 70
-                base = 20
-                if i <= n // 2:
-                    occ = base + (peak - base) * (i / (n // 2 if n // 2 > 0 else 1))
-                else:
-                    occ = peak - (peak - base) * ((i - n // 2) / (n - n // 2 if n - n // 2 > 0 else 1))
-                occupancy_map[station_name] = int(max(0, min(200, occ)))
-        # Akhir pekan
-        elif is_akhir_pekan:
-            for i, station_name in enumerate(route):
-                n = len(route) - 1 if len(route) > 1 else 1
-                peak = 90
-                base = 25
-                if i <= n // 2:
-                    occ = base + (peak - base) * (i / (n // 2 if n // 2 > 0 else 1))
-                else:
-                    occ = peak - (peak - base) * ((i - n // 2) / (n - n // 2 if n - n // 2 > 0 else 1))
-                occupancy_map[station_name] = int(max(0, min(200, occ)))
-
-    # --- MEKANISME FALLBACK UNTUK RUTE BARU DAN LAINNYA ---
-    # Jika tidak ada aturan spesifik yang cocok di atas (termasuk untuk rute-rute baru yang ditambahkan),
-    # logika di bawah ini akan dijalankan.
-    if not occupancy_map and route:
-        num_stations = len(route)
-        
-        # Logika baru: Jadikan Manggarai sebagai puncak jika ada di rute
-        peak_station_index = num_stations // 2  # Default: puncak di tengah
-        try:
-            # Cari indeks stasiun 'manggarai' (setelah dinormalisasi)
-            normalized_route = [normalize_station(s) for s in route]
-            manggarai_index = normalized_route.index('manggarai')
-            peak_station_index = manggarai_index
-        except ValueError:
-            # Jika Manggarai tidak ada di rute, gunakan default (puncak di tengah)
-            pass
-
-        # Menggunakan waktu untuk memengaruhi puncak okupansi
-        peak_occupancy = 65  # Puncak okupansi default untuk di luar jam sibuk
-        if is_puncak_pagi or is_puncak_sore:
-            peak_occupancy = 110 # Puncak lebih tinggi untuk jam sibuk
-        elif is_akhir_pekan:
-            peak_occupancy = 85 # Puncak medium untuk akhir pekan
-
-        for i, station in enumerate(route):
-            # Model segitiga sederhana: kenaikan linear ke puncak, lalu penurunan linear
-            if i <= peak_station_index:
-                # Fase kenaikan
-                occupancy = 20 + (peak_occupancy - 20) * (i / peak_station_index) if peak_station_index > 0 else peak_occupancy
-            else:
-                # Fase penurunan
-                denominator = num_stations - 1 - peak_station_index
-                occupancy = peak_occupancy - (peak_occupancy - 20) * ((i - peak_station_index) / denominator) if denominator > 0 else 20
-            
-            # Memastikan nilai berada di antara 0 dan 200 persen
-            occupancy_map[station] = max(0, min(200, int(occupancy)))
-    # -----------------------------------------------------------
+@functools.lru_cache(maxsize=PREDICTION_CACHE_SIZE)
+def _occupancy_vector_cached(pattern, periods: tuple) -> np.ndarray:
+    vector = occupancy_vector(pattern.stations, periods, pattern.direction)
+    vector.setflags(write=False)
+    return vector
+
+def predict_batch(trains, times) -> np.ndarray:
+    """
+    Prediksi okupansi untuk banyak pasangan (kereta, waktu) sekaligus. `times`
+    berupa daftar datetime sepanjang `trains`, atau satu datetime untuk semua.
+    Masukan dikelompokkan per (pola rute, periode aktif) sehingga setiap
+    kelompok dihitung sekali sebagai ekspresi numpy atas indeks stop.
+    Mengembalikan matriks int32 (len(trains), panjang rute terpanjang); baris r
+    kolom j = okupansi stop ke-j kereta r, sama dengan predict(trains[r], times[r]).
+    Posisi setelah akhir rute diisi BATCH_PADDING.
+    """
+    if isinstance(times, datetime.datetime):
+        times = [times] * len(trains)
+    if len(times) != len(trains):
+        raise ValueError("trains dan times harus sama panjang")
+    width = max((len(train.route) for train in trains), default=0)
+    result = np.full((len(trains), width), BATCH_PADDING, dtype=np.int32)
+
+    groups = collections.defaultdict(list)
+    for row, (train, current_time) in enumerate(zip(trains, times)):
+        groups[(train.pattern, _ACTIVE_PERIODS[minute_of_week(current_time)])].append(row)
+
+    for (pattern, periods), rows in groups.items():
+        vector = _occupancy_vector_cached(pattern, periods)
+        result[np.array(rows), :len(vector)] = vector
+    return result
 
-    return occupancy_map
 
+def _periods_for_code(code: int) -> tuple:
+    """Kebalikan kode periode (id pertama * 8 + id kedua) menjadi tuple periode aktif."""
+    return tuple(TimePeriod(period_id) for period_id in divmod(code, 8) if period_id)
+
+def predict_stop_occupancy(routes, route_index, minutes, positions) -> np.ndarray:
+    """
+    Okupansi per baris untuk data format panjang (satu baris per stop): baris r
+    adalah stop ke-positions[r] dari rute routes[route_index[r]] pada menit
+    minutes[r] (menit sejak Senin 00:00, lihat minute_of_week). Baris dikelompokkan
+    per (rute, periode aktif); setiap kelompok dihitung sekali lalu hasilnya
+    diambil dengan indeks array. Posisi di luar rute menghasilkan BATCH_PADDING.
+    """
+    route_index = np.asarray(route_index, dtype=np.int64)
+    positions = np.asarray(positions, dtype=np.int64)
+    period_ids = PERIOD_IDS[np.asarray(minutes, dtype=np.int64) % MINUTES_PER_WEEK]
+    period_code = period_ids[:, 0].astype(np.int64) * 8 + period_ids[:, 1]
+    keys, key_of_row = np.unique(route_index * 64 + period_code, return_inverse=True)
+
+    width = max((len(route) for route in routes), default=0)
+    table = np.full((len(keys), width), BATCH_PADDING, dtype=np.int32)
+    for k, key in enumerate(keys.tolist()):
+        route_id, code = divmod(key, 64)
+        vector = occupancy_vector(routes[route_id], _periods_for_code(code))
+        table[k, :len(vector)] = vector
+
+    result = np.full(len(positions), BATCH_PADDING, dtype=np.int32)
+    valid = (positions >= 0) & (positions < width)
+    result[valid] = table[key_of_row.reshape(-1)[valid], positions[valid]]
+    return result
 
 
 # --- CONTOH PENGGUNAAN ---
@@ -0,0 +1,319 @@
+# Beberapa instans (tapi gk semua) yang dibantu Github Copilot dan Google Gemini
+# -- Awal Kutipan
+import bisect
+import collections
+from typing import List, Dict, Tuple, Optional
+
+from data_models import Region, MINUTES_PER_DAY, TRANSFER_MINUTES
+
+INFINITY = float("inf")
+
+
+class RaptorRoute:
+    """
+    Satu rute RAPTOR: urutan stop yang sama untuk sekumpulan trip yang tidak
+    saling menyalip (FIFO), sehingga setiap kolom waktu per stop terurut dan
+    trip paling awal bisa dicari dengan bisect.
+    """
+    __slots__ = ("stops", "trips", "trip_times", "columns")
+
+    def __init__(self, stops: Tuple[int, ...], trips: list):
+        self.stops = stops
+        # trips[j] = (kereta, posisi stop di pola rute kereta) untuk setiap stop rute
+        self.trips = [(train, positions) for train, positions, __ in trips]
+        self.trip_times: List[List[int]] = [times for __, __, times in trips]
+        self.columns: List[List[int]] = [list(column) for column in zip(*self.trip_times)]
+
+    def earliest_trip(self, i: int, ready: int) -> Optional[Tuple[int, int]]:
+        """
+        Trip paling awal yang berangkat dari stop ke-i setelah menit `ready`
+        (harus lebih besar, bukan sama). Jadwal berulang setiap hari, jadi
+        hasilnya (indeks trip, offset hari dalam menit). Offset bisa negatif:
+        kereta hari sebelumnya yang lewat tengah malam masih bisa dinaiki.
+        """
+        column = self.columns[i]
+        if not column:
+            return None
+        # Offset hari terkecil yang masih punya trip setelah `ready`
+        offset = ((ready - column[-1]) // MINUTES_PER_DAY + 1) * MINUTES_PER_DAY
+        j = bisect.bisect_right(column, ready - offset)
+        # Kolom yang rentangnya lebih dari sehari: trip pertama hari berikutnya bisa lebih awal
+        if column[0] + MINUTES_PER_DAY < column[j]:
+            later = bisect.bisect_right(column, ready - offset - MINUTES_PER_DAY)
+            if column[later] + MINUTES_PER_DAY < column[j]:
+                return later, offset + MINUTES_PER_DAY
+        return j, offset
+
+
+def build_routes(trains) -> Tuple[List[RaptorRoute], Dict[int, List[Tuple[int, int]]]]:
+    """
+    Menurunkan rute RAPTOR dari daftar kereta satu wilayah. Stop tanpa jam dan
+    stop yang jamnya mundur (salah ketik di data) dilewati. Kereta dengan urutan
+    stop yang sama dikelompokkan, lalu dipecah lagi agar tidak ada trip yang
+    menyalip trip lain. Mengembalikan daftar rute dan peta stop -> [(rute, indeks)].
+    """
+    groups = collections.defaultdict(list)
+    for train in trains:
+        minutes = train.minutes.tolist()
+        positions = train.timed_positions()
+        if len(positions) < 2:
+            continue
+        stops = tuple(train.station_ids[pos] for pos in positions)
+        groups[stops].append((train, tuple(positions), [minutes[pos] for pos in positions]))
+
+    routes = []
+    for stops, trips in groups.items():
+        trips.sort(key=lambda trip: trip[2])
+        fifo_groups = []
+        for trip in trips:
+            for group in fifo_groups:
+                if all(a <= b for a, b in zip(group[-1][2], trip[2])):
+                    group.append(trip)
+                    break
+            else:
+                fifo_groups.append([trip])
+        routes.extend(RaptorRoute(stops, group) for group in fifo_groups)
+
+    stop_routes = collections.defaultdict(list)
+    for route_idx, route in enumerate(routes):
+        for i, stop in enumerate(route.stops):
+            stop_routes[stop].append((route_idx, i))
+    return routes, dict(stop_routes)
+
+
+class RaptorEngine:
+    """
+    Mesin pencarian RAPTOR (Round-bAsed Public Transit Optimized Router).
+    Ronde ke-k menghasilkan waktu tiba paling awal dengan k kereta, jadi batas
+    transit RouteFinder (max_transits) langsung menjadi max_transits + 1 ronde.
+    Semua waktu dalam menit relatif terhadap tengah malam tanggal keberangkatan.
+    """
+
+    def __init__(self, schedule):
+        self.schedule = schedule
+        self.n_stations = len(schedule.stations)
+        self.routes: Dict[Region, List[RaptorRoute]] = {}
+        self.stop_routes: Dict[Region, Dict[int, List[Tuple[int, int]]]] = {}
+        for region, trains in schedule.trains_by_region.items():
+            self.routes[region], self.stop_routes[region] = build_routes(trains)
+
+    def run(self, origin: int, t0: int, region: Region, max_rounds: int,
+            target: Optional[int] = None, horizon: Optional[int] = None):
+        """
+        Menjalankan ronde RAPTOR dari stasiun `origin` pada menit `t0`.
+        `target` mengaktifkan target pruning, `horizon` membuang label yang tiba
+        setelah menit tersebut. Mengembalikan (labels, parents) per ronde:
+        labels[k][stop] = waktu tiba terbaik dengan paling banyak k kereta.
+        """
+        limit = INFINITY if horizon is None else horizon
+        best = [INFINITY] * self.n_stations
+        first = [INFINITY] * self.n_stations
+        first[origin] = t0
+        best[origin] = t0
+        labels = [first]
+        parents = [[None] * self.n_stations]
+        marked = {origin}
+
+        for k in range(1, max_rounds + 1):
+            current = list(labels[k - 1])
+            parent = [None] * self.n_stations
+            marked = self._scan_round(region, k, marked, labels[k - 1], current, parent, best, target, limit)
+            labels.append(current)
+            parents.append(parent)
+            if not marked:
+                break
+        return labels, parents
+
+    def _scan_round(self, region: Region, k: int, marked: set, prev: list, current: list, parent: list,
+                    best: list, target: Optional[int], limit, latest_board=INFINITY) -> set:
+        """
+        Satu ronde RAPTOR: memindai setiap rute yang melewati stop bertanda, naik
+        memakai label ronde sebelumnya (prev) dan menulis perbaikan ke current,
+        parent, dan best (batas pruning). Trip yang berangkat setelah menit
+        `latest_board` tidak dinaiki. Mengembalikan stop yang membaik.
+        """
+        routes = self.routes.get(region, [])
+        stop_routes = self.stop_routes.get(region, {})
+        # Kumpulkan rute yang melewati stop bertanda, mulai dari stop bertanda paling awal
+        queue = {}
+        for stop in marked:
+            for route_idx, i in stop_routes.get(stop, ()):
+                if i < queue.get(route_idx, len(routes[route_idx].stops)):
+                    queue[route_idx] = i
+        improved = set()
+        # Ronde pertama naik langsung dari stasiun awal, ronde berikutnya adalah transit
+        buffer = 0 if k == 1 else TRANSFER_MINUTES
+        target_best = INFINITY
+
+        for route_idx, start in queue.items():
+            route = routes[route_idx]
+            stops = route.stops
+            trip = None
+            trip_times = None
+            day_offset = 0
+            board_i = 0
+            for i in range(start, len(stops)):
+                stop = stops[i]
+                if trip_times is not None:
+                    arrival = trip_times[i] + day_offset
+                    if target is not None:
+                        target_best = best[target]
+                    if arrival < best[stop] and arrival < target_best and arrival <= limit:
+                        current[stop] = arrival
+                        best[stop] = arrival
+                        parent[stop] = (route_idx, trip, day_offset, board_i, i)
+                        improved.add(stop)
+                ready = prev[stop]
+                if ready == INFINITY:
+                    continue
+                ready += buffer
+                if trip_times is None or ready < trip_times[i] + day_offset:
+                    found = route.earliest_trip(i, ready)
+                    if found is None:
+                        continue
+                    j, offset = found
+                    if route.trip_times[j][i] + offset > latest_board:
+                        continue
+                    if trip_times is None or route.trip_times[j][i] + offset < trip_times[i] + day_offset:
+                        trip, day_offset, board_i = j, offset, i
+                        trip_times = route.trip_times[j]
+        return improved
+
+    def journey(self, region: Region, parents, stop: int, k: int) -> list:
+        """
+        Merekonstruksi perjalanan yang berakhir di `stop` pada ronde k sebagai
+        daftar leg (kereta, posisi naik, posisi turun, menit berangkat, menit tiba).
+        """
+        routes = self.routes[region]
+        legs = []
+        while k > 0:
+            entry = parents[k][stop]
+            if entry is None:
+                k -= 1
+                continue
+            route_idx, trip, day_offset, board_i, alight_i = entry
+            route = routes[route_idx]
+            train, positions = route.trips[trip]
+            times = route.trip_times[trip]
+            legs.append((train, positions[board_i], positions[alight_i],
+                         times[board_i] + day_offset, times[alight_i] + day_offset))
+            stop = route.stops[board_i]
+            k -= 1
+        legs.reverse()
+        return legs
+
+    def find_journeys(self, origin: int, dest: int, t0: int, region: Region, max_transits: int) -> list:
+        """
+        Perjalanan Pareto-optimal (waktu tiba vs jumlah transit) dari origin ke dest:
+        satu perjalanan untuk setiap ronde yang memperbaiki waktu tiba di tujuan.
+        """
+        labels, parents = self.run(origin, t0, region, max_transits + 1, target=dest)
+        journeys = []
+        for k in range(1, len(labels)):
+            if labels[k][dest] < labels[k - 1][dest]:
+                journeys.append(self.journey(region, parents, dest, k))
+        return journeys
+
+    def earliest_arrivals(self, origin: int, t0: int, region: Region, max_rounds: int,
+                          horizon: Optional[int] = None) -> Tuple[List[float], List[int]]:
+        """
+        Query satu-ke-semua: waktu tiba paling awal di setiap stasiun (inf jika tidak
+        terjangkau) beserta jumlah transit paling sedikit untuk waktu tiba tersebut
+        (-1 jika tidak terjangkau, 0 untuk stasiun awal).
+        """
+        labels, __ = self.run(origin, t0, region, max_rounds, horizon=horizon)
+        arrivals = list(labels[-1])
+        transfers = [-1] * self.n_stations
+        for stop, arrival in enumerate(arrivals):
+            if arrival == INFINITY:
+                continue
+            # Ronde pertama yang mencapai waktu tiba terbaik = kereta paling sedikit
+            k = next(k for k in range(len(labels)) if labels[k][stop] == arrival)
+            transfers[stop] = max(0, k - 1)
+        return arrivals, transfers
+
+    def origin_departures(self, origin: int, region: Region, t_start: int, t_end: int) -> List[int]:
+        """Menit keberangkatan berbeda dari stasiun origin dalam jendela [t_start, t_end]."""
+        routes = self.routes.get(region, [])
+        first_day = t_start // MINUTES_PER_DAY - 1
+        last_day = t_end // MINUTES_PER_DAY + 1
+        departures = set()
+        for route_idx, i in self.stop_routes.get(region, {}).get(origin, ()):
+            route = routes[route_idx]
+            if i == len(route.stops) - 1:
+                continue
+            for minute in route.columns[i]:
+                for day in range(first_day, last_day + 1):
+                    dep = minute + day * MINUTES_PER_DAY
+                    if t_start <= dep <= t_end:
+                        departures.add(dep)
+        return sorted(departures)
+
+    def profile(self, origin: int, dest: int, t_start: int, t_end: int, region: Region, max_transits: int) -> list:
+        """
+        Query profil (rRAPTOR): semua perjalanan Pareto-optimal menurut (berangkat
+        paling lambat, tiba paling awal, transit paling sedikit) untuk keberangkatan
+        dari origin di dalam jendela [t_start, t_end]. Keberangkatan diproses dari
+        yang paling lambat dan label per ronde dipakai ulang antar iterasi, jadi
+        setiap iterasi hanya menyentuh bagian jaringan yang membaik.
+        Mengembalikan daftar perjalanan terurut menurut waktu berangkat.
+        """
+        max_rounds = max_transits + 1
+        n = self.n_stations
+        labels = [[INFINITY] * n for __ in range(max_rounds + 1)]
+        parents = [[None] * n for __ in range(max_rounds + 1)]
+        journeys = []
+
+        for departure in reversed(self.origin_departures(origin, region, t_start, t_end)):
+            # Naik harus setelah waktu siap (ketat), jadi siap satu menit sebelum berangkat.
+            # Di ronde pertama hanya trip yang berangkat tepat pada menit ini yang dinaiki:
+            # trip lebih lambat sudah diproses di iterasi sebelumnya, atau berada di luar jendela.
+            labels[0][origin] = departure - 1
+            before = [labels[k][dest] for k in range(max_rounds + 1)]
+            marked = {origin}
+            for k in range(1, max_rounds + 1):
+                prev, current, parent = labels[k - 1], labels[k], parents[k]
+                # Label ronde k tidak boleh lebih buruk dari ronde k-1 (hasil salinan tanpa parent).
+                # Label stasiun awal tidak disalin, agar ronde berikutnya tidak naik lagi dari
+                # sana dengan buffer transit ke trip yang berangkat di luar menit ini.
+                for stop in range(n):
+                    if prev[stop] < current[stop] and stop != origin:
+                        current[stop] = prev[stop]
+                        parent[stop] = None
+                latest_board = departure if k == 1 else INFINITY
+                marked = self._scan_round(region, k, marked, prev, current, parent, current, dest, INFINITY, latest_board)
+                if not marked:
+                    break
+            for k in range(1, max_rounds + 1):
+                arrival = labels[k][dest]
+                if arrival < before[k] and parents[k][dest] is not None and arrival < labels[k - 1][dest]:
+                    journeys.append(self.journey(region, parents, dest, k))
+
+        journeys.sort(key=lambda legs: (legs[0][3], legs[-1][4], len(legs)))
+        return journeys
+
+# --- PEKERJA PROCESS POOL UNTUK MATRIKS WAKTU TEMPUH ---
+# Setiap proses pekerja membangun RaptorEngine sekali dari jadwal yang dibagikan
+# lewat initializer, lalu menghitung satu asal per tugas.
+_worker_engine: Optional[RaptorEngine] = None
+
+def init_matrix_worker(schedule) -> None:
+    global _worker_engine
+    _worker_engine = RaptorEngine(schedule)
+
+def sweep_origin(task, engine: Optional[RaptorEngine] = None) -> Tuple[int, List[List[float]], List[List[int]]]:
+    """
+    Tugas (indeks asal, ID asal, daftar menit berangkat, wilayah, jumlah ronde):
+    satu query satu-ke-semua per menit berangkat. Tanpa `engine`, memakai
+    RaptorEngine milik proses pekerja.
+    """
+    engine = engine or _worker_engine
+    row, origin, start_minutes, region, max_rounds = task
+    arrivals, transfers = [], []
+    for t0 in start_minutes:
+        arrival, transfer = engine.earliest_arrivals(origin, t0, region, max_rounds)
+        arrivals.append(arrival)
+        transfers.append(transfer)
+    return row, arrivals, transfers
+
+# -- Akhir kutipan
@@ -1,16 +1,22 @@
 # Beberapa instans (tapi gk semua) yang dibantu Github Copilot dan Google Gemini
 # -- Awal Kutipan
 import collections
+import concurrent.futures
 import datetime
 import heapq
+import itertools
+import math
 import tkinter as tk
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Optional, Set
+import numpy as np
 from PIL import Image, ImageTk
 
 from train_schedule import TrainSchedule
 # --- UBAH IMPORT ---
-from data_models import RouteNode, Region
+from data_models import RouteNode, Region, TRANSFER_MINUTES, SAME_TRAIN_MINUTES, minutes_to_time
 import occupancy_predictor as predictor
+from raptor import RaptorEngine, init_matrix_worker, sweep_origin
+from connection_scan import ConnectionScanEngine
 
 
 class RouteFinder:
@@ -25,9 +31,29 @@ class RouteFinder:
         "jakarta kota": {predictor.Line.BOGOR, predictor.Line.TANJUNG_PRIOK},
     }
 
-    def __init__(self, schedule: TrainSchedule):
+    # Mesin pencarian yang tersedia: "dijkstra" (antrean prioritas), "raptor" (berbasis
+    # ronde) atau "csa" (Connection Scan, satu jawaban tercepat)
+    ENGINES = ("dijkstra", "raptor", "csa")
+    # Rute alternatif boleh lebih lama paling banyak sekian menit dari rute tercepat
+    RESULT_TOLERANCE_MINUTES = 30
+    # Pencarian Pareto hanya mempertimbangkan perjalanan yang tiba paling lambat
+    # sekian menit setelah perjalanan tercepat
+    PARETO_SLACK_MINUTES = 60
+
+    def __init__(self, schedule: TrainSchedule, engine: str = "dijkstra", defer_occupancy: bool = False, occupancy_cube=None):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Mesin pencarian tidak dikenal: {engine!r}. Pilihan: {', '.join(self.ENGINES)}")
         self.schedule = schedule
+        self.engine = engine
+        # True: pencarian Dijkstra berjalan tanpa predictor, okupansi baru dihitung
+        # untuk leg hasil akhir (dengan waktu node yang sama, jadi hasilnya identik)
+        self.defer_occupancy = defer_occupancy
+        # OccupancyCube hasil job offline (occupancy_cube.py); None = selalu pakai predictor
+        self.occupancy_cube = occupancy_cube
         self.max_result_count = 3  # Menaikkan agar bisa menampilkan beberapa alternatif
+        # Struktur rute RAPTOR dibangun sekali per jadwal dan dipakai ulang setiap query
+        self.raptor = RaptorEngine(schedule) if engine == "raptor" else None
+        self.csa = ConnectionScanEngine(schedule) if engine == "csa" else None
 
     @staticmethod
     def show_map_image(image_path: str):
@@ -54,158 +80,469 @@ class RouteFinder:
         """
         if not all([start_station, dest_station, start_time, region]):
             return []
+        # Pencarian bekerja dengan ID stasiun dari StationRegistry
+        start_id = self.schedule.stations.get(start_station)
+        dest_id = self.schedule.stations.get(dest_station)
+        if start_id is None or dest_id is None:
+            return []
 
-        queue = [(start_time, RouteNode(start_station, start_time, [], 0))]
-        visited = {(start_station, 0): start_time}
-        results = []
+        # Pencarian memakai menit integer relatif terhadap tengah malam tanggal keberangkatan
+        base_date = start_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        start_minute = start_time.hour * 60 + start_time.minute
         max_transits = 2 if region == Region.JABODETABEK else 1
-
-        occupancy_cache = {}  # Tambahkan cache prediksi okupansi
+        if self.engine == "raptor":
+            return self._find_routes_raptor(start_id, dest_id, start_minute, base_date, region, max_transits)
+        if self.engine == "csa":
+            journey = self.csa.find_journey(start_id, dest_id, start_minute, region, max_transits)
+            return [self._journey_to_route(journey, base_date, start_minute)] if journey else []
+
+        # Batas bawah waktu tempuh ke tujuan (A*): antrean diurutkan menurut
+        # waktu tiba + batas bawah, dan label yang pasti kalah dari hasil terbaik
+        # (ditambah toleransi alternatif) atau tidak bisa mencapai tujuan dibuang.
+        lower_bound = self.schedule.lower_bounds_to(dest_id, region)
+        if lower_bound[start_id] == math.inf:
+            return []
+        queue = [(start_minute + lower_bound[start_id], RouteNode(start_id, start_minute))]
+        visited = {(start_id, 0): start_minute}
+        results = []
 
         while queue and len(results) < self.max_result_count:
-            __, node = heapq.heappop(queue)
-            trains_at_station = self.schedule.get_trains_for_station(node.station, region)
-            for train in trains_at_station:
-                try:
-                    current_idx = train.route.index(node.station)
-                except ValueError:
-                    continue
-
-                # --- Cek cache sebelum memanggil predictor.predict ---
-                cache_key = (train.train_id, node.time)
-                if cache_key in occupancy_cache:
-                    predicted_occupancies = occupancy_cache[cache_key]
-                else:
-                    predicted_occupancies = predictor.predict(train, node.time, log_model=False)
-                    occupancy_cache[cache_key] = predicted_occupancies
-                # ----------------------------------------------------
+            estimate, node = heapq.heappop(queue)
+            bound = self._arrival_bound(results)
+            if estimate > bound:
+                break
+            node_dt = None if self.defer_occupancy else base_date + datetime.timedelta(minutes=node.time)
+            remaining = lower_bound[node.station]
+            # Indeks keberangkatan sudah difilter per wilayah dan terurut menurut waktu
+            departures = self.schedule.departures_after(node.station, region, node.time)
+            for dep_time, train, current_idx in departures:
+                if dep_time + remaining > bound:
+                    break  # Keberangkatan berikutnya lebih lambat lagi
+                # Prediksi di-cache bersama per (pola rute, periode) di occupancy_predictor;
+                # None berarti ditunda sampai hasil akhir diketahui
+                predicted_occupancies = None if node_dt is None else self._predict_occupancies(train, node_dt)
 
                 self._process_train_legs(
-                    train, current_idx, node, dest_station, max_transits,
-                    visited, queue, results, predicted_occupancies
+                    train, current_idx, node, dest_id, max_transits,
+                    visited, queue, results, predicted_occupancies, base_date, dep_time, lower_bound
                 )
+                bound = self._arrival_bound(results)
 
                 if len(results) >= self.max_result_count:
                     break
+        # Dict leg hanya dibangun untuk perjalanan yang benar-benar dikembalikan
+        deferred = self._predict_deferred_legs(results, base_date) if self.defer_occupancy else None
+        results = [self._materialize_route(label, base_date, deferred) for label in results]
         results = self._sort_and_filter_results(results)
         return results[:self.max_result_count]
 
-    def _process_trains(self, trains_at_station, node, dest_station, max_transits, visited, queue, results):
-        for train in trains_at_station:
-            try:
-                current_idx = train.route.index(node.station)
-            except ValueError:
-                continue
+    def find_routes_profile(
+        self,
+        start_station: str,
+        dest_station: str,
+        window_start: datetime.datetime,
+        window_end: datetime.datetime,
+        region: Region
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Menemukan semua pilihan rute untuk keberangkatan antara window_start dan
+        window_end dalam satu penelusuran rRAPTOR. Hanya perjalanan yang tidak kalah
+        dari perjalanan lain dalam (berangkat lebih lambat, tiba lebih awal, transit
+        lebih sedikit) yang dikembalikan, terurut menurut waktu berangkat.
+        """
+        if not all([start_station, dest_station, window_start, window_end, region]):
+            return []
+        start_id = self.schedule.stations.get(start_station)
+        dest_id = self.schedule.stations.get(dest_station)
+        if start_id is None or dest_id is None or start_id == dest_id or window_end < window_start:
+            return []
+        if self.raptor is None:
+            self.raptor = RaptorEngine(self.schedule)
 
-            predicted_occupancies = predictor.predict(train, node.time)
-            self._process_train_legs(train, current_idx, node, dest_station, max_transits, visited, queue, results, predicted_occupancies)
+        base_date = window_start.replace(hour=0, minute=0, second=0, microsecond=0)
+        t_start = window_start.hour * 60 + window_start.minute
+        t_end = int((window_end - base_date).total_seconds() // 60)
+        max_transits = 2 if region == Region.JABODETABEK else 1
+        journeys = self.raptor.profile(start_id, dest_id, t_start, t_end, region, max_transits)
+        return [self._journey_to_route(journey, base_date) for journey in journeys]
 
-            if len(results) >= self.max_result_count:
+    def travel_time_matrix(
+        self,
+        origins: Optional[List[str]],
+        destinations: Optional[List[str]],
+        departure_times: List[datetime.datetime],
+        region: Region,
+        processes: Optional[int] = None
+    ):
+        """
+        Matriks waktu tempuh dan jumlah transit banyak-ke-banyak. Setiap asal dan
+        waktu berangkat dihitung dengan satu query RAPTOR satu-ke-semua, bukan
+        satu find_routes per pasangan. origins/destinations None berarti semua
+        stasiun di wilayah tersebut. Dengan processes > 1, asal dibagi ke process
+        pool yang setiap pekerjanya membangun mesin RAPTOR sekali dari jadwal ini.
+        Mengembalikan (travel_minutes, transfers), array int32 berbentuk
+        (len(departure_times), len(origins), len(destinations)); waktu tempuh
+        dihitung dari waktu berangkat yang diminta (termasuk menunggu kereta
+        pertama) dan -1 berarti tidak terjangkau.
+        """
+        if origins is None:
+            origins = self.schedule.get_available_stations_by_region(region)
+        if destinations is None:
+            destinations = self.schedule.get_available_stations_by_region(region)
+        origin_ids = [self.schedule.stations[name] for name in origins]
+        dest_ids = np.array([self.schedule.stations[name] for name in destinations], dtype=np.int64)
+        start_minutes = [t.hour * 60 + t.minute for t in departure_times]
+        max_rounds = (2 if region == Region.JABODETABEK else 1) + 1
+
+        shape = (len(start_minutes), len(origin_ids), len(dest_ids))
+        travel_minutes = np.full(shape, -1, dtype=np.int32)
+        transfers = np.full(shape, -1, dtype=np.int32)
+        tasks = [(row, origin, start_minutes, region, max_rounds) for row, origin in enumerate(origin_ids)]
+        if processes is not None and processes > 1:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=processes, initializer=init_matrix_worker, initargs=(self.schedule,)
+            ) as pool:
+                sweeps = list(pool.map(sweep_origin, tasks, chunksize=max(1, len(tasks) // (processes * 4))))
+        else:
+            if self.raptor is None:
+                self.raptor = RaptorEngine(self.schedule)
+            sweeps = [sweep_origin(task, self.raptor) for task in tasks]
+
+        for row, arrivals, transfer_counts in sweeps:
+            for t, start_minute in enumerate(start_minutes):
+                arrival = np.array(arrivals[t])[dest_ids]
+                reachable = np.isfinite(arrival)
+                travel_minutes[t, row, reachable] = arrival[reachable] - start_minute
+                transfers[t, row] = np.array(transfer_counts[t], dtype=np.int32)[dest_ids]
+        return travel_minutes, transfers
+
+    def reachable_within(
+        self,
+        start_station: str,
+        start_time: datetime.datetime,
+        budget_minutes: int,
+        region: Region,
+        max_transits: Optional[int] = None
+    ) -> Dict[str, tuple]:
+        """
+        Isokron: semua stasiun yang bisa dicapai dalam budget_minutes sejak
+        start_time, sebagai {nama stasiun: (waktu tiba paling awal, jumlah transit)}.
+        Dihitung dengan satu query RAPTOR satu-ke-semua yang membuang label setelah
+        batas waktu, jadi penelusuran berhenti begitu horizon terlewati.
+        max_transits None memakai batas wilayah yang sama dengan find_routes.
+        """
+        start_id = self.schedule.stations.get(start_station) if start_station else None
+        if start_id is None or start_time is None or not region or budget_minutes < 0:
+            return {}
+        if max_transits is None:
+            max_transits = 2 if region == Region.JABODETABEK else 1
+        if self.raptor is None:
+            self.raptor = RaptorEngine(self.schedule)
+
+        base_date = start_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        start_minute = start_time.hour * 60 + start_time.minute
+        arrivals, transfers = self.raptor.earliest_arrivals(
+            start_id, start_minute, region, max_transits + 1, horizon=start_minute + budget_minutes
+        )
+        return {
+            self.schedule.stations.name_of(station_id): (base_date + datetime.timedelta(minutes=arrival), transfers[station_id])
+            for station_id, arrival in enumerate(arrivals)
+            if arrival != math.inf
+        }
+
+    def find_routes_pareto(
+        self,
+        start_station: str,
+        dest_station: str,
+        start_time: datetime.datetime,
+        region: Region
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Pencarian multi-kriteria: semua perjalanan yang tidak kalah dari perjalanan
+        lain dalam (waktu tiba, jumlah transit, tarif, okupansi maksimum), selama
+        tiba paling lambat PARETO_SLACK_MINUTES setelah perjalanan tercepat.
+        Tarif memakai model yang sama dengan TrainSchedule.journey_fare (tap-in di
+        stasiun awal, tap-out di stasiun label), jadi tarif yang ditimbang sama
+        dengan tarif yang ditampilkan untuk rute tersebut.
+        Setiap stasiun menyimpan bag label yang sudah final; label yang didominasi
+        bag stasiunnya atau bag tujuan (dengan batas bawah A*) langsung dibuang.
+        """
+        if not all([start_station, dest_station, start_time, region]):
+            return []
+        start_id = self.schedule.stations.get(start_station)
+        dest_id = self.schedule.stations.get(dest_station)
+        if start_id is None or dest_id is None or start_id == dest_id:
+            return []
+
+        base_date = start_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        start_minute = start_time.hour * 60 + start_time.minute
+        max_transits = 2 if region == Region.JABODETABEK else 1
+        lower_bound = self.schedule.lower_bounds_to(dest_id, region)
+        if lower_bound[start_id] == math.inf:
+            return []
+        # Tarif dari stasiun awal ke setiap stasiun (baris matriks tarif wilayah)
+        fares = self.schedule.fare_matrices[region][start_id].tolist()
+
+        bags = collections.defaultdict(list)  # ID stasiun -> kriteria label yang sudah final
+        tie_breaker = itertools.count()
+        queue = [(start_minute + lower_bound[start_id], next(tie_breaker), RouteNode(start_id, start_minute))]
+        bound = math.inf
+        results = []
+
+        while queue:
+            estimate, __, label = heapq.heappop(queue)
+            if estimate > bound:
                 break
-        
+            criteria = (label.time, label.transit, label.fare, label.max_occupancy)
+            if self._is_dominated(criteria, bags[label.station]):
+                continue
+            bags[label.station].append(criteria)
+            if label.station == dest_id:
+                results.append(label)
+                if bound == math.inf:
+                    bound = label.time + self.PARETO_SLACK_MINUTES
+                continue
+            if label.leg is not None and label.transit >= max_transits:
+                continue
+
+            ready = label.time + (TRANSFER_MINUTES if label.leg is not None else 0)
+            ready_dt = base_date + datetime.timedelta(minutes=ready)
+            remaining = lower_bound[label.station]
+            for dep_time, train, board_idx in self.schedule.departures_after(label.station, region, ready):
+                if dep_time + remaining > bound:
+                    break
+                if label.leg is not None and label.leg[0] is train:
+                    continue  # Tetap di kereta yang sama sudah direlaksasi dari stasiun naik
+                predicted_occupancies = self._predict_occupancies(train, ready_dt)
+                self._relax_pareto_legs(
+                    train, board_idx, dep_time, label, fares, lower_bound, bound,
+                    bags, dest_id, queue, tie_breaker, predicted_occupancies
+                )
 
-    def _process_train_legs(self, train, current_idx, node, dest_station, max_transits, visited, queue, results, predicted_occupancies):
-        for i in range(current_idx + 1, len(train.route)):
-            if self._should_skip_leg(train, node, i):
+        return self._pareto_results(results, base_date)
+
+    def _relax_pareto_legs(self, train, board_idx, dep_time, label, fares, lower_bound, bound, bags, dest_id, queue, tie_breaker, predicted_occupancies):
+        minutes = train.minutes.tolist()
+        dep_minute = minutes[board_idx]
+        route = train.route
+        station_ids = train.station_ids
+        transit = label.transit + 1 if label.leg is not None else label.transit
+        occupancy = label.max_occupancy
+        dest_bag = bags[dest_id]
+        for i in range(board_idx + 1, len(station_ids)):
+            # Okupansi maksimum sepanjang segmen yang sudah dilalui
+            occupancy = max(occupancy, predicted_occupancies.get(route[i - 1], 0))
+            arr_minute = minutes[i]
+            if arr_minute < 0:
+                continue
+            arr_time = dep_time + (arr_minute - dep_minute)
+            if arr_time <= dep_time:
+                continue
+            next_station = station_ids[i]
+            estimate = arr_time + lower_bound[next_station]
+            if estimate > bound:
                 continue
+            fare = fares[next_station]
+            if self._is_dominated((arr_time, transit, fare, occupancy), bags[next_station]):
+                continue
+            # Waktu, transit dan okupansi tidak pernah turun sepanjang perjalanan, dan
+            # tarif di tujuan selalu tarif asal-tujuan yang sama untuk semua label,
+            # jadi label yang batas bawahnya sudah kalah dari hasil di tujuan bisa dibuang
+            if self._is_dominated((estimate, transit, fare, occupancy), dest_bag):
+                continue
+            leg = (train, board_idx, i, dep_time, arr_time, predicted_occupancies)
+            node = RouteNode(next_station, arr_time, label, leg, transit, fare, occupancy)
+            heapq.heappush(queue, (estimate, next(tie_breaker), node))
+
+    @staticmethod
+    def _is_dominated(criteria, bag):
+        """True jika ada label di bag yang tidak lebih buruk di semua kriteria."""
+        arrival, transit, fare, occupancy = criteria
+        for other_arrival, other_transit, other_fare, other_occupancy in bag:
+            if (other_arrival <= arrival and other_transit <= transit
+                    and other_fare <= fare and other_occupancy <= occupancy):
+                return True
+        return False
 
-            next_station = train.route[i]
-            dep_time_str = train.departure_times.get(node.station)
-            arr_time_str = train.departure_times.get(next_station)
-            dep_time, arr_time = self._get_departure_arrival_times(node.time, dep_time_str, arr_time_str)
+    def _pareto_results(self, results, base_date):
+        """Menyaring ulang hasil akhir menurut keempat kriteria lalu membangun dict leg."""
+        scored = [((label.time, label.transit, label.fare, label.max_occupancy), label) for label in results]
+        pareto = []
+        seen = set()
+        for criteria, label in scored:
+            # Kriteria identik cukup diwakili satu perjalanan
+            if criteria in seen:
+                continue
+            if not any(other != criteria and self._is_dominated(criteria, [other]) for other, __ in scored):
+                seen.add(criteria)
+                pareto.append(label)
+        pareto.sort(key=lambda label: (label.time, label.transit, label.max_occupancy))
+        return [self._materialize_route(label, base_date) for label in pareto]
+
+    def _find_routes_raptor(self, start_id, dest_id, start_minute, base_date, region, max_transits):
+        """
+        Pencarian RAPTOR: setiap ronde menambah satu kereta, sehingga max_transits
+        menjadi max_transits + 1 ronde. Hasilnya perjalanan Pareto-optimal
+        (waktu tiba vs jumlah transit) dalam format leg yang sama dengan Dijkstra.
+        """
+        results = [
+            self._journey_to_route(journey, base_date, start_minute)
+            for journey in self.raptor.find_journeys(start_id, dest_id, start_minute, region, max_transits)
+        ]
+        results = self._sort_and_filter_results(results)
+        return results[:self.max_result_count]
+
+    def _journey_to_route(self, journey, base_date, start_minute=None):
+        """
+        Mengubah leg ringkas (kereta, posisi naik, posisi turun, berangkat, tiba) menjadi dict leg.
+        Okupansi diprediksi pada waktu node naik seperti pencarian Dijkstra: start_minute
+        untuk leg pertama (tanpa start_minute, menit berangkatnya), lalu waktu tiba leg
+        sebelumnya ditambah TRANSFER_MINUTES.
+        """
+        route = []
+        node_time = journey[0][3] if start_minute is None else start_minute
+        for train, board_idx, alight_idx, dep_time, arr_time in journey:
+            node_dt = base_date + datetime.timedelta(minutes=node_time)
+            predicted_occupancies = self._predict_occupancies(train, node_dt)
+            route.append(self._create_leg(train, board_idx, alight_idx, dep_time, arr_time, predicted_occupancies, base_date))
+            node_time = arr_time + TRANSFER_MINUTES
+        return route
+
+    def _process_train_legs(self, train, current_idx, node, dest_station, max_transits, visited, queue, results, predicted_occupancies, base_date, dep_time, lower_bound=None):
+        minutes = train.minutes.tolist()
+        dep_minute = minutes[current_idx]
+        if dep_minute < 0:
+            return
+        station_ids = train.station_ids
+        bound = self._arrival_bound(results)
+        for i in range(current_idx + 1, len(station_ids)):
+            arr_minute = minutes[i]
+            if arr_minute < 0:
+                continue
+
+            next_station = station_ids[i]
+            arr_time = dep_time + (arr_minute - dep_minute)
+            estimate = arr_time
+            if lower_bound is not None:
+                estimate += lower_bound[next_station]
+                if estimate > bound:
+                    continue
             if not self._is_leg_time_and_transit_valid(node, dep_time, arr_time, train, max_transits):
                 continue
 
-            is_different_train = not node.route or train.train_id != node.route[-1]['train_id']
-            next_transit_count = node.transit + 1 if is_different_train and node.route else node.transit
+            is_different_train = node.leg is None or train.train_id != node.leg[0].train_id
+            next_transit_count = node.transit + 1 if is_different_train and node.leg is not None else node.transit
             visit_key = (next_station, next_transit_count)
             if self._should_skip_visit(visit_key, visited, arr_time):
                 continue
 
-            __, new_route_so_far = self._create_leg_and_route(train, node, next_station, dep_time, arr_time, predicted_occupancies)
+            # Leg ringkas + penunjuk parent; dict leg baru dibangun untuk hasil akhir
+            leg = (train, current_idx, i, dep_time, arr_time, predicted_occupancies)
             visited[visit_key] = arr_time
 
-            if self._handle_leg_result(next_station, dest_station, results, new_route_so_far, queue, arr_time, is_different_train, next_transit_count):
+            if self._handle_leg_result(next_station, dest_station, results, node, leg, queue, arr_time, is_different_train, next_transit_count, estimate):
                 break
+            bound = self._arrival_bound(results)
+
+    def _arrival_bound(self, results):
+        """Waktu tiba terakhir yang masih bisa lolos _sort_and_filter_results (inf jika belum ada hasil)."""
+        if not results:
+            return math.inf
+        return min(label.time for label in results) + self.RESULT_TOLERANCE_MINUTES
 
     def _is_leg_time_and_transit_valid(self, node, dep_time, arr_time, train, max_transits):
         if not self._is_time_valid(node.time, dep_time, arr_time):
             return False
-        is_different_train = not node.route or train.train_id != node.route[-1]['train_id']
-        next_transit_count = node.transit + 1 if is_different_train and node.route else node.transit
+        is_different_train = node.leg is None or train.train_id != node.leg[0].train_id
+        next_transit_count = node.transit + 1 if is_different_train and node.leg is not None else node.transit
         if next_transit_count > max_transits:
             return False
         return True
 
-    def _handle_leg_result(self, next_station, dest_station, results, new_route_so_far, queue, arr_time, is_different_train, next_transit_count):
+    def _handle_leg_result(self, next_station, dest_station, results, node, leg, queue, arr_time, is_different_train, next_transit_count, priority=None):
         if next_station == dest_station:
-            results.append(new_route_so_far)
+            results.append(RouteNode(next_station, arr_time, node, leg, next_transit_count))
             if len(results) >= self.max_result_count:
                 return True
         else:
-            self._enqueue_next_node(next_station, arr_time, is_different_train, new_route_so_far, next_transit_count, queue)
-        return False
-
-    def _should_skip_leg(self, train, node, i):
-        next_station = train.route[i]
-        dep_time_str = train.departure_times.get(node.station)
-        arr_time_str = train.departure_times.get(next_station)
-        if not dep_time_str or not arr_time_str:
-            return True
+            self._enqueue_next_node(next_station, arr_time, is_different_train, node, leg, next_transit_count, queue, priority)
         return False
 
     def _should_skip_visit(self, visit_key, visited, arr_time):
         return visit_key in visited and visited[visit_key] <= arr_time
 
-    def _create_leg_and_route(self, train, node, next_station, dep_time, arr_time, predicted_occupancies):
-        leg = self._create_leg(train, node, next_station, dep_time, arr_time, predicted_occupancies)
-        new_route_so_far = node.route + [leg]
-        return leg, new_route_so_far
-
-    def _handle_destination(self, next_station, dest_station, results, new_route_so_far):
-        if next_station == dest_station:
-            results.append(new_route_so_far)
-            return True
-        return False
-
-    def _get_departure_arrival_times(self, node_time, dep_time_str, arr_time_str):
-        dep_h, dep_m = map(int, dep_time_str.split(':'))
-        arr_h, arr_m = map(int, arr_time_str.split(':'))
-        dep_time = node_time.replace(hour=dep_h, minute=dep_m, second=0, microsecond=0)
-        if dep_time < node_time:
-            dep_time += datetime.timedelta(days=1)
-        arr_time = dep_time.replace(hour=arr_h, minute=arr_m)
-        if arr_time < dep_time:
-            arr_time += datetime.timedelta(days=1)
-        return dep_time, arr_time
+    def _materialize_route(self, label, base_date, deferred=None):
+        """
+        Mengubah label akhir (rantai parent) menjadi daftar dict leg. Leg dengan
+        okupansi tertunda diambil dari `deferred`, dengan kunci (kereta, waktu node naik).
+        """
+        route = []
+        node = label
+        while node.leg is not None:
+            train, board_idx, alight_idx, dep_time, arr_time, predicted_occupancies = node.leg
+            if predicted_occupancies is None:
+                predicted_occupancies = deferred[(train.train_id, node.parent.time)]
+            route.append(self._create_leg(train, board_idx, alight_idx, dep_time, arr_time, predicted_occupancies, base_date))
+            node = node.parent
+        route.reverse()
+        return route
+
+    def _predict_occupancies(self, train, when):
+        """Okupansi dari kubus offline jika tersedia, selain itu dihitung predictor."""
+        if self.occupancy_cube is not None:
+            occupancies = self.occupancy_cube.occupancies(train, when)
+            if occupancies is not None:
+                return occupancies
+        return predictor.predict(train, when, log_model=False)
+
+    def _predict_deferred_legs(self, labels, base_date):
+        """
+        Satu batch prediksi okupansi untuk leg hasil akhir saja, tanpa duplikat.
+        Waktu prediksi adalah waktu node tempat kereta dinaiki, sama seperti
+        pencarian yang memanggil predictor langsung.
+        """
+        requests = {}
+        for label in labels:
+            node = label
+            while node.leg is not None:
+                train = node.leg[0]
+                requests.setdefault((train.train_id, node.parent.time), train)
+                node = node.parent
+        return {
+            (train_id, node_time): self._predict_occupancies(train, base_date + datetime.timedelta(minutes=node_time))
+            for (train_id, node_time), train in requests.items()
+        }
 
     def _is_time_valid(self, node_time, dep_time, arr_time):
         return dep_time > node_time and arr_time > dep_time
 
-    def _create_leg(self, train, node, next_station, dep_time, arr_time, predicted_occupancies):
+    def _create_leg(self, train, board_idx, alight_idx, dep_time, arr_time, predicted_occupancies, base_date):
+        start_station = train.route[board_idx]
         return {
-            "train_id": train.train_id, "train_name": train.name,
-            "start_station": node.station, "destination_station": next_station,
-            "departure_time": dep_time.strftime("%H:%M"),
-            "estimated_arrival": arr_time.strftime("%H:%M"),
-            "_departure_dt": dep_time, "_arrival_dt": arr_time,
-            "occupancy_percentage": predicted_occupancies.get(node.station, -1)
+            "train_id": train.train_id, "train_name": train.name, "region": train.region,
+            "start_station": start_station, "destination_station": train.route[alight_idx],
+            "departure_time": minutes_to_time(dep_time),
+            "estimated_arrival": minutes_to_time(arr_time),
+            "_departure_dt": base_date + datetime.timedelta(minutes=dep_time),
+            "_arrival_dt": base_date + datetime.timedelta(minutes=arr_time),
+            "occupancy_percentage": predicted_occupancies.get(start_station, -1)
         }
 
-    def _enqueue_next_node(self, next_station, arr_time, is_different_train, new_route_so_far, next_transit_count, queue):
-        transit_wait_minutes = 15 if is_different_train else 2
-        next_node_time = arr_time + datetime.timedelta(minutes=transit_wait_minutes)
+    def _enqueue_next_node(self, next_station, arr_time, is_different_train, parent, leg, next_transit_count, queue, priority=None):
+        transit_wait_minutes = TRANSFER_MINUTES if is_different_train else SAME_TRAIN_MINUTES
+        next_node_time = arr_time + transit_wait_minutes
         if next_node_time <= arr_time:
             return
-        new_node = RouteNode(next_station, next_node_time, new_route_so_far, next_transit_count)
-        heapq.heappush(queue, (arr_time, new_node))
+        new_node = RouteNode(next_station, next_node_time, parent, leg, next_transit_count)
+        # Prioritas antrean: waktu tiba, ditambah batas bawah sisa perjalanan jika ada (A*)
+        heapq.heappush(queue, (arr_time if priority is None else priority, new_node))
 
     def _sort_and_filter_results(self, results):
         results.sort(key=lambda r: (r[-1]['_arrival_dt'], len(r)))
         if not results:
             return results
         min_duration = (results[0][-1]['_arrival_dt'] - results[0][0]['_departure_dt']).total_seconds()
-        max_tolerated = min_duration + 30 * 60
+        max_tolerated = min_duration + self.RESULT_TOLERANCE_MINUTES * 60
         filtered = []
         for r in results:
             dur = (r[-1]['_arrival_dt'] - r[0]['_departure_dt']).total_seconds()
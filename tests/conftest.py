@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# Modul aplikasi ada di akar repo, bukan di dalam paket
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from train_schedule import TrainSchedule  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def csv_file():
+    return os.path.join(ROOT, "trainKRL_schedule.csv")
+
+
+@pytest.fixture(scope="session")
+def schedule(csv_file):
+    return TrainSchedule.from_snapshot(csv_file)
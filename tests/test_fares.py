@@ -0,0 +1,45 @@
+import datetime
+
+from data_models import Region
+from route_finder import RouteFinder
+from train_schedule import calculate_fare
+
+# (ID kereta, posisi naik, posisi turun): Jabodetabek di bawah dan di atas 25 km,
+# lin Cikarang dan Tangerang, dan satu wilayah bertarif tetap
+SINGLE_TRAIN_TRIPS = [("1157", 0, 23), ("1157", 3, 15), ("5002", 0, 13), ("1903", 0, 10), ("1614", 0, 18)]
+
+
+def test_fare_matrix_matches_calculate_fare(schedule):
+    trains = {train.train_id: train for train in schedule.trains}
+    for train_id, board, alight in SINGLE_TRAIN_TRIPS:
+        train = trains[train_id]
+        origin, destination = train.station_ids[board], train.station_ids[alight]
+        expected = calculate_fare(train.route[board:alight + 1], train.region)
+        assert schedule.fare_between(origin, destination, train.region) == expected, train_id
+        assert schedule.fare_between(destination, origin, train.region) == expected, train_id
+
+
+def test_fare_between_unknown_region_or_unconnected(schedule):
+    bogor = schedule.stations.get("Bogor")
+    merak = schedule.stations.get("Merak")
+    assert schedule.fare_between(bogor, merak, Region.JABODETABEK) == -1
+    assert schedule.journey_fare([]) == -1
+
+
+def test_journey_fare_for_multi_leg_journey(schedule):
+    finder = RouteFinder(schedule, engine="raptor", defer_occupancy=True)
+    start = datetime.datetime(2025, 6, 2, 9, 0)
+    bogor, bekasi = schedule.stations.get("Bogor"), schedule.stations.get("Bekasi")
+    journeys = finder.raptor.find_journeys(bekasi, bogor, start.hour * 60, Region.JABODETABEK, 2)
+    multi_leg = [legs for legs in journeys if len(legs) > 1]
+    assert multi_leg
+    for legs in multi_leg:
+        # Tap-in di Bekasi, tap-out di Bogor: sama dengan tarif lintasan yang dinaiki
+        ridden = []
+        for train, board, alight, __, __ in legs:
+            ridden.extend(train.route[board:alight + 1] if not ridden else train.route[board + 1:alight + 1])
+        expected = calculate_fare(ridden, Region.JABODETABEK)
+        assert schedule.journey_fare(legs) == expected
+        route = finder._journey_to_route(legs, start.replace(hour=0))
+        assert schedule.journey_fare(route) == expected
+
@@ -0,0 +1,68 @@
+import datetime
+import shutil
+
+import pytest
+
+import occupancy_cube
+import occupancy_predictor as predictor
+from data_models import Train
+from occupancy_cube import OccupancyCube, write_occupancy_cube
+
+MONDAY = datetime.datetime(2025, 6, 2)
+# Awal, tengah (dengan detik) dan akhir slot, di hari kerja dan akhir pekan
+BUCKET_TIMES = [
+    MONDAY + datetime.timedelta(days=day, hours=hour, minutes=minute, seconds=second)
+    for day in (0, 2, 5, 6)
+    for hour, minute, second in ((0, 0, 0), (5, 22, 30), (7, 30, 0), (8, 29, 59), (12, 4, 0), (18, 55, 0), (23, 59, 59))
+]
+
+
+@pytest.fixture(scope="module")
+def cube_file(schedule, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("cube") / "schedule.occupancy")
+    write_occupancy_cube(schedule, path)
+    return path
+
+
+def test_cube_matches_predict(schedule, cube_file):
+    cube = OccupancyCube.open(schedule, cube_file)
+    assert cube is not None
+    compared = 0
+    for train in schedule.trains[::11]:
+        for when in BUCKET_TIMES:
+            occupancies = cube.occupancies(train, when)
+            expected = predictor.predict(train, when, log_model=False)
+            if occupancies is None:
+                # Hanya kereta dengan okupansi di luar 0-254 yang dihitung ulang
+                assert any(not 0 <= value < occupancy_cube.NOT_AVAILABLE for value in expected.values())
+                continue
+            assert dict(occupancies) == dict(expected), (train.train_id, when)
+            compared += 1
+    assert compared > 0
+
+
+def test_cube_rejects_train_outside_schedule(schedule, cube_file):
+    cube = OccupancyCube.open(schedule, cube_file)
+    train = schedule.trains[0]
+    standalone = Train(train.train_id, train.name, list(train.route), region=train.region)
+    assert cube.occupancies(standalone, MONDAY) is None
+
+
+def test_open_returns_none_for_stale_cube(schedule, cube_file, tmp_path, monkeypatch):
+    assert OccupancyCube.open(schedule, str(tmp_path / "missing.occupancy")) is None
+
+    # File aturan berbeda
+    rules_file = tmp_path / "rules.json"
+    shutil.copyfile(predictor.RULES_FILE, rules_file)
+    rules_file.write_text(rules_file.read_text() + "\n")
+    assert OccupancyCube.open(schedule, cube_file, str(rules_file)) is None
+
+    # Sumber predictor berubah setelah kubus ditulis
+    source = tmp_path / "predictor_tables.py"
+    source.write_text("PERIOD = 1\n")
+    monkeypatch.setattr(occupancy_cube, "CUBE_SOURCES", occupancy_cube.CUBE_SOURCES + (str(source),))
+    stale_file = str(tmp_path / "stale.occupancy")
+    write_occupancy_cube(schedule, stale_file)
+    assert OccupancyCube.open(schedule, stale_file) is not None
+    source.write_text("PERIOD = 2\n")
+    assert OccupancyCube.open(schedule, stale_file) is None
@@ -0,0 +1,33 @@
+import datetime
+
+import pytest
+
+pytest.importorskip("mlflow")
+pd = pytest.importorskip("pandas")
+
+import occupancy_predictor as predictor  # noqa: E402
+from occupancy_mlflow import OccupancyPredictorModel, predict_long_format  # noqa: E402
+
+
+def long_format_frame(trains, times):
+    rows = []
+    for train, when in zip(trains, times):
+        for stop_index, station in enumerate(train.route):
+            rows.append({"train_id": train.train_id, "stop_index": stop_index, "station": station, "time": when.isoformat()})
+    # Urutan baris diacak: hasil harus tetap sejajar dengan input
+    return pd.DataFrame(rows).sample(frac=1.0, random_state=0).reset_index(drop=True)
+
+
+def test_long_format_matches_predict(schedule):
+    trains = [train for train in schedule.trains[::9] if len(set(train.route)) == len(train.route)]
+    start = datetime.datetime(2025, 6, 2)
+    times = [start + datetime.timedelta(minutes=97 * i) for i in range(len(trains))]
+    frame = long_format_frame(trains, times)
+
+    result = predict_long_format(frame)
+    by_id = {train.train_id: (train, when) for train, when in zip(trains, times)}
+    for row in result.itertuples():
+        train, when = by_id[row.train_id]
+        assert row.occupancy == predictor.predict(train, when, log_model=False)[row.station], (row.train_id, row.station)
+    # Model MLflow memakai jalur yang sama untuk input format panjang
+    assert OccupancyPredictorModel().predict(None, frame)["occupancy"].tolist() == result["occupancy"].tolist()
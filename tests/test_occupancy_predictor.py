@@ -0,0 +1,170 @@
+import datetime
+
+import pytest
+
+import occupancy_cube
+import occupancy_predictor as predictor
+
+# Senin 2 Juni 2025; hari ke-5 dan ke-6 setelahnya akhir pekan
+MONDAY = datetime.datetime(2025, 6, 2)
+
+
+def sample_times():
+    """Waktu di setiap periode dan transisi, hari kerja dan akhir pekan, termasuk detik."""
+    clock = [(0, 0), (5, 22), (5, 30), (7, 45, 30), (8, 0), (11, 59, 59), (12, 0), (14, 30), (18, 30), (23, 59)]
+    return [
+        MONDAY + datetime.timedelta(days=day, hours=parts[0], minutes=parts[1], seconds=parts[2] if len(parts) > 2 else 0)
+        for day in (0, 3, 5, 6)
+        for parts in clock
+    ]
+
+
+def test_predict_batch_matches_predict(schedule):
+    trains = schedule.trains[::7]
+    for when in sample_times():
+        batch = predictor.predict_batch(trains, when)
+        for row, train in enumerate(trains):
+            values = batch[row].tolist()
+            assert values[len(train.route):] == [predictor.BATCH_PADDING] * (batch.shape[1] - len(train.route))
+            assert dict(zip(train.route, values)) == dict(predictor.predict(train, when, log_model=False)), (train.train_id, when)
+
+
+def test_predict_batch_with_time_per_train(schedule):
+    trains = schedule.trains[:40]
+    times = [sample_times()[i % len(sample_times())] for i in range(len(trains))]
+    batch = predictor.predict_batch(trains, times)
+    for row, (train, when) in enumerate(zip(trains, times)):
+        expected = predictor.predict(train, when, log_model=False)
+        assert dict(zip(train.route, batch[row].tolist())) == dict(expected)
+    with pytest.raises(ValueError):
+        predictor.predict_batch(trains, times[:-1])
+
+
+# Nilai acuan dari rantai if/elif sebelum aturan dipindah ke occupancy_rules.json:
+# (ID kereta, waktu, okupansi per stop). Mencakup kedua arah lin Bogor dan
+# Cikarang, transisi dua periode, akhir pekan, dan fallback segitiga.
+GOLDEN_OCCUPANCY = [
+    # Bogor -> Jakarta Kota, puncak pagi
+    ("1157", "2025-06-02T07:00", [0, 45, 75, 90, 85, 53, -14, -129, -306, -564, -923, -1405, -2036, -2846, -3866,
+                                  -5130, -6674, -8539, -10768, -13405, -16498, -20099, -24260, -29039]),
+    # Bogor -> Jakarta Kota, transisi puncak pagi ke awal siang
+    ("1157", "2025-06-02T08:00", [0, 16, 24, 10, -47, -177, -421, -824, -1446, -2351, -3614, -5319, -7559, -10436,
+                                  -14059, -18549, -24033, -30649, -38543, -47870, -58794, -71488, -86134, -102922]),
+    # Jakarta Kota -> Bogor, puncak sore
+    ("1150F", "2025-06-02T17:00", [0, 48, 82, 105, 118, 125, 127, 126, 123, 120, 117, 114, 114, 114, 116, 118,
+                                   119, 120, 118, 111, 98, 77, 45, 0]),
+    # Manggarai -> Cikarang, akhir pekan
+    ("5002", "2025-06-07T10:00", [25, 35, 46, 57, 68, 79, 90, 80, 71, 62, 52, 43, 34, 25]),
+    # Cikarang -> Manggarai, puncak pagi
+    ("5177", "2025-06-02T07:00", [25, 40, 56, 72, 88, 104, 120, 106, 92, 79, 65, 52, 38, 25]),
+    # Fallback: Bogor -> Jakarta Kota malam hari, dan Tanah Abang -> Rangkasbitung
+    ("1157", "2025-06-02T21:00", [20, 22, 25, 28, 31, 34, 36, 39, 42, 45, 48, 50, 53, 56, 59, 62, 65, 58, 52, 45,
+                                  39, 32, 26, 20]),
+    ("1614", "2025-06-02T17:00", [20, 30, 40, 50, 60, 70, 80, 90, 100, 110, 100, 90, 80, 70, 60, 50, 40, 30, 20]),
+]
+
+
+def test_rule_table_matches_golden_vectors(schedule):
+    trains = {train.train_id: train for train in schedule.trains}
+    for train_id, when, expected in GOLDEN_OCCUPANCY:
+        train = trains[train_id]
+        occupancy = predictor.predict(train, datetime.datetime.fromisoformat(when), log_model=False)
+        assert [occupancy[station] for station in train.route] == expected, (train_id, when)
+        # Arah yang diklasifikasi ulang dari nama stasiun memberi aturan yang sama
+        assert predictor.occupancy_vector(train.route, predictor.active_periods(
+            datetime.datetime.fromisoformat(when))).tolist() == expected
+
+
+def test_fallback_cases_have_no_matching_rule(schedule):
+    trains = {train.train_id: train for train in schedule.trains}
+    for train_id, when in (("1157", "2025-06-02T21:00"), ("1614", "2025-06-02T17:00")):
+        periods = predictor.active_periods(datetime.datetime.fromisoformat(when))
+        assert predictor._select_rule(trains[train_id].pattern.direction, periods) is None
+
+
+def test_period_table_matches_exact_periods_for_every_minute():
+    for minute in range(predictor.MINUTES_PER_WEEK):
+        when = MONDAY + datetime.timedelta(minutes=minute)
+        table = predictor.get_adjacent_periods(when)
+        exact = predictor._adjacent_periods_exact(when)
+        assert [period for period, __ in table] == [period for period, __ in exact], when
+        assert [weight for __, weight in table] == pytest.approx([weight for __, weight in exact]), when
+        assert predictor.active_periods(when) == tuple(period for period, __ in exact)
+
+
+@pytest.mark.parametrize("clock, expected", [
+    ("05:19", [("MALAM", 1.0)]),
+    ("05:20", [("MALAM", 10 / 60), ("PUNCAK_PAGI", 50 / 60)]),
+    ("05:30", [("PUNCAK_PAGI", 1.0)]),
+    ("08:29", [("PUNCAK_PAGI", 1 / 60), ("AWAL_SIANG", 59 / 60)]),
+    ("08:30", [("AWAL_SIANG", 1.0)]),
+    ("11:59", [("AWAL_SIANG", 1 / 60), ("MAKAN_SIANG", 59 / 60)]),
+    ("12:00", [("MAKAN_SIANG", 1.0)]),
+    ("18:59", [("PUNCAK_SORE", 1 / 60), ("MALAM", 59 / 60)]),
+    ("19:00", [("MALAM", 1.0)]),
+])
+def test_period_boundaries_on_weekday(clock, expected):
+    hour, minute = map(int, clock.split(":"))
+    when = MONDAY.replace(hour=hour, minute=minute)
+    periods = predictor.get_adjacent_periods(when)
+    assert [period.name for period, __ in periods] == [name for name, __ in expected]
+    assert [weight for __, weight in periods] == pytest.approx([weight for __, weight in expected])
+
+
+def test_sub_minute_times_use_the_same_active_periods():
+    for clock in ("05:19", "05:29", "08:29", "11:59", "15:29", "18:59", "23:59"):
+        hour, minute = map(int, clock.split(":"))
+        for second, microsecond in ((0, 1), (30, 0), (59, 999999)):
+            when = MONDAY.replace(hour=hour, minute=minute, second=second, microsecond=microsecond)
+            exact = predictor._adjacent_periods_exact(when)
+            assert predictor.get_adjacent_periods(when) == exact
+            assert predictor.active_periods(when) == tuple(period for period, __ in exact), when
+
+
+def test_weekend_and_week_wrap():
+    friday_night = MONDAY + datetime.timedelta(days=4, hours=23, minutes=59)
+    saturday = friday_night + datetime.timedelta(minutes=1)
+    sunday_night = MONDAY + datetime.timedelta(days=6, hours=23, minutes=59)
+    next_monday = sunday_night + datetime.timedelta(minutes=1)
+    weekend = (predictor.TimePeriod.AKHIR_PEKAN,)
+    assert predictor.active_periods(friday_night) == (predictor.TimePeriod.MALAM,)
+    assert predictor.active_periods(saturday) == weekend
+    assert predictor.active_periods(sunday_night) == weekend
+    assert predictor.active_periods(next_monday) == (predictor.TimePeriod.MALAM,)
+    assert predictor.minute_of_week(next_monday) == 0
+
+    # Menit sejak Senin 00:00 dibungkus per minggu, termasuk untuk array
+    ids, weights = predictor.period_weights([7 * 60, predictor.MINUTES_PER_WEEK + 7 * 60])
+    assert ids[0].tolist() == ids[1].tolist() and weights[0].tolist() == weights[1].tolist()
+    by_time = predictor.period_weights(MONDAY + datetime.timedelta(days=7, hours=7))
+    assert by_time[0].tolist() == ids[0].tolist()
+
+
+def test_period_changes_fall_on_cube_buckets():
+    # Kubus okupansi menganggap periode aktif tetap sepanjang satu slot
+    bucket_minutes = occupancy_cube.BUCKET_MINUTES
+    ids = predictor.PERIOD_IDS
+    changes = [minute for minute in range(1, len(ids)) if ids[minute].tolist() != ids[minute - 1].tolist()]
+    assert changes
+    assert all(minute % bucket_minutes == 0 for minute in changes)
+
+
+def test_predict_stop_occupancy_matches_predict(schedule):
+    trains = [train for train in schedule.trains[::5] if len(set(train.route)) == len(train.route)]
+    routes = [tuple(train.route) for train in trains]
+    route_index, minutes, positions, expected = [], [], [], []
+    for r, train in enumerate(trains):
+        when = sample_times()[r % len(sample_times())]
+        occupancy = predictor.predict(train, when, log_model=False)
+        for position, station in enumerate(train.route):
+            route_index.append(r)
+            minutes.append(predictor.minute_of_week(when))
+            positions.append(position)
+            expected.append(occupancy[station])
+    # Posisi di luar rute diisi BATCH_PADDING
+    route_index.append(0)
+    minutes.append(0)
+    positions.append(len(routes[0]) + 50)
+    expected.append(predictor.BATCH_PADDING)
+    result = predictor.predict_stop_occupancy(routes, route_index, minutes, positions)
+    assert result.tolist() == expected
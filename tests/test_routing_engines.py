@@ -0,0 +1,244 @@
+import datetime
+import math
+import random
+
+import pytest
+
+from data_models import Region, MINUTES_PER_DAY, TRANSFER_MINUTES
+from raptor import RaptorRoute
+from route_finder import RouteFinder
+
+BASE_DATE = datetime.datetime(2025, 6, 2)
+# Perjalanan tepat setelah tengah malam hanya bisa memakai kereta hari sebelumnya
+MIDNIGHT_QUERIES = [
+    ("Universitas Indonesia", "Pondok Cina", 26),
+    ("Sudirman", "Pondok Rajeg", 7),
+    ("BNI City", "Citayam", 6),
+    ("Jayakarta", "Kranji", 3),
+]
+
+
+def sample_queries(schedule, count_per_region, seed=7):
+    """Query tetap (asal, tujuan, menit berangkat, wilayah), separuhnya dekat tengah malam."""
+    rng = random.Random(seed)
+    queries = []
+    for region in Region:
+        names = schedule.get_available_stations_by_region(region)
+        for i in range(count_per_region):
+            origin, dest = rng.sample(names, 2)
+            minute = rng.randrange(30) if i % 2 else rng.randrange(MINUTES_PER_DAY)
+            queries.append((origin, dest, minute, region))
+    return queries
+
+
+def earliest_arrival(routes):
+    return min((route[-1]["_arrival_dt"] for route in routes), default=None)
+
+
+@pytest.fixture(scope="module")
+def finders(schedule):
+    return {engine: RouteFinder(schedule, engine=engine, defer_occupancy=True) for engine in RouteFinder.ENGINES}
+
+
+def test_earliest_trip_boards_previous_day_train():
+    # Trip kedua berangkat 23:50 dan sampai di stop berikutnya 00:30 keesokan harinya
+    route = RaptorRoute((0, 1), [(None, (0, 1), [600, 640]), (None, (0, 1), [1430, 1470])])
+    assert route.earliest_trip(1, 10) == (1, -MINUTES_PER_DAY)
+    assert route.earliest_trip(1, 40) == (0, 0)
+    assert route.earliest_trip(0, 1430) == (0, MINUTES_PER_DAY)
+
+
+def test_engines_agree_after_midnight(finders):
+    for origin, dest, minute in MIDNIGHT_QUERIES:
+        start = BASE_DATE + datetime.timedelta(minutes=minute)
+        arrivals = {
+            engine: earliest_arrival(finder.find_routes(origin, dest, start, Region.JABODETABEK))
+            for engine, finder in finders.items()
+        }
+        assert arrivals["raptor"] is not None
+        assert arrivals["raptor"] == arrivals["csa"] == arrivals["dijkstra"], (origin, dest, minute)
+
+
+def test_engines_agree_on_sampled_queries(schedule, finders):
+    for origin, dest, minute, region in sample_queries(schedule, 20):
+        start = BASE_DATE + datetime.timedelta(minutes=minute)
+        arrivals = {
+            engine: earliest_arrival(finder.find_routes(origin, dest, start, region))
+            for engine, finder in finders.items()
+        }
+        assert arrivals["raptor"] == arrivals["csa"] == arrivals["dijkstra"], (origin, dest, minute, region)
+
+
+def profile_oracle(schedule, origin, dest, t_start, t_end, region, max_transits):
+    """
+    Profil hasil enumerasi langsung: untuk setiap menit berangkat dari origin di
+    dalam jendela, waktu tiba paling awal per jumlah kereta (naik di ronde
+    pertama tepat pada menit itu), lalu disaring menjadi himpunan Pareto
+    (berangkat, tiba, jumlah kereta).
+    """
+    options = []
+    departures = {dep for dep, __, __ in schedule.departures_after(origin, region, t_start - 1) if dep <= t_end}
+    for departure in sorted(departures):
+        labels = {origin: departure - 1}
+        best = math.inf
+        for k in range(1, max_transits + 2):
+            reached = {}
+            for station, time in labels.items():
+                ready = time if k == 1 else time + TRANSFER_MINUTES
+                for dep, train, pos in schedule.departures_after(station, region, ready):
+                    if dep >= best:
+                        break
+                    if k == 1 and dep != departure:
+                        continue
+                    positions = train.timed_positions()
+                    if pos not in positions:
+                        continue
+                    offset = dep - int(train.minutes[pos])
+                    for later in positions[positions.index(pos) + 1:]:
+                        stop, arrival = train.station_ids[later], int(train.minutes[later]) + offset
+                        if arrival < reached.get(stop, math.inf):
+                            reached[stop] = arrival
+            if reached.get(dest, math.inf) < best:
+                best = reached[dest]
+                options.append((departure, best, k))
+            labels = {station: time for station, time in reached.items() if time < best}
+    return {
+        option for option in options
+        if not any(other != option and other[0] >= option[0] and other[1] <= option[1] and other[2] <= option[2]
+                   for other in options)
+    }
+
+
+def journey_key(legs):
+    return legs[0][3], legs[-1][4], len(legs)
+
+
+# (asal, tujuan, awal jendela, akhir jendela, wilayah); yang pertama berakhir
+# tepat sebelum kereta langsung tercepat, yang kedua mulai tepat setelah tengah malam
+PROFILE_WINDOWS = [
+    ("Daru", "Serpong", 1002, 1118, Region.RANGKASBITUNG_MERAK),
+    ("Universitas Indonesia", "Pondok Cina", 0, 60, Region.JABODETABEK),
+]
+
+
+def profile_windows(schedule, count, seed=3):
+    windows = list(PROFILE_WINDOWS)
+    rng = random.Random(seed)
+    for i in range(count):
+        region = rng.choice(list(Region))
+        origin, dest = rng.sample(schedule.get_available_stations_by_region(region), 2)
+        t_start = rng.randrange(20) if i % 2 else rng.randrange(MINUTES_PER_DAY)
+        windows.append((origin, dest, t_start, t_start + rng.randrange(30, 120), region))
+    return windows
+
+
+def test_profile_matches_enumeration(schedule, finders):
+    engine = finders["raptor"].raptor
+    for origin, dest, t_start, t_end, region in profile_windows(schedule, 8):
+        origin_id, dest_id = schedule.stations.get(origin), schedule.stations.get(dest)
+        max_transits = 2 if region == Region.JABODETABEK else 1
+        journeys = engine.profile(origin_id, dest_id, t_start, t_end, region, max_transits)
+        assert all(t_start <= legs[0][3] <= t_end for legs in journeys)
+        expected = profile_oracle(schedule, origin_id, dest_id, t_start, t_end, region, max_transits)
+        assert {journey_key(legs) for legs in journeys} == expected, (origin, dest, t_start, t_end)
+
+
+def test_profile_covers_single_queries(finders):
+    finder = finders["raptor"]
+    origin, dest, t_start, t_end, region = PROFILE_WINDOWS[0]
+    window_start = BASE_DATE + datetime.timedelta(minutes=t_start)
+    window_end = BASE_DATE + datetime.timedelta(minutes=t_end)
+    profile = finder.find_routes_profile(origin, dest, window_start, window_end, region)
+    keys = [(route[0]["_departure_dt"], route[-1]["_arrival_dt"], len(route)) for route in profile]
+    assert all(window_start <= key[0] <= window_end for key in keys)
+    # Setiap hasil query per menit yang berangkat di dalam jendela tidak boleh lebih baik dari profil
+    for minute in range(t_start - 1, t_end):
+        start = BASE_DATE + datetime.timedelta(minutes=minute)
+        for route in finder.find_routes(origin, dest, start, region):
+            departure, arrival = route[0]["_departure_dt"], route[-1]["_arrival_dt"]
+            if departure > window_end:
+                continue
+            assert any(d >= departure and a <= arrival and n <= len(route) for d, a, n in keys), (minute, departure)
+
+
+def test_travel_time_matrix_matches_single_queries(schedule, finders):
+    region = Region.JABODETABEK
+    origins = ["Universitas Indonesia", "Sudirman", "BNI City", "Jayakarta"]
+    destinations = ["Pondok Cina", "Pondok Rajeg", "Citayam", "Kranji", "Bogor"]
+    departure_times = [BASE_DATE + datetime.timedelta(minutes=minute) for minute in (5, 20, 7 * 60 + 30, 23 * 60 + 50)]
+    travel_minutes, transfers = finders["raptor"].travel_time_matrix(origins, destinations, departure_times, region)
+    csa = finders["csa"]
+    for t, start in enumerate(departure_times):
+        for row, origin in enumerate(origins):
+            for col, dest in enumerate(destinations):
+                routes = csa.find_routes(origin, dest, start, region)
+                if not routes:
+                    assert travel_minutes[t, row, col] == -1
+                    continue
+                expected = (routes[0][-1]["_arrival_dt"] - start).total_seconds() // 60
+                assert travel_minutes[t, row, col] == expected, (origin, dest, start)
+                assert transfers[t, row, col] == len(routes[0]) - 1, (origin, dest, start)
+
+
+def test_reachable_within_matches_single_queries(schedule, finders):
+    region = Region.JABODETABEK
+    origin = "Sudirman"
+    csa = finders["csa"]
+    for minute in (5, 18 * 60):
+        start = BASE_DATE + datetime.timedelta(minutes=minute)
+        budget = 60
+        reachable = finders["raptor"].reachable_within(origin, start, budget, region)
+        assert reachable.pop(origin) == (start, 0)
+        # Tepat setelah tengah malam hanya kereta hari sebelumnya yang masih jalan
+        assert reachable
+        for dest in schedule.get_available_stations_by_region(region):
+            if dest == origin:
+                continue
+            routes = csa.find_routes(origin, dest, start, region)
+            arrival = routes[0][-1]["_arrival_dt"] if routes else None
+            if arrival is None or arrival > start + datetime.timedelta(minutes=budget):
+                assert dest not in reachable, (dest, start)
+            else:
+                assert reachable.get(dest) == (arrival, len(routes[0]) - 1), (dest, start)
+
+
+def test_pareto_covers_fastest_and_fewest_transfers(schedule, finders):
+    finder = finders["dijkstra"]
+    engine = finders["raptor"].raptor
+    queries = [(origin, dest, minute, Region.JABODETABEK) for origin, dest, minute in MIDNIGHT_QUERIES]
+    for origin, dest, minute, region in queries + sample_queries(schedule, 4, seed=11):
+        start = BASE_DATE + datetime.timedelta(minutes=minute)
+        pareto = finder.find_routes_pareto(origin, dest, start, region)
+        fastest = earliest_arrival(finders["csa"].find_routes(origin, dest, start, region))
+        assert earliest_arrival(pareto) == fastest, (origin, dest, minute, region)
+        if fastest is None:
+            continue
+        options = [(route[-1]["_arrival_dt"], len(route) - 1) for route in pareto]
+        slack = fastest + datetime.timedelta(minutes=RouteFinder.PARETO_SLACK_MINUTES)
+        assert all(arrival <= slack for arrival, __ in options)
+        # Setiap perjalanan RAPTOR (tiba vs transit) dalam batas slack tidak boleh lebih baik dari hasil Pareto
+        max_transits = 2 if region == Region.JABODETABEK else 1
+        origin_id, dest_id = schedule.stations.get(origin), schedule.stations.get(dest)
+        for legs in engine.find_journeys(origin_id, dest_id, minute, region, max_transits):
+            arrival = BASE_DATE + datetime.timedelta(minutes=legs[-1][4])
+            if arrival <= slack:
+                assert any(a <= arrival and n <= len(legs) - 1 for a, n in options), (origin, dest, minute, region)
+
+
+def test_engines_agree_on_occupancy_for_same_itinerary(schedule, finders):
+    def itinerary(route):
+        return [(leg["train_id"], leg["start_station"], leg["destination_station"], leg["_departure_dt"]) for leg in route]
+
+    compared = 0
+    for origin, dest, minute, region in sample_queries(schedule, 10, seed=5):
+        start = BASE_DATE + datetime.timedelta(minutes=minute)
+        routes = {engine: finder.find_routes(origin, dest, start, region) for engine, finder in finders.items()}
+        for reference in routes["dijkstra"]:
+            for engine in ("raptor", "csa"):
+                for route in routes[engine]:
+                    if itinerary(route) != itinerary(reference):
+                        continue
+                    compared += 1
+                    assert [leg["occupancy_percentage"] for leg in route] == \
+                        [leg["occupancy_percentage"] for leg in reference], (engine, origin, dest, start)
+    assert compared > 0
@@ -0,0 +1,47 @@
+import numpy as np
+
+import train_schedule
+from train_schedule import TrainSchedule
+
+
+def test_snapshot_round_trip(tmp_path, csv_file):
+    schedule = TrainSchedule(csv_file)
+    snapshot_file = str(tmp_path / "schedule.snapshot")
+    schedule.save_snapshot(snapshot_file)
+    loaded = TrainSchedule._read_snapshot(snapshot_file, schedule.source_hash)
+
+    assert loaded is not None
+    assert np.array_equal(loaded.stop_times, schedule.stop_times)
+    assert np.array_equal(loaded.stop_offsets, schedule.stop_offsets)
+    assert [train.train_id for train in loaded.trains] == [train.train_id for train in schedule.trains]
+    assert [train.pattern.direction for train in loaded.trains] == [train.pattern.direction for train in schedule.trains]
+    for region, fares in schedule.fare_matrices.items():
+        assert np.array_equal(loaded.fare_matrices[region], fares)
+    # Train hasil snapshot tetap view ke stop_times milik jadwal yang dimuat
+    train = loaded.trains[0]
+    assert train.minutes.tolist() == schedule.trains[0].minutes.tolist()
+
+
+def test_snapshot_is_stale_after_source_table_edit(tmp_path, monkeypatch, csv_file):
+    # Pengganti file tabel jarak/arah: isinya ikut di-hash ke header snapshot
+    table_file = tmp_path / "tables.py"
+    table_file.write_text("JABODETABEK_DISTANCES = {('a', 'b'): 1.0}\n")
+    monkeypatch.setattr(train_schedule, "SNAPSHOT_SOURCES", train_schedule.SNAPSHOT_SOURCES + (str(table_file),))
+    schedule = TrainSchedule(csv_file)
+    snapshot_file = str(tmp_path / "schedule.snapshot")
+    schedule.save_snapshot(snapshot_file)
+    assert TrainSchedule._read_snapshot(snapshot_file, schedule.source_hash) is not None
+
+    table_file.write_text("JABODETABEK_DISTANCES = {('a', 'b'): 2.0}\n")
+    assert TrainSchedule._read_snapshot(snapshot_file, schedule.source_hash) is None
+    # from_snapshot membangun ulang dari CSV dan menulis snapshot baru yang valid
+    rebuilt = TrainSchedule.from_snapshot(csv_file, snapshot_file)
+    assert len(rebuilt.trains) == len(schedule.trains)
+    assert TrainSchedule._read_snapshot(snapshot_file, schedule.source_hash) is not None
+
+
+def test_snapshot_is_stale_after_csv_edit(tmp_path, csv_file):
+    schedule = TrainSchedule(csv_file)
+    snapshot_file = str(tmp_path / "schedule.snapshot")
+    schedule.save_snapshot(snapshot_file)
+    assert TrainSchedule._read_snapshot(snapshot_file, b"\0" * 32) is None
@@ -1,11 +1,32 @@
 # Beberapa instans (tapi gk semua) yang dibantu Github Copilot dan Google Gemini
 # -- Awal Kutipan
 import csv
+import bisect
 import collections
-from typing import List, Dict, Set
+import hashlib
+import heapq
+import os
+import pickle
+import struct
+from typing import List, Dict, Set, Optional, Tuple
 import math
+import numpy as np
 # --- UBAH IMPORT ---
-from data_models import Train, Region
+from data_models import Train, RoutePattern, Region, StationRegistry, MINUTES_PER_DAY, NO_TIME, resolve_day_rollover
+from network_model import (
+    JABODETABEK_DISTANCES, DEFAULT_SEGMENT_KM, NetworkModel,
+    get_jabodetabek_distance, get_total_jabodetabek_distance,
+)
+
+# Tabel jarak dan helper-nya sekarang ada di network_model, tapi tetap
+# diekspor ulang dari sini dengan nama yang sama
+__all__ = [
+    "TrainSchedule", "calculate_fare", "fare_for_distance", "fares_for_distances",
+    "default_snapshot_path", "YOGYA_SOLO_STATIONS", "RANGKASBITUNG_MERAK_STATIONS",
+    "SNAPSHOT_MAGIC", "SNAPSHOT_VERSION", "SNAPSHOT_SOURCES",
+    "JABODETABEK_DISTANCES", "DEFAULT_SEGMENT_KM",
+    "get_jabodetabek_distance", "get_total_jabodetabek_distance",
+]
 
 # Daftar ini digunakan untuk mengidentifikasi rute kereta
 YOGYA_SOLO_STATIONS = {
@@ -26,118 +47,6 @@ def _determine_region(route: List[str]) -> Region:
         return Region.RANGKASBITUNG_MERAK
     return Region.JABODETABEK
 
-# --- JARAK UNTUK JABODETABEK (SAMA DENGAN occupancy_predictor.py) ---
-JABODETABEK_DISTANCES = {
-    # A. Bogor - Manggarai
-        ("Bogor", "Cilebut"): 7.518, ("Cilebut", "Bogor"): 7.518,
-        ("Cilebut", "Bojong Gede"): 4.331, ("Bojong Gede", "Cilebut"): 4.331,
-        ("Bojong Gede", "Citayam"): 5.197, ("Citayam", "Bojong Gede"): 5.197,
-        ("Citayam", "Depok"): 5.084, ("Depok", "Citayam"): 5.084,
-        ("Depok", "Depok Baru"): 1.741, ("Depok Baru", "Depok"): 1.741,
-        ("Depok Baru", "Pondok Cina"): 2.57, ("Pondok Cina", "Depok Baru"): 2.57,
-        ("Pondok Cina", "Universitas Indonesia"): 1.109, ("Universitas Indonesia", "Pondok Cina"): 1.109,
-        ("Universitas Indonesia", "Universitas Pancasila"): 2.264, ("Universitas Pancasila", "Universitas Indonesia"): 2.264,
-        ("Universitas Pancasila", "Lenteng Agung"): 1.029, ("Lenteng Agung", "Universitas Pancasila"): 1.029,
-        ("Lenteng Agung", "Tanjung Barat"): 2.460, ("Tanjung Barat", "Lenteng Agung"): 2.460,
-        ("Tanjung Barat", "Pasar Minggu"): 3.031, ("Pasar Minggu", "Tanjung Barat"): 3.031,
-        ("Pasar Minggu", "Pasar Minggu Baru"): 1.695, ("Pasar Minggu Baru", "Pasar Minggu"): 1.695,
-        ("Pasar Minggu Baru", "Kalibata"): 1.509, ("Kalibata", "Pasar Minggu Baru"): 1.509,
-        ("Kalibata", "Cawang"): 1.475, ("Cawang", "Kalibata"): 1.475,
-        ("Cawang", "Tebet"): 1.301, ("Tebet", "Cawang"): 1.301,
-        ("Tebet", "Manggarai"): 2.601, ("Manggarai", "Tebet"): 2.601,
-
-        # B. Rangkas bitung - Tanah abang
-        ("Rangkas bitung", "Citeras"): 9.847, ("Citeras", "Rangkas bitung"): 9.847,
-        ("Citeras", "Maja"): 7.293, ("Maja", "Citeras"): 7.293,
-        ("Maja", "Cikoya"): 1.835, ("Cikoya", "Maja"): 1.835,
-        ("Cikoya", "Tigaraksa"): 2.651, ("Tigaraksa", "Cikoya"): 2.651,
-        ("Tigaraksa", "Tenjo"): 2.974, ("Tenjo", "Tigaraksa"): 2.974,
-        ("Tenjo", "Daru"): 3.902, ("Daru", "Tenjo"): 3.902,
-        ("Daru", "Cilejit"): 2.675, ("Cilejit", "Daru"): 2.675,
-        ("Cilejit", "Parung Panjang"): 7.025, ("Parung Panjang", "Cilejit"): 7.025,
-        ("Parung Panjang", "Cicayur"): 5.968, ("Cicayur", "Parung Panjang"): 5.968,
-        ("Cicayur", "Cisauk"): 2.519, ("Cisauk", "Cicayur"): 2.519,
-        ("Cisauk", "Serpong"): 1.784, ("Serpong", "Cisauk"): 1.784,
-        ("Serpong", "Rawa Buntu"): 2.413, ("Rawa Buntu", "Serpong"): 2.413,
-        ("Rawa Buntu", "Sudimara"): 4.566, ("Sudimara", "Rawa Buntu"): 4.566,
-        ("Sudimara", "Jurang Mangu"): 1.974, ("Jurang Mangu", "Sudimara"): 1.974,
-        ("Jurang Mangu", "Pondok Ranji"): 2.179, ("Pondok Ranji", "Jurang Mangu"): 2.179,
-        ("Pondok Ranji", "Kebayoran"): 6.218, ("Kebayoran", "Pondok Ranji"): 6.218,
-        ("Kebayoran", "Palmerah"): 3.373, ("Palmerah", "Kebayoran"): 3.373,
-        ("Palmerah", "Tanah Abang"): 3.191, ("Tanah Abang", "Palmerah"): 3.191,
-
-        # C. TANAH ABANG - JATINEGARA
-        ("Tanah Abang", "Duri"): 3.632, ("Duri", "Tanah Abang"): 3.632,
-        ("Duri", "Angke"): 1.230, ("Angke", "Duri"): 1.230,
-        ("Angke", "Kampung Badan"): 4.102, ("Kampung Badan", "Angke"): 4.102,
-        ("Kampung Badan", "Rajawali"): 1.444, ("Rajawali", "Kampung Badan"): 1.444,
-        ("Rajawali", "Kemayoran"): 1.901, ("Kemayoran", "Rajawali"): 1.901,
-        ("Kemayoran", "Pasar Senen"): 1.436, ("Pasar Senen", "Kemayoran"): 1.436,
-        ("Pasar Senen", "Gang Sentiong"): 1.567, ("Gang Sentiong", "Pasar Senen"): 1.567,
-        ("Gang Sentiong", "Kramat"): 0.973, ("Kramat", "Gang Sentiong"): 0.973,
-        ("Kramat", "Pondok Jati"): 1.829, ("Pondok Jati", "Kramat"): 1.829,
-        ("Pondok Jati", "Jatinegara"): 1.236, ("Jatinegara", "Pondok Jati"): 1.236,
-
-        # D. JATINEGARA - CIKARANG
-        ("Jatinegara", "Klender"): 3.395, ("Klender", "Jatinegara"): 3.395,
-        ("Klender", "Buaran"): 3.1, ("Buaran", "Klender"): 3.1,
-        ("Buaran", "Klender Baru"): 1.305, ("Klender Baru", "Buaran"): 1.305,
-        ("Klender Baru", "Cakung"): 1.385, ("Cakung", "Klender Baru"): 1.385,
-        ("Cakung", "Kranji"): 3.097, ("Kranji", "Cakung"): 3.097,
-        ("Kranji", "Bekasi"): 2.520, ("Bekasi", "Kranji"): 2.520,
-        ("Bekasi", "Bekasi Timur"): 3.298, ("Bekasi Timur", "Bekasi"): 3.298,
-        ("Bekasi Timur", "Tambun"): 3.43, ("Tambun", "Bekasi Timur"): 3.43,
-        ("Tambun", "Cibitung"): 3.42, ("Cibitung", "Tambun"): 3.42,
-        ("Cibitung", "Cikarang"): 6.489, ("Cikarang", "Cibitung"): 6.489,
-
-        # E. TANAH ABANG - MANGGARAI
-        ("Tanah Abang", "Karet"): 2.029, ("Karet", "Tanah Abang"): 2.029,
-        ("Karet", "BNI City"): 0.377, ("BNI City", "Karet"): 0.377,
-        ("BNI City", "Sudirman"): 0.434, ("Sudirman", "BNI City"): 0.434,
-        ("Sudirman", "Manggarai"): 3.186, ("Manggarai", "Sudirman"): 3.186,
-
-        # F. (Route between Manggarai and Jakarta Kota)
-        ("Manggarai", "Cikini"): 1.606, ("Cikini", "Manggarai"): 1.606,
-        ("Cikini", "Gondangdia"): 1.699, ("Gondangdia", "Cikini"): 1.699,
-        ("Gondangdia", "Juanda"): 2.198, ("Juanda", "Gondangdia"): 2.198,
-        ("Juanda", "Sawah Besar"): 0.707, ("Sawah Besar", "Juanda"): 0.707,
-        ("Sawah Besar", "Mangga Besar"): 1.121, ("Mangga Besar", "Sawah Besar"): 1.121,
-        ("Mangga Besar", "Jayakarta"): 1.02, ("Jayakarta", "Mangga Besar"): 1.02,
-        ("Jayakarta", "Jakarta Kota"): 1.467, ("Jakarta Kota", "Jayakarta"): 1.467,
-
-        # G. TANGERANG - DURI
-        ("Tangerang", "Tanah Tinggi"): 1.609, ("Tanah Tinggi", "Tangerang"): 1.609,
-        ("Tanah Tinggi", "Batu Ceper"): 2.0, ("Batu Ceper", "Tanah Tinggi"): 2.0,
-        ("Batu Ceper", "Poris"): 1.8, ("Poris", "Batu Ceper"): 1.8,
-        ("Poris", "Kalideres"): 2.548, ("Kalideres", "Poris"): 2.548,
-        ("Kalideres", "Rawa Buaya"): 2.504, ("Rawa Buaya", "Kalideres"): 2.504,
-        ("Rawa Buaya", "Bojong Indah"): 1.152, ("Bojong Indah", "Rawa Buaya"): 1.152,
-        ("Bojong Indah", "Taman Kota"): 2.434, ("Taman Kota", "Bojong Indah"): 2.434,
-        ("Taman Kota", "Pesing"): 1.514, ("Pesing", "Taman Kota"): 1.514,
-        ("Pesing", "Grogol"): 2.036, ("Grogol", "Pesing"): 2.036,
-        ("Grogol", "Duri"): 1.7, ("Duri", "Grogol"): 1.7,
-
-        # H. Jakarta Kota - Tanjung Priok
-        ("Jakarta Kota", "Kampung Bandan"): 1.364, ("Kampung Bandan", "Jakarta Kota"): 1.364,
-        ("Kampung Bandan", "Ancol"): 6.5, ("Ancol", "Kampung Bandan"): 6.5,
-        ("Ancol", "Tanjung Priok"):4.566, ("Tanjung Priok", "Ancol"):4.566
-}
-
-# --- FUNGSI HITUNG JARAK UNTUK JABODETABEK ---
-def get_jabodetabek_distance(station_a: str, station_b: str) -> float:
-    """Mengembalikan jarak (km) antara dua stasiun Jabodetabek, default 2.0 km jika tidak ditemukan."""
-    return JABODETABEK_DISTANCES.get(
-        (station_a, station_b),
-        JABODETABEK_DISTANCES.get((station_b, station_a), 2.0)
-    )
-
-# --- FUNGSI HITUNG JARAK TOTAL UNTUK RUTE JABODETABEK ---
-def get_total_jabodetabek_distance(route: list) -> float:
-    total = 0.0
-    for i in range(len(route) - 1):
-        total += get_jabodetabek_distance(route[i], route[i+1])
-    return total
-
 def _get_simple_path(route: list) -> list:
     """
     Mengembalikan lintasan dari stasiun awal ke akhir tanpa stasiun berulang.
@@ -166,12 +75,16 @@ def calculate_fare(route: list, region) -> int:
     """
     # Ambil lintasan tanpa stasiun berulang
     route = _get_simple_path(route)
+    distance = get_total_jabodetabek_distance(route) if region == Region.JABODETABEK else 0.0
+    return fare_for_distance(distance, region)
+
+def fare_for_distance(distance: float, region) -> int:
+    """Aturan tarif per wilayah untuk jarak tempuh (km) yang sudah diketahui."""
     if region == Region.YOGYA_SOLO:
         return 8000
     elif region == Region.RANGKASBITUNG_MERAK:
         return 5000
     elif region == Region.JABODETABEK:
-        distance = get_total_jabodetabek_distance(route)
         if distance <= 25:
             return 3000
         else:
@@ -181,21 +94,69 @@ def calculate_fare(route: list, region) -> int:
     else:
         return 0  # fallback
 
+def fares_for_distances(distances: np.ndarray, region) -> np.ndarray:
+    """Versi vektor fare_for_distance (int32); jarak tak hingga (tidak terjangkau) menjadi -1."""
+    if region == Region.JABODETABEK:
+        fares = np.where(distances <= 25, 3000, 3000 + 1000 * np.ceil((distances - 25) / 10))
+    else:
+        fares = np.full(distances.shape, fare_for_distance(0.0, region), dtype=np.float64)
+    return np.where(np.isinf(distances), -1, fares).astype(np.int32)
+
+# --- SNAPSHOT BINER JADWAL ---
+# Format file: MAGIC | versi (uint16) | sha256 CSV (32 byte) | sha256 sumber (32 byte) | payload pickle.
+# Naikkan SNAPSHOT_VERSION setiap kali struktur internal TrainSchedule berubah.
+SNAPSHOT_MAGIC = b"KRLSNAP"
+SNAPSHOT_VERSION = 13
+_SNAPSHOT_HEADER = struct.Struct(f"<{len(SNAPSHOT_MAGIC)}sH32s32s")
+# File sumber Python yang ikut membentuk isi snapshot: tabel jarak (network_model),
+# tabel arah (data_models), serta stasiun wilayah dan rumus tarif (modul ini).
+# Mengubah salah satunya membuat snapshot lama basi tanpa perlu menaikkan versi.
+_SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_SOURCES = tuple(
+    os.path.join(_SOURCE_DIR, name) for name in ("data_models.py", "network_model.py", "train_schedule.py")
+)
+
+def _hash_file(filename: str) -> bytes:
+    """Mengembalikan digest sha256 dari isi file."""
+    with open(filename, mode='rb') as infile:
+        return hashlib.sha256(infile.read()).digest()
+
+def _hash_sources(filenames) -> bytes:
+    """Digest sha256 gabungan dari isi beberapa file, berurutan."""
+    digest = hashlib.sha256()
+    for filename in filenames:
+        with open(filename, mode='rb') as infile:
+            digest.update(infile.read())
+    return digest.digest()
+
+def default_snapshot_path(csv_file: str) -> str:
+    """Lokasi default snapshot: di samping file CSV dengan ekstensi .snapshot."""
+    return os.path.splitext(csv_file)[0] + ".snapshot"
+
 class TrainSchedule:
     """
     Memuat dan mengelola data jadwal kereta dari file CSV.
     """
     def __init__(self, csv_file: str):
         """Menginisialisasi dan memuat jadwal."""
+        self.source_hash: bytes = _hash_file(csv_file)
+        self.stations = StationRegistry()
         self.trains: List[Train] = self._load_from_csv(csv_file)
         self.station_to_trains_map: Dict[str, List[Train]] = self._build_station_to_trains_map()
         # --- TAMBAHKAN DATA TERSTRUKTUR BERDASARKAN WILAYAH ---
         self.trains_by_region: Dict[Region, List[Train]] = self._group_trains_by_region()
         self.stations_by_region: Dict[Region, Set[str]] = self._get_stations_by_region()
+        self.trains_by_station_id: Dict[int, List[Train]] = self._build_station_id_to_trains_map()
+        self.network = NetworkModel(self.stations)
+        self._assign_pattern_distances()
+        self.departure_index = self._build_departure_index()
+        self.connection_slices: Dict[Region, Tuple[int, int]] = self._build_connections()
+        self.ride_graph, self.ride_graph_reverse = self._build_ride_graphs()
+        self.fare_matrices: Dict[Region, np.ndarray] = self._build_fare_matrices()
 
     def _load_from_csv(self, filename: str) -> List[Train]:
         """Memuat data kereta dari file CSV yang ditentukan."""
-        schedule = []
+        rows = []
         with open(filename, mode='r', encoding='utf-8') as infile:
             reader = csv.reader(infile)
             next(reader)  # Lewati baris header
@@ -203,19 +164,242 @@ class TrainSchedule:
                 train_id, name, route_str, times_str = row
                 route = [r.strip() for r in route_str.strip('\"').split(',')]
                 
-                departure_times = {}
+                departure_minutes = {}
                 time_parts = times_str.strip('\"').split(',')
                 for part in time_parts:
                     try:
                         station, h, m = part.split(':')
-                        departure_times[station.strip()] = f"{h}:{m}"
+                        departure_minutes[station.strip()] = int(h) * 60 + int(m)
                     except ValueError:
                         continue
                 
                 # --- TAMBAHKAN LOGIKA PENENTUAN WILAYAH ---
                 region = _determine_region(route)
-                schedule.append(Train(train_id, name, route, departure_times, region))
-        return schedule
+                rows.append((train_id, name, route, departure_minutes, region))
+        return self._build_timetable_arrays(rows)
+
+    def _build_timetable_arrays(self, rows: list) -> List[Train]:
+        """
+        Membangun representasi kolumnar jadwal untuk perhitungan integer:
+        - route_patterns: satu RoutePattern per urutan stasiun unik
+        - stop_offsets (int32, n_kereta + 1): stop kereta ke-i ada di [off[i], off[i+1])
+        - stop_stations (int32): ID stasiun (StationRegistry) tiap stop
+        - stop_times (int16): menit sejak tengah malam, pergantian hari sudah
+          diselesaikan (bisa >= 1440), NO_TIME jika stasiun tidak punya jam
+        Objek Train yang dikembalikan berbagi RoutePattern dan train.minutes
+        adalah view ke potongan stop_times miliknya.
+        """
+        self.route_patterns: List[RoutePattern] = []
+        patterns_by_route = {}
+        train_patterns = []
+        offsets = [0]
+        stations = []
+        times = []
+        for __, __, route, departure_minutes, __ in rows:
+            key = tuple(route)
+            pattern = patterns_by_route.get(key)
+            if pattern is None:
+                pattern = RoutePattern(key, tuple(self.stations.intern(station) for station in key))
+                patterns_by_route[key] = pattern
+                self.route_patterns.append(pattern)
+            train_patterns.append(pattern)
+            stations.extend(pattern.station_ids)
+            times.extend(resolve_day_rollover([departure_minutes.get(station, NO_TIME) for station in key]))
+            offsets.append(len(stations))
+        self.stop_offsets = np.array(offsets, dtype=np.int32)
+        self.stop_stations = np.array(stations, dtype=np.int32)
+        self.stop_times = np.array(times, dtype=np.int16)
+
+        trains = []
+        shared_names = {}
+        for i, (train_id, name, __, __, region) in enumerate(rows):
+            name = shared_names.setdefault(name, name)
+            trains.append(Train._from_storage(train_id, name, region, train_patterns[i], self.stop_times, offsets[i]))
+        return trains
+
+    def _build_station_id_to_trains_map(self) -> Dict[int, List[Train]]:
+        """Seperti station_to_trains_map, tetapi dengan kunci ID stasiun."""
+        station_map = collections.defaultdict(list)
+        for train in self.trains:
+            for station_id in train.station_ids:
+                station_map[station_id].append(train)
+        return station_map
+
+    def _build_departure_index(self) -> Dict[Tuple[Region, int], Tuple[List[int], List[Tuple[Train, int]]]]:
+        """
+        Indeks keberangkatan per (wilayah, ID stasiun): daftar jam (menit 0..1439)
+        yang terurut beserta (kereta, posisi stop) yang sejajar, untuk bisect.
+        Stop terakhir dan stop tanpa jam tidak dimasukkan karena tidak bisa dinaiki.
+        """
+        buckets = collections.defaultdict(list)
+        for train in self.trains:
+            minutes = train.minutes.tolist()
+            for pos in range(len(minutes) - 1):
+                if minutes[pos] == NO_TIME:
+                    continue
+                key = (train.region, train.station_ids[pos])
+                buckets[key].append((minutes[pos] % MINUTES_PER_DAY, train, pos))
+        index = {}
+        for key, departures in buckets.items():
+            departures.sort(key=lambda d: d[0])
+            index[key] = ([d[0] for d in departures], [(d[1], d[2]) for d in departures])
+        return index
+
+    def departures_after(self, station, region: Region, t: int, limit: Optional[int] = None) -> List[Tuple[int, Train, int]]:
+        """
+        Mengembalikan keberangkatan dari stasiun (nama atau ID) di wilayah tertentu
+        yang berangkat setelah menit t, terurut menurut waktu, sebagai tuple
+        (menit_berangkat, kereta, posisi_stop). Jadwal berulang setiap hari, jadi
+        keberangkatan yang jamnya sudah lewat muncul lagi di hari berikutnya
+        (menit_berangkat >= 1440). Keberangkatan yang jamnya sama persis dengan t
+        dilewati, sesuai aturan router (harus berangkat > waktu tiba di stasiun).
+        """
+        station_id = station if isinstance(station, int) else self.stations.get(station)
+        bucket = self.departure_index.get((region, station_id))
+        if bucket is None:
+            return []
+        clocks, entries = bucket
+        clock_now = t % MINUTES_PER_DAY
+        day_start = t - clock_now
+        end = len(clocks) if limit is None else limit
+        result = []
+        for k in range(bisect.bisect_right(clocks, clock_now), len(clocks)):
+            if len(result) >= end:
+                return result
+            train, pos = entries[k]
+            result.append((day_start + clocks[k], train, pos))
+        next_day = day_start + MINUTES_PER_DAY
+        for k in range(bisect.bisect_left(clocks, clock_now)):
+            if len(result) >= end:
+                break
+            train, pos = entries[k]
+            result.append((next_day + clocks[k], train, pos))
+        return result
+
+    def _build_connections(self) -> Dict[Region, Tuple[int, int]]:
+        """
+        Meratakan setiap pasangan stop berurutan (yang punya jam) dari setiap kereta
+        menjadi satu array koneksi untuk Connection Scan, terurut per wilayah lalu
+        menurut menit berangkat:
+        - conn_dep / conn_arr (int32): menit berangkat dan tiba
+        - conn_from / conn_to (int32): ID stasiun asal dan tujuan koneksi
+        - conn_from_pos / conn_to_pos (int16): posisi stop di rute kereta
+        - conn_train (int32): indeks kereta di self.trains
+        - conn_trip (int32): identitas perjalanan (kereta + salinan hari)
+        Jadwal berulang setiap hari, jadi koneksi disalin untuk hari berikutnya
+        (+1440), dan kereta yang melewati tengah malam juga disalin untuk hari
+        sebelumnya (-1440) agar bagian setelah pukul 00:00 ikut terpindai.
+        Mengembalikan rentang [awal, akhir) koneksi per wilayah.
+        """
+        region_order = {region: i for i, region in enumerate(Region)}
+        columns = [[] for __ in range(9)]
+        for train_idx, train in enumerate(self.trains):
+            minutes = train.minutes.tolist()
+            positions = train.timed_positions()
+            region_code = region_order[train.region]
+            for day in (-1, 0, 1):
+                offset = day * MINUTES_PER_DAY
+                if day < 0 and minutes[positions[-1]] < MINUTES_PER_DAY:
+                    continue
+                trip = train_idx * 3 + day + 1
+                for a, b in zip(positions, positions[1:]):
+                    dep = minutes[a] + offset
+                    if dep < 0:
+                        continue
+                    for column, value in zip(columns, (region_code, dep, minutes[b] + offset,
+                                                       train.station_ids[a], train.station_ids[b],
+                                                       a, b, train_idx, trip)):
+                        column.append(value)
+        regions, deps, arrs, froms, tos, from_pos, to_pos, train_idx, trips = (np.array(c, dtype=np.int32) for c in columns)
+        order = np.lexsort((deps, regions))
+        self.conn_dep = deps[order]
+        self.conn_arr = arrs[order]
+        self.conn_from = froms[order]
+        self.conn_to = tos[order]
+        self.conn_from_pos = from_pos[order].astype(np.int16)
+        self.conn_to_pos = to_pos[order].astype(np.int16)
+        self.conn_train = train_idx[order]
+        self.conn_trip = trips[order]
+
+        sorted_regions = regions[order]
+        slices = {}
+        for region, code in region_order.items():
+            start, end = np.searchsorted(sorted_regions, [code, code + 1])
+            slices[region] = (int(start), int(end))
+        return slices
+
+    def _build_ride_graphs(self) -> Tuple[Dict[Region, tuple], Dict[Region, tuple]]:
+        """
+        Graf statis per wilayah: sisi antar stop berurutan (yang punya jam) dengan
+        bobot waktu tempuh minimum (menit) dari semua kereta, tanpa waktu tunggu.
+        Disimpan sebagai CSR (indptr, indices, weights) dalam dua arah: ride_graph
+        per stasiun asal dan ride_graph_reverse per stasiun tujuan. Kereta yang
+        jamnya mundur di tengah rute mendapat sisi langsung untuk setiap pasangan
+        stop, karena penjumlahan sisi berurutannya tidak lagi menjadi batas bawah.
+        """
+        n = len(self.stations)
+        edges_by_region = collections.defaultdict(dict)
+        for train in self.trains:
+            edges = edges_by_region[train.region]
+            minutes = train.minutes.tolist()
+            ids = train.station_ids
+            timed = [pos for pos, minute in enumerate(minutes) if minute != NO_TIME]
+            if all(minutes[a] <= minutes[b] for a, b in zip(timed, timed[1:])):
+                pairs = zip(timed, timed[1:])
+            else:
+                pairs = ((a, b) for i, a in enumerate(timed) for b in timed[i + 1:])
+            for a, b in pairs:
+                key = (ids[a], ids[b])
+                ride = max(0, minutes[b] - minutes[a])
+                if ride < edges.get(key, ride + 1):
+                    edges[key] = ride
+
+        def to_csr(edges, reverse):
+            items = sorted(((v, u) if reverse else (u, v), w) for (u, v), w in edges.items())
+            heads = np.array([key[0] for key, __ in items], dtype=np.int32)
+            indices = np.array([key[1] for key, __ in items], dtype=np.int32)
+            weights = np.array([w for __, w in items], dtype=np.int32)
+            indptr = np.zeros(n + 1, dtype=np.int32)
+            np.cumsum(np.bincount(heads, minlength=n), out=indptr[1:])
+            return indptr, indices, weights
+
+        forward = {region: to_csr(edges, False) for region, edges in edges_by_region.items()}
+        reverse = {region: to_csr(edges, True) for region, edges in edges_by_region.items()}
+        return forward, reverse
+
+    def lower_bounds_to(self, dest_id: int, region: Region) -> List[float]:
+        """
+        Batas bawah waktu tempuh (menit) dari setiap stasiun ke dest_id di wilayah
+        tertentu: Dijkstra terbalik di ride_graph_reverse. Stasiun yang tidak bisa
+        mencapai tujuan bernilai inf.
+        """
+        bounds = [math.inf] * len(self.stations)
+        graph = self.ride_graph_reverse.get(region)
+        if graph is None:
+            return bounds
+        indptr, indices, weights = (array.tolist() for array in graph)
+        bounds[dest_id] = 0
+        queue = [(0, dest_id)]
+        while queue:
+            dist, v = heapq.heappop(queue)
+            if dist > bounds[v]:
+                continue
+            for e in range(indptr[v], indptr[v + 1]):
+                u = indices[e]
+                candidate = dist + weights[e]
+                if candidate < bounds[u]:
+                    bounds[u] = candidate
+                    heapq.heappush(queue, (candidate, u))
+        return bounds
+
+    def _assign_pattern_distances(self) -> None:
+        """Mengisi RoutePattern.cumulative_km sehingga jarak antar dua posisi cukup satu pengurangan."""
+        for pattern in self.route_patterns:
+            pattern.cumulative_km = self.network.prefix_km(pattern.station_ids)
+
+    def route_distance_km(self, station_ids) -> float:
+        """Total jarak (km) sepanjang urutan ID stasiun, default 2.0 km per segmen tak dikenal."""
+        return self.network.route_distance_km(station_ids)
 
     def _build_station_to_trains_map(self) -> Dict[str, List[Train]]:
         """Membangun map untuk pencarian kereta berdasarkan stasiun yang efisien."""
@@ -242,9 +426,10 @@ class TrainSchedule:
                     regional_stations[region].add(station)
         return regional_stations
 
-    def get_trains_for_station(self, station: str, region: Region) -> List[Train]:
-        """Mendapatkan semua kereta untuk stasiun tertentu dalam wilayah spesifik."""
-        all_trains = self.station_to_trains_map.get(station, [])
+    def get_trains_for_station(self, station, region: Region) -> List[Train]:
+        """Mendapatkan semua kereta untuk stasiun tertentu (nama atau ID) dalam wilayah spesifik."""
+        station_id = station if isinstance(station, int) else self.stations.get(station)
+        all_trains = self.trains_by_station_id.get(station_id, [])
         return [train for train in all_trains if train.region == region]
 
     def get_available_stations_by_region(self, region: Region) -> List[str]:
@@ -257,6 +442,115 @@ class TrainSchedule:
 
     def get_fare_for_train(self, train: Train) -> int:
         """Mengembalikan tarif untuk kereta tertentu."""
-        return calculate_fare(train.route, train.region)
+        if train.region != Region.JABODETABEK:
+            return fare_for_distance(0.0, train.region)
+        return fare_for_distance(self.route_distance_km(_get_simple_path(train.station_ids)), train.region)
+
+    def _build_fare_matrices(self) -> Dict[Region, np.ndarray]:
+        """
+        Matriks tarif stasiun x stasiun (int32, diindeks ID StationRegistry) per
+        wilayah, dari jarak terpendek di jaringan segmen yang dilalui kereta wilayah
+        itu. -1 untuk pasangan yang tidak terhubung.
+        """
+        n_stations = len(self.stations)
+        matrices = {}
+        for region, trains in self.trains_by_region.items():
+            edges = set()
+            for pattern in {train.pattern for train in trains}:
+                ids = pattern.station_ids
+                edges.update(zip(ids, ids[1:]))
+            distances = self.network.shortest_distances(n_stations, edges)
+            fares = fares_for_distances(distances, region)
+            fares.setflags(write=False)
+            matrices[region] = fares
+        return matrices
+
+    def fare_between(self, origin: int, destination: int, region: Region) -> int:
+        """Tarif (tap-in di origin, tap-out di destination) dari matriks tarif; -1 jika tidak terhubung."""
+        fares = self.fare_matrices.get(region)
+        if fares is None:
+            return -1
+        return int(fares[origin, destination])
+
+    def journey_fare(self, legs, region: Optional[Region] = None) -> int:
+        """
+        Tarif satu perjalanan: tap-in di stasiun naik leg pertama dan tap-out di
+        stasiun turun leg terakhir, jadi cukup satu lookup matriks berapa pun
+        jumlah transitnya. `legs` boleh berupa dict leg RouteFinder atau leg ringkas
+        (kereta, posisi naik, posisi turun, ...). -1 jika tidak bisa ditentukan.
+        """
+        if not legs:
+            return -1
+        first, last = legs[0], legs[-1]
+        if isinstance(first, dict):
+            origin = self.stations.get(first['start_station'])
+            destination = self.stations.get(last['destination_station'])
+            region = region or first.get('region')
+        else:
+            origin = first[0].station_ids[first[1]]
+            destination = last[0].station_ids[last[2]]
+            region = region or first[0].region
+        if origin is None or destination is None or region is None:
+            return -1
+        return self.fare_between(origin, destination, region)
+
+    def save_snapshot(self, snapshot_file: str) -> None:
+        """
+        Menyimpan jadwal yang sudah terindeks ke file biner berversi.
+        File ditulis ke berkas sementara lalu di-rename agar pembaca lain
+        tidak pernah melihat snapshot setengah jadi.
+        """
+        header = _SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self.source_hash, _hash_sources(SNAPSHOT_SOURCES)
+        )
+        payload = pickle.dumps(self.__dict__, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_file = f"{snapshot_file}.{os.getpid()}.tmp"
+        with open(tmp_file, mode='wb') as outfile:
+            outfile.write(header)
+            outfile.write(payload)
+        os.replace(tmp_file, snapshot_file)
+
+    @classmethod
+    def _read_snapshot(cls, snapshot_file: str, source_hash: bytes) -> Optional["TrainSchedule"]:
+        """
+        Membaca snapshot; None jika tidak ada, rusak, beda versi, atau CSV maupun
+        file sumber di SNAPSHOT_SOURCES sudah berubah.
+        """
+        try:
+            with open(snapshot_file, mode='rb') as infile:
+                header = infile.read(_SNAPSHOT_HEADER.size)
+                if len(header) != _SNAPSHOT_HEADER.size:
+                    return None
+                magic, version, snapshot_hash, code_hash = _SNAPSHOT_HEADER.unpack(header)
+                if (magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or snapshot_hash != source_hash
+                        or code_hash != _hash_sources(SNAPSHOT_SOURCES)):
+                    return None
+                state = pickle.load(infile)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None
+        schedule = cls.__new__(cls)
+        schedule.__dict__.update(state)
+        return schedule
+
+    @classmethod
+    def from_snapshot(cls, csv_file: str, snapshot_file: Optional[str] = None) -> "TrainSchedule":
+        """
+        Memuat jadwal dari snapshot biner tanpa parsing per baris CSV.
+        Snapshot dikunci dengan hash CSV dan hash file sumber Python yang
+        membentuk tabelnya; jika snapshot tidak ada atau basi,
+        jadwal dibangun ulang dari CSV lalu snapshot baru ditulis.
+        Catatan: snapshot memakai pickle, jadi hanya muat file yang ditulis sendiri.
+        """
+        snapshot_file = snapshot_file or default_snapshot_path(csv_file)
+        schedule = cls._read_snapshot(snapshot_file, _hash_file(csv_file))
+        if schedule is not None:
+            return schedule
+        schedule = cls(csv_file)
+        try:
+            schedule.save_snapshot(snapshot_file)
+        except OSError:
+            # Direktori read-only: tetap jalan tanpa snapshot
+            pass
+        return schedule
     
 # -- Akhir Kutipan
\ No newline at end of file